@@ -0,0 +1,187 @@
+import discord
+
+# -------------------------------------------------------------------------
+# سجل أزرار الأذكار (Azkar Component Registry)
+# -------------------------------------------------------------------------
+# - الأزرار تُبنى مرة واحدة لكل نسخة من إعدادات الأذكار في السيرفر، وتُعاد
+#   نفس الـ View في كل عملية نشر حتى تتغير الإعدادات.
+# - AzkarButton عنصر ديناميكي يُسجَّل مرة واحدة بـ bot.add_dynamic_items،
+#   فيستقبل ضغطات كل أزرار azkar_* في كل السيرفرات (حتى الأزرار المضافة
+#   بعد التشغيل) دون إعادة تشغيل البوت.
+# - المحتوى يُقرأ من ذاكرة مخزن الإعدادات، فالضغطة لا تلمس القرص.
+# - المحتوى الطويل يُقسم إلى صفحات مرة واحدة عند الحفظ (make_entry)،
+#   والضغطة تعرض الصفحة الأولى مع أزرار التالي/السابق.
+
+STYLE_MAP = {
+    'blue': discord.ButtonStyle.blurple,
+    'red': discord.ButtonStyle.red,
+    'green': discord.ButtonStyle.green,
+    'grey': discord.ButtonStyle.secondary
+}
+
+VALID_STYLES = list(STYLE_MAP)
+
+# حد ديسكورد لنص الزر: نص أطول يُفشل نشر الـ View كاملة
+BUTTON_LABEL_MAX = 80
+
+# أقل من حد وصف الـ Embed (4096) لترك مساحة للتنسيق
+PAGE_LIMIT = 3800
+
+_SENTENCE_ENDS = ('.', '!', '?', '؟', '۔', '…')
+
+
+def paginate(content, limit=PAGE_LIMIT):
+    """تقسيم المحتوى إلى صفحات عند نهاية سطر أو جملة أو كلمة، دون تجاوز limit"""
+    pages = []
+    text = content.strip()
+    while len(text) > limit:
+        window = text[:limit]
+        # الأفضل: نهاية سطر، ثم نهاية جملة، ثم مسافة، وإلا قطع مباشر
+        cut = window.rfind('\n')
+        if cut < limit // 2:
+            cut = max(window.rfind(end) for end in _SENTENCE_ENDS) + 1
+        if cut < limit // 2:
+            cut = window.rfind(' ')
+        if cut < limit // 2:
+            cut = limit
+        pages.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text or not pages:
+        pages.append(text)
+    return pages
+
+
+def make_entry(label, style, content):
+    """بناء بيانات زر أذكار مع صفحاته الجاهزة"""
+    return {
+        'label': label[:BUTTON_LABEL_MAX],
+        'style': style,
+        'content': content,
+        'pages': paginate(content)
+    }
+
+
+def page_embed(pages, page):
+    embed = discord.Embed(
+        title="📋 الأذكار المطلوبة",
+        description=pages[page],
+        color=discord.Color.gold()
+    )
+    if len(pages) > 1:
+        embed.set_footer(text=f"الصفحة {page + 1} من {len(pages)}")
+    return embed
+
+
+def page_view(key, page, total):
+    """أزرار التنقل بين الصفحات (لا شيء إذا كانت صفحة واحدة)"""
+    if total <= 1:
+        return None
+    view = discord.ui.View(timeout=None)
+    view.add_item(AzkarPageButton(key, page - 1, '◀️ السابق', disabled=page == 0))
+    view.add_item(AzkarPageButton(key, page + 1, 'التالي ▶️', disabled=page >= total - 1))
+    return view
+
+
+class AzkarButton(discord.ui.DynamicItem[discord.ui.Button], template=r'azkar_(?P<key>.+)'):
+    # يُضبط من AzkarRegistry عند إنشائه
+    registry = None
+
+    def __init__(self, key, label=None, style='grey'):
+        super().__init__(
+            discord.ui.Button(
+                label=(label or key)[:BUTTON_LABEL_MAX],
+                style=STYLE_MAP.get(style, discord.ButtonStyle.secondary),
+                custom_id=f"azkar_{key}"
+            )
+        )
+        self.key = key
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match, /):
+        return cls(match['key'])
+
+    async def callback(self, interaction: discord.Interaction):
+        pages = self.registry.pages(interaction.guild_id, self.key) if self.registry else None
+        if not pages:
+            await interaction.response.send_message("❌ هذا الزر لم يعد موجوداً.", ephemeral=True)
+            return
+        view = page_view(self.key, 0, len(pages))
+        await interaction.response.send_message(embed=page_embed(pages, 0), view=view or discord.utils.MISSING, ephemeral=True)
+
+
+class AzkarPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r'azkarpg_(?P<page>\d+)_(?P<key>.+)'):
+    def __init__(self, key, page, label='▶️', disabled=False):
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"azkarpg_{max(page, 0)}_{key}",
+                disabled=disabled
+            )
+        )
+        self.key = key
+        self.page = max(page, 0)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match, /):
+        return cls(match['key'], int(match['page']))
+
+    async def callback(self, interaction: discord.Interaction):
+        registry = AzkarButton.registry
+        pages = registry.pages(interaction.guild_id, self.key) if registry else None
+        if not pages:
+            await interaction.response.edit_message(content="❌ هذا الزر لم يعد موجوداً.", embed=None, view=None)
+            return
+        page = min(self.page, len(pages) - 1)
+        await interaction.response.edit_message(embed=page_embed(pages, page), view=page_view(self.key, page, len(pages)))
+
+
+class AzkarRegistry:
+    def __init__(self, store):
+        self.store = store
+        self._versions = {}
+        self._views = {}
+        # صفحات الأزرار القديمة المحفوظة بدون pages (تُحسب مرة واحدة فقط)
+        self._legacy_pages = {}
+        store.add_listener(self._on_settings_changed)
+        AzkarButton.registry = self
+
+    def _on_settings_changed(self, guild_id, section):
+        if section == 'azkar_buttons':
+            self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+            self._views.pop(guild_id, None)
+            self._legacy_pages = {k: v for k, v in self._legacy_pages.items() if k[0] != guild_id}
+
+    def version(self, guild_id):
+        """رقم نسخة أزرار السيرفر (يزيد مع كل تعديل)"""
+        return self._versions.get(guild_id, 0)
+
+    def entry(self, guild_id, key):
+        """بيانات زر واحد من الذاكرة"""
+        return self.store.section(guild_id, 'azkar_buttons').get(key)
+
+    def pages(self, guild_id, key):
+        """صفحات زر واحد الجاهزة، أو None إذا لم يعد الزر موجوداً"""
+        data = self.entry(guild_id, key)
+        if not data:
+            return None
+        pages = data.get('pages')
+        if pages is None:
+            pages = self._legacy_pages.get((guild_id, key))
+            if pages is None:
+                pages = self._legacy_pages[(guild_id, key)] = paginate(data['content'])
+        return pages
+
+    def view(self, guild_id):
+        """View الأزرار للسيرفر، مبنية مرة واحدة لكل نسخة من الإعدادات"""
+        cached = self._views.get(guild_id)
+        if cached is not None:
+            return cached
+
+        view = discord.ui.View(timeout=None)
+        for key, data in self.store.section(guild_id, 'azkar_buttons').items():
+            if len(view.children) >= 25: # حد ديسكورد لعدد الأزرار في الرسالة
+                break
+            view.add_item(AzkarButton(key, data['label'], data['style']))
+        self._views[guild_id] = view
+        return view
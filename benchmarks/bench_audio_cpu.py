@@ -0,0 +1,131 @@
+"""
+قياس زمن المعالج لكل بث صوتي: المسار القديم مقابل الجديد.
+
+المسار القديم: FFmpegPCMAudio (فك الترميز إلى PCM) ثم ترميز Opus داخل البوت.
+المسار الجديد: FFmpegOpusAudio مع codec='copy' (تمرير Opus/WebM كما هو).
+
+التشغيل (يتطلب ffmpeg في PATH):
+    python benchmarks/bench_audio_cpu.py [ملف_صوتي] [--seconds 60] [--streams 3]
+
+بدون ملف، يُولَّد مقطع Opus/WebM تجريبي بـ ffmpeg.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord import opus
+
+from music_queue import make_source
+
+
+def cpu_times():
+    """زمن المعالج للعملية الحالية + العمليات الفرعية المنتهية (FFmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (own.ru_utime + own.ru_stime), (children.ru_utime + children.ru_stime)
+
+
+def make_sample(path, seconds):
+    """توليد مقطع تجريبي Opus داخل WebM (نفس صيغة يوتيوب المفضلة)"""
+    subprocess.run(
+        ['ffmpeg', '-y', '-loglevel', 'error',
+         '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+         '-f', 'lavfi', '-i', f'anoisesrc=duration={seconds}:amplitude=0.05',
+         '-filter_complex', 'amix=inputs=2', '-ac', '2', '-ar', '48000',
+         '-c:a', 'libopus', '-b:a', '128k', path],
+        check=True
+    )
+
+
+def run_old(path, encoder):
+    """المسار القديم: PCM من FFmpeg ثم ترميز Opus في بايثون (كما يفعل AudioPlayer)"""
+    source = discord.FFmpegPCMAudio(path)
+    frames = 0
+    try:
+        while True:
+            data = source.read()
+            if not data:
+                break
+            if encoder is not None:
+                encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+            frames += 1
+    finally:
+        source.cleanup()
+    return frames
+
+
+def run_new(path):
+    """المسار الجديد: حزم Opus جاهزة من FFmpeg بدون فك ترميز"""
+    source = make_source({'url': path, 'codec': 'opus', 'abr': 128})
+    frames = 0
+    try:
+        while True:
+            data = source.read()
+            if not data:
+                break
+            frames += 1
+    finally:
+        source.cleanup()
+    return frames
+
+
+def measure(label, fn, streams):
+    own_before, child_before = cpu_times()
+    start = time.perf_counter()
+    frames = sum(fn() for _ in range(streams))
+    wall = time.perf_counter() - start
+    own_after, child_after = cpu_times()
+
+    own = own_after - own_before
+    child = child_after - child_before
+    print(f"{label:<28} frames={frames:>7}  ffmpeg_cpu={child / streams:7.3f}s  bot_cpu={own / streams:7.3f}s  "
+          f"total_cpu/stream={(own + child) / streams:7.3f}s  wall={wall:6.2f}s")
+    return (own + child) / streams
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?')
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--streams', type=int, default=3)
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        sys.exit("❌ ffmpeg غير موجود في PATH.")
+
+    tmpdir = None
+    path = args.path
+    if path is None:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, 'sample.webm')
+        make_sample(path, args.seconds)
+
+    encoder = None
+    try:
+        if not opus.is_loaded():
+            opus._load_default()
+        encoder = opus.Encoder()
+    except Exception:
+        print("⚠️ مكتبة libopus غير متوفرة: المسار القديم يقيس فك الترميز إلى PCM فقط (أقل من التكلفة الحقيقية).")
+
+    try:
+        print(f"الملف: {path}  |  عدد البثوث لكل مسار: {args.streams}")
+        old = measure("old: PCM + opus encode", lambda: run_old(path, encoder), args.streams)
+        new = measure("new: opus passthrough", lambda: run_new(path), args.streams)
+        if new > 0:
+            print(f"التوفير: {old / new:.1f}x أقل في زمن المعالج لكل بث")
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
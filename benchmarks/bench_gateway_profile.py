@@ -0,0 +1,187 @@
+"""
+قياس الذاكرة ومعدل معالجة الأحداث: ملف البوابة full مقابل lean.
+
+يُولَّد تدفق أحداث مسجّل (GUILD_CREATE، تحميل الأعضاء، PRESENCE_UPDATE،
+MESSAGE_CREATE، GUILD_MEMBER_ADD، VOICE_STATE_UPDATE) ثم يُمرَّر إلى
+ConnectionState الخاص بـ discord.py بنوايا وإعدادات تخزين كل ملف.
+الأحداث التي لا ترسلها البوابة بدون نية معينة (مثل presences) تُحذف من التدفق.
+
+التشغيل:
+    python benchmarks/bench_gateway_profile.py [--guilds 20] [--members 5000] [--events 200000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from discord.member import Member
+from discord.presences import RawPresenceUpdateEvent
+from discord.state import ConnectionState
+from discord.user import ClientUser
+
+from gateway_profile import PROFILES
+
+STATUSES = ['online', 'idle', 'dnd', 'offline']
+
+
+def user_payload(user_id):
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0', 'avatar': None, 'global_name': None}
+
+
+def member_payload(user_id, guild_id=None):
+    data = {'user': user_payload(user_id), 'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0}
+    if guild_id is not None:
+        data['guild_id'] = str(guild_id)
+    return data
+
+
+def presence_payload(guild_id, user_id, rng):
+    return {
+        'guild_id': str(guild_id), 'user': {'id': str(user_id)}, 'status': rng.choice(STATUSES),
+        'activities': [{'name': f'game{rng.randint(1, 50)}', 'type': 0}],
+        'client_status': {'desktop': 'online'}
+    }
+
+
+def guild_payload(guild_id, members):
+    text_id, voice_id = guild_id * 10 + 1, guild_id * 10 + 2
+    return {
+        'id': str(guild_id), 'name': f'guild{guild_id}', 'owner_id': '1', 'member_count': members,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                   'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0}],
+        'channels': [
+            {'id': str(text_id), 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []},
+            {'id': str(voice_id), 'type': 2, 'name': 'voice', 'position': 1, 'permission_overwrites': [], 'bitrate': 64000, 'user_limit': 0}
+        ],
+        'members': [], 'presences': [], 'voice_states': [], 'emojis': [], 'stickers': [], 'threads': [],
+        'features': [], 'stage_instances': [], 'guild_scheduled_events': [], 'soundboard_sounds': []
+    }
+
+
+def record_stream(guilds, members, events, seed=1):
+    """تدفق أحداث ثابت: ~70% presences، ~25% رسائل، والباقي انضمامات وصوت"""
+    rng = random.Random(seed)
+    stream = []
+    next_user = 10**9
+    for _ in range(events):
+        guild_id = rng.randint(1, guilds) * 1000
+        user_id = guild_id * 100_000 + rng.randint(1, members)
+        roll = rng.random()
+        if roll < 0.70:
+            stream.append(('PRESENCE_UPDATE', presence_payload(guild_id, user_id, rng)))
+        elif roll < 0.95:
+            stream.append(('MESSAGE_CREATE', {
+                'id': str(rng.getrandbits(60)), 'channel_id': str(guild_id * 10 + 1), 'guild_id': str(guild_id),
+                'author': user_payload(user_id), 'member': member_payload(user_id), 'content': 'سلام عليكم',
+                'timestamp': '2024-01-01T00:00:00+00:00', 'edited_timestamp': None, 'tts': False,
+                'mention_everyone': False, 'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': [],
+                'pinned': False, 'type': 0
+            }))
+        elif roll < 0.98:
+            next_user += 1
+            stream.append(('GUILD_MEMBER_ADD', member_payload(next_user, guild_id)))
+        else:
+            joining = rng.random() < 0.5
+            stream.append(('VOICE_STATE_UPDATE', {
+                'guild_id': str(guild_id), 'channel_id': str(guild_id * 10 + 2) if joining else None,
+                'user_id': str(user_id), 'member': member_payload(user_id), 'session_id': 'x',
+                'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False, 'self_video': False,
+                'suppress': False, 'request_to_speak_timestamp': None
+            }))
+    return stream
+
+
+def delivered(stream, intents):
+    """الأحداث التي ترسلها البوابة فعلاً حسب النوايا المفعّلة"""
+    if intents.presences:
+        return stream
+    return [event for event in stream if event[0] != 'PRESENCE_UPDATE']
+
+
+def build_state(options, guilds, members):
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=None, max_messages=1000, **options)
+    state.user = ClientUser(state=state, data={**user_payload(1), 'bot': True, 'mfa_enabled': False, 'verified': True})
+
+    rng = random.Random(2)
+    for g in range(1, guilds + 1):
+        guild_id = g * 1000
+        guild = state._add_guild_from_data(guild_payload(guild_id, members))
+        if options['chunk_guilds_at_startup']:
+            # محاكاة GUILD_MEMBERS_CHUNK عند الإقلاع: كل الأعضاء مع حالاتهم
+            for i in range(1, members + 1):
+                user_id = guild_id * 100_000 + i
+                member = Member(data=member_payload(user_id), guild=guild, state=state)
+                presence = presence_payload(guild_id, user_id, rng)
+                member._presence_update(RawPresenceUpdateEvent(data=presence, state=state), presence['user'])
+                guild._add_member(member)
+    return state
+
+
+def replay(state, events):
+    parsers = state.parsers
+    for event, data in events:
+        parsers[event](data)
+
+
+def run_profile(name, guilds, members, stream):
+    options = PROFILES[name]()
+    events = delivered(stream, options['intents'])
+
+    # تمرير أول لقياس الذاكرة (tracemalloc يبطئ التنفيذ فلا يُستخدم للتوقيت)
+    gc.collect()
+    tracemalloc.start()
+    state = build_state(options, guilds, members)
+    startup_mem = tracemalloc.get_traced_memory()[0]
+    replay(state, events)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cached = sum(len(guild._members) for guild in state.guilds)
+    del state
+
+    # تمرير ثانٍ لقياس زمن معالجة التدفق
+    gc.collect()
+    state = build_state(options, guilds, members)
+    start = time.perf_counter()
+    replay(state, events)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'profile': name,
+        'events_in': len(stream),
+        'events_delivered': len(events),
+        'seconds': elapsed,
+        'events_per_sec': len(events) / elapsed if elapsed else 0.0,
+        'cached_members': cached,
+        'startup_mb': startup_mem / 2**20,
+        'final_mb': current / 2**20,
+        'peak_mb': peak / 2**20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guilds', type=int, default=20)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=200_000)
+    args = parser.parse_args()
+
+    stream = record_stream(args.guilds, args.members, args.events)
+    results = [run_profile(name, args.guilds, args.members, stream) for name in ('full', 'lean')]
+
+    print(f"{'profile':<8}{'delivered':>12}{'ev/s':>12}{'busy s':>9}{'members':>10}{'startup MB':>12}{'final MB':>10}{'peak MB':>9}")
+    for r in results:
+        print(f"{r['profile']:<8}{r['events_delivered']:>12}{r['events_per_sec']:>12.0f}{r['seconds']:>9.2f}"
+              f"{r['cached_members']:>10}{r['startup_mb']:>12.1f}{r['final_mb']:>10.1f}{r['peak_mb']:>9.1f}")
+    full, lean = results
+    print(f"\nأحداث أقل: {1 - lean['events_delivered'] / full['events_delivered']:.0%}، "
+          f"زمن معالجة أقل: {1 - lean['seconds'] / full['seconds']:.0%}، "
+          f"ذاكرة أقل: {1 - lean['final_mb'] / full['final_mb']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+قياس زمن الإقلاع والذاكرة المقيمة لخادم keep_alive: aiohttp مقابل Flask.
+
+كل خادم يُشغَّل في عملية مستقلة (مع استيراد discord.py كما في البوت)، ثم يُقاس:
+- زمن الإقلاع: من بدء العملية حتى أول رد ناجح على /
+- الذاكرة المقيمة (VmRSS) بعد أول رد وبعد --requests طلب
+- زمن الاستجابة المتوسط للطلبات
+
+التشغيل (لينكس، يقرأ /proc):
+    python benchmarks/bench_keep_alive.py [--requests 500] [--runs 3]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'aiohttp': """
+        import asyncio
+        import discord
+        from keep_alive import KeepAliveServer
+
+        async def main():
+            await KeepAliveServer(port=PORT).start()
+            await asyncio.Event().wait()
+
+        asyncio.run(main())
+    """,
+    'flask': """
+        import time
+        import discord
+        from keep_alive import keep_alive
+
+        keep_alive(port=PORT)
+        while True:
+            time.sleep(3600)
+    """,
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def get(url, timeout=1.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def run_once(name, requests):
+    port = free_port()
+    code = textwrap.dedent(SERVERS[name]).replace('PORT', str(port))
+    url = f'http://127.0.0.1:{port}/'
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'خادم {name} توقف قبل أن يستجيب')
+            try:
+                get(url, timeout=0.2)
+                break
+            except OSError:
+                time.sleep(0.005)
+        startup = time.perf_counter() - start
+        rss_start = rss_mb(process.pid)
+
+        latencies = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            get(url)
+            latencies.append(time.perf_counter() - t0)
+        rss_end = rss_mb(process.pid)
+    finally:
+        process.kill()
+        process.wait()
+    return startup, rss_start, rss_end, statistics.mean(latencies) if latencies else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'server':<9}{'startup s':>11}{'RSS start MB':>14}{'RSS end MB':>12}{'avg req ms':>12}")
+    results = {}
+    for name in SERVERS:
+        runs = [run_once(name, args.requests) for _ in range(args.runs)]
+        startup, rss_start, rss_end, latency = (statistics.median(values) for values in zip(*runs))
+        results[name] = (startup, rss_end)
+        print(f"{name:<9}{startup:>11.3f}{rss_start:>14.1f}{rss_end:>12.1f}{latency * 1000:>12.2f}")
+
+    (a_startup, a_rss), (f_startup, f_rss) = results['aiohttp'], results['flask']
+    print(f"\naiohttp: إقلاع أسرع بـ {1 - a_startup / f_startup:.0%}، ذاكرة أقل بـ {f_rss - a_rss:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+قياس سرعة المسح (رسالة/ث) لمحرك /مسح مقابل طرق أبسط، على خادم HTTP محلي يحاكي ديسكورد.
+
+الخادم (aiohttp على 127.0.0.1) يحفظ الرسائل في الذاكرة ويضيف تأخير --latency لكل طلب:
+- GET    /messages?before=ID      => صفحة من 100 رسالة (الأحدث أولاً)
+- POST   /bulk-delete             => حذف حتى 100 رسالة أحدث من 14 يوماً
+- DELETE /messages/ID             => حذف رسالة واحدة
+
+الطرق المقارنة:
+- single:     قراءة السجل وحذف كل رسالة بطلب مستقل (بدون حد معدل: أفضل حالة لها)
+- sequential: قراءة صفحة ثم انتظار حذفها جماعياً ثم الصفحة التالية
+- engine:     PurgeEngine (الحذف الجماعي يعمل أثناء قراءة الصفحة التالية،
+              والرسائل الأقدم من 14 يوماً بحذف فردي محدود المعدل)
+
+التشغيل:
+    python benchmarks/bench_purge.py [--messages 5000] [--old 10] [--latency 40]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purge import PurgeEngine, build_filter  # noqa: E402
+
+PAGE = 100
+
+
+# ----------------------------------------------------------------------
+# الخادم المحلي
+# ----------------------------------------------------------------------
+
+class FakeDiscord:
+    def __init__(self, latency):
+        self.latency = latency
+        self.messages = {}
+        self.requests = 0
+
+    def reset(self, count, old):
+        """count رسالة، آخر old منها أقدم من 14 يوماً"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.messages = {}
+        for i in range(count):
+            age = datetime.timedelta(days=20, minutes=i) if i >= count - old else datetime.timedelta(seconds=i)
+            message_id = count - i
+            self.messages[message_id] = {
+                'id': message_id,
+                'ts': (now - age).timestamp(),
+                'author': 1 + i % 7,
+                'bot': i % 3 == 0,
+                'content': f'spam {i}' if i % 2 else f'hello {i}',
+                'attachments': i % 5 == 0,
+            }
+        self.requests = 0
+
+    async def _delay(self):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+    async def history(self, request):
+        await self._delay()
+        before = int(request.query.get('before', 2 ** 62))
+        ids = sorted((i for i in self.messages if i < before), reverse=True)[:PAGE]
+        return web.json_response([self.messages[i] for i in ids])
+
+    async def bulk_delete(self, request):
+        await self._delay()
+        ids = (await request.json())['messages']
+        cutoff = time.time() - 14 * 86400
+        if len(ids) > PAGE or any(self.messages.get(i, {'ts': time.time()})['ts'] < cutoff for i in ids):
+            return web.json_response({'code': 50034}, status=400)
+        for i in ids:
+            self.messages.pop(i, None)
+        return web.Response(status=204)
+
+    async def delete(self, request):
+        await self._delay()
+        if self.messages.pop(int(request.match_info['id']), None) is None:
+            return web.json_response({'code': 10008}, status=404)
+        return web.Response(status=204)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/messages', self.history)
+        app.router.add_post('/bulk-delete', self.bulk_delete)
+        app.router.add_delete('/messages/{id}', self.delete)
+        return app
+
+
+# ----------------------------------------------------------------------
+# قناة وهمية بنفس واجهة discord.TextChannel التي يستخدمها المحرك
+# ----------------------------------------------------------------------
+
+class FakeMessage:
+    __slots__ = ('id', 'created_at', 'author', 'content', 'attachments', 'pinned', '_http')
+
+    def __init__(self, data, http):
+        self.id = data['id']
+        self.created_at = datetime.datetime.fromtimestamp(data['ts'], datetime.timezone.utc)
+        self.author = SimpleNamespace(id=data['author'], bot=data['bot'])
+        self.content = data['content']
+        self.attachments = [object()] if data['attachments'] else []
+        self.pinned = False
+        self._http = http
+
+    async def delete(self):
+        async with self._http.session.delete(f'{self._http.base}/messages/{self.id}') as response:
+            response.raise_for_status()
+
+
+class FakeChannel:
+    def __init__(self, session, base):
+        self.session = session
+        self.base = base
+
+    async def history(self, limit=None, before=None):
+        cursor = None
+        while True:
+            params = {'before': str(cursor)} if cursor else {}
+            async with self.session.get(f'{self.base}/messages', params=params) as response:
+                page = await response.json()
+            for data in page:
+                yield FakeMessage(data, self)
+            if len(page) < PAGE:
+                return
+            cursor = page[-1]['id']
+
+    async def delete_messages(self, messages):
+        ids = [message.id for message in messages]
+        async with self.session.post(f'{self.base}/bulk-delete', json={'messages': ids}) as response:
+            response.raise_for_status()
+
+
+# ----------------------------------------------------------------------
+# الطرق المقارنة
+# ----------------------------------------------------------------------
+
+async def purge_single(channel, predicate, limit):
+    deleted = 0
+    async for message in channel.history():
+        if deleted >= limit:
+            break
+        if predicate(message):
+            await message.delete()
+            deleted += 1
+    return deleted
+
+
+async def purge_sequential(channel, predicate, limit, single_rate):
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=14)
+    deleted, chunk = 0, []
+    async for message in channel.history():
+        if deleted + len(chunk) >= limit:
+            break
+        if not predicate(message):
+            continue
+        if message.created_at > cutoff:
+            chunk.append(message)
+            if len(chunk) == PAGE:
+                await channel.delete_messages(chunk)
+                deleted += len(chunk)
+                chunk = []
+        else:
+            # نفس حد الحذف الفردي الذي يطبقه المحرك
+            await message.delete()
+            await asyncio.sleep(1 / single_rate)
+            deleted += 1
+    if chunk:
+        await channel.delete_messages(chunk)
+        deleted += len(chunk)
+    return deleted
+
+
+async def purge_engine(channel, predicate, limit, single_rate):
+    engine = PurgeEngine(single_rate=single_rate, single_per=1.0)
+    job = engine.reserve(1, 1, limit)
+    await engine.run(job, channel, predicate)
+    return job.deleted
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--old', type=int, default=10, help='عدد الرسائل الأقدم من 14 يوماً (في آخر السجل)')
+    parser.add_argument('--latency', type=float, default=40, help='تأخير كل طلب بالمللي ثانية')
+    parser.add_argument('--single-limit', type=int, default=300, help='عدد الرسائل لطريقة single (بطيئة جداً)')
+    parser.add_argument('--single-rate', type=float, default=5.0, help='حد الحذف الفردي (رسالة/ث) للمحرك و sequential')
+    parser.add_argument('--filter', choices=['none', 'bots'], default='none')
+    args = parser.parse_args()
+
+    fake = FakeDiscord(args.latency / 1000)
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    predicate = build_filter(bots=args.filter == 'bots')
+    methods = {
+        'single': lambda channel: purge_single(channel, predicate, args.single_limit),
+        'sequential': lambda channel: purge_sequential(channel, predicate, args.messages, args.single_rate),
+        'engine': lambda channel: purge_engine(channel, predicate, args.messages, args.single_rate),
+    }
+
+    print(f"{'method':<12}{'deleted':>9}{'requests':>10}{'seconds':>10}{'msg/s':>10}")
+    rates = {}
+    async with aiohttp.ClientSession() as session:
+        channel = FakeChannel(session, f'http://127.0.0.1:{port}')
+        for name, run in methods.items():
+            fake.reset(args.messages, args.old)
+            start = time.perf_counter()
+            deleted = await run(channel)
+            elapsed = time.perf_counter() - start
+            rates[name] = deleted / elapsed
+            print(f"{name:<12}{deleted:>9}{fake.requests:>10}{elapsed:>10.2f}{rates[name]:>10.1f}")
+
+    await runner.cleanup()
+    print(f"\nengine: أسرع بـ {rates['engine'] / rates['single']:.0f}x من الحذف الفردي، "
+          f"وبـ {rates['engine'] / rates['sequential'] - 1:.0%} من الحذف الجماعي المتسلسل")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+import discord
+
+# -------------------------------------------------------------------------
+# مزامنة أوامر الـ Slash مع ذاكرة للبصمة (Command Sync Manager)
+# -------------------------------------------------------------------------
+# tree.sync() يعيد رفع كل الأوامر ويستهلك حد المزامنة العام. هنا تُحسب بصمة
+# (SHA-256) لشجرة الأوامر بعد تحويلها لـ JSON، وتُحفظ محلياً لكل نطاق،
+# ولا تتم المزامنة إلا إذا تغيرت البصمة.
+#
+# للتطوير: DEV_GUILD_IDS="123,456" ينسخ الأوامر لتلك السيرفرات ويزامنها فقط
+# (تظهر فوراً)، بدلاً من المزامنة العامة التي قد تتأخر.
+# FORCE_COMMAND_SYNC=1 يفرض المزامنة حتى لو لم تتغير البصمة.
+
+
+def dev_guild_ids():
+    """آيديات سيرفرات التطوير من DEV_GUILD_IDS"""
+    ids = os.environ.get('DEV_GUILD_IDS', '')
+    return [int(guild_id) for guild_id in ids.split(',') if guild_id.strip()]
+
+
+class CommandSyncManager:
+    def __init__(self, tree, path='command_sync.json', guild_ids=None, force=None):
+        self.tree = tree
+        self.path = path
+        self.guild_ids = dev_guild_ids() if guild_ids is None else list(guild_ids)
+        self.force = os.environ.get('FORCE_COMMAND_SYNC') == '1' if force is None else force
+        self.synced = 0
+        self.skipped = 0
+
+    # ------------------------------------------------------------------
+    # البصمة
+    # ------------------------------------------------------------------
+
+    def tree_hash(self, guild=None):
+        """بصمة الأوامر المسجلة في النطاق (عام أو سيرفر واحد)"""
+        payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda data: (data.get('type', 1), data['name'])
+        )
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    def _scope(self, guild=None):
+        # البصمة مرتبطة بالتطبيق أيضاً (توكن آخر = أوامر غير مسجلة بعد)
+        application_id = self.tree.client.application_id
+        return f"{application_id}:{'global' if guild is None else guild.id}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ تعذر قراءة {self.path}، ستتم المزامنة من جديد: {e}")
+            return {}
+
+    def _save(self, hashes):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(hashes, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------
+    # المزامنة
+    # ------------------------------------------------------------------
+
+    async def _sync_scope(self, hashes, guild=None):
+        scope = self._scope(guild)
+        digest = self.tree_hash(guild)
+        if not self.force and hashes.get(scope) == digest:
+            self.skipped += 1
+            return False
+
+        commands = await self.tree.sync(guild=guild)
+        hashes[scope] = digest
+        self.synced += 1
+        where = 'عام' if guild is None else f'السيرفر {guild.id}'
+        print(f"🔄 تمت مزامنة {len(commands)} أمراً ({where}).")
+        return True
+
+    async def sync(self):
+        """مزامنة النطاقات التي تغيرت بصمتها فقط، ويرجع عدد النطاقات المُزامنة"""
+        hashes = self._load()
+        changed = 0
+        try:
+            if self.guild_ids:
+                # وضع التطوير: الأوامر العامة تُنسخ لسيرفرات التطوير وتُزامن هناك فقط
+                for guild_id in self.guild_ids:
+                    guild = discord.Object(id=guild_id)
+                    self.tree.copy_global_to(guild=guild)
+                    changed += await self._sync_scope(hashes, guild)
+            else:
+                changed += await self._sync_scope(hashes)
+        finally:
+            if changed:
+                self._save(hashes)
+
+        if not changed:
+            print("✅ أوامر الـ Slash لم تتغير، لا حاجة للمزامنة.")
+        return changed
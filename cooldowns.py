@@ -0,0 +1,84 @@
+import heapq
+import time
+
+# -------------------------------------------------------------------------
+# فترات التهدئة (Cooldowns) للردود التلقائية
+# -------------------------------------------------------------------------
+# قاموس: المفتاح => وقت انتهاء التهدئة، وكومة (heap) مرتبة بوقت الانتهاء.
+# المدد مختلفة (10/3/5 ثوانٍ وحتى ساعة)، فأقدم تسجيل ليس بالضرورة أول منتهٍ؛
+# الكومة تعطي أقرب انتهاء دائماً، فتُحذف المفاتيح المنتهية فقط ولا تُفقد
+# تهدئة ما زالت سارية. الفحص O(1) والتسجيل O(log n).
+# الكومة قد تحمل نسخاً قديمة لمفتاح أُعيد تسجيله، وتُتجاهل عند إخراجها.
+# بعد تجاوز max_entries تُحذف كل المفاتيح المنتهية دفعة واحدة، فإن بقي العدد
+# فوق الحد تُحذف التهدئات الأقرب انتهاءً (رأس الكومة) حتى يعود إليه، فالذاكرة
+# محدودة فعلاً حتى تحت سيل من المفاتيح الجديدة.
+
+# الأقسام في إعدادات السيرفر: auto_responses_cooldown => {'keyword', 'channel', 'user'} بالثواني
+DEFAULT_COOLDOWNS = {'keyword': 10, 'channel': 3, 'user': 5}
+
+COOLDOWN_SCOPES = list(DEFAULT_COOLDOWNS)
+
+
+class CooldownTracker:
+    def __init__(self, max_entries=100_000, prune_batch=32):
+        self.max_entries = max_entries
+        self.prune_batch = prune_batch
+        self._expiry = {}
+        # [(وقت الانتهاء، المفتاح)]
+        self._heap = []
+        self.suppressed = 0
+        self.evicted = 0
+
+    def remaining(self, key, now=None):
+        """الثواني المتبقية من تهدئة المفتاح (0 إذا لم يكن في تهدئة)"""
+        expiry = self._expiry.get(key)
+        if expiry is None:
+            return 0.0
+        left = expiry - (now if now is not None else time.monotonic())
+        if left <= 0:
+            del self._expiry[key]
+            return 0.0
+        return left
+
+    def hit(self, key, window, now=None):
+        """بدء تهدئة للمفتاح لمدة window ثانية"""
+        if window <= 0:
+            return
+        now = now if now is not None else time.monotonic()
+        self._expiry[key] = now + window
+        heapq.heappush(self._heap, (now + window, key))
+        self._prune(now)
+
+    def _prune(self, now):
+        expiry, heap = self._expiry, self._heap
+        # دفعة صغيرة مع كل تسجيل، وكل المنتهي إذا تجاوزنا الحد
+        budget = self.prune_batch if len(expiry) <= self.max_entries else len(heap)
+        while heap and budget and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            if expiry.get(key) == expires_at:
+                del expiry[key]
+            budget -= 1
+        # ما زلنا فوق الحد بمفاتيح سارية => حذف الأقرب انتهاءً (أقل ما يُفقد)
+        while heap and len(expiry) > self.max_entries:
+            expires_at, key = heapq.heappop(heap)
+            if expiry.get(key) == expires_at:
+                del expiry[key]
+                self.evicted += 1
+        # نسخ قديمة كثيرة (مفاتيح أُعيد تسجيلها بمدد طويلة) => إعادة بناء الكومة
+        if len(heap) > 2 * len(expiry) + self.prune_batch:
+            self._heap = [(expires_at, key) for key, expires_at in expiry.items()]
+            heapq.heapify(self._heap)
+
+    def try_acquire(self, keys, now=None):
+        """keys: [(المفتاح، المدة)]. إذا لم يكن أي مفتاح في تهدئة تبدأ تهدئة الكل ويرجع True"""
+        now = now if now is not None else time.monotonic()
+        for key, window in keys:
+            if window > 0 and self.remaining(key, now):
+                self.suppressed += 1
+                return False
+        for key, window in keys:
+            self.hit(key, window, now)
+        return True
+
+    def __len__(self):
+        return len(self._expiry)
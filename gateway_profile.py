@@ -0,0 +1,70 @@
+import os
+
+import discord
+
+# -------------------------------------------------------------------------
+# ملفات النوايا والتخزين المؤقت للأعضاء (Gateway Profiles)
+# -------------------------------------------------------------------------
+# - lean (الافتراضي): بدون presences (أكبر حصة من أحداث البوابة ولا يقرأها البوت)،
+#   بدون تحميل كل الأعضاء عند الإقلاع، والأعضاء يُحفظون في الذاكرة فقط أثناء
+#   وجودهم في قناة صوتية (يحتاجها فحص المستمعين في voice_manager.py).
+#   أي عضو آخر يُجلب عند الحاجة فقط بـ resolve_member.
+# - full: الإعدادات القديمة (كل النوايا، تحميل وتخزين كل الأعضاء).
+#
+# الاختيار بمتغير البيئة BOT_GATEWAY_PROFILE.
+
+DEFAULT_PROFILE = 'lean'
+
+
+def _base_intents():
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True # مطلوبة لحدث on_member_join (الترحيب)
+    intents.guilds = True
+    intents.moderation = True
+    return intents
+
+
+def lean_profile():
+    intents = _base_intents()
+    intents.presences = False
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags(voice=True, joined=False),
+        'chunk_guilds_at_startup': False
+    }
+
+
+def full_profile():
+    intents = _base_intents()
+    intents.presences = True
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'chunk_guilds_at_startup': True
+    }
+
+
+PROFILES = {
+    'lean': lean_profile,
+    'full': full_profile
+}
+
+
+def gateway_options(name=None):
+    """خيارات commands.Bot للملف المطلوب (intents، member_cache_flags، chunk_guilds_at_startup)"""
+    name = (name or os.environ.get('BOT_GATEWAY_PROFILE') or DEFAULT_PROFILE).lower()
+    if name not in PROFILES:
+        raise ValueError(f"ملف بوابة غير معروف: {name} (المتاح: {', '.join(PROFILES)})")
+    return PROFILES[name]()
+
+
+async def resolve_member(guild, user_id):
+    """العضو من الذاكرة إن وُجد، وإلا يُجلب من API (None إذا غادر السيرفر)"""
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
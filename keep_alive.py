@@ -1,20 +1,127 @@
-from flask import Flask
-from threading import Thread
+import os
 
-# تهيئة تطبيق Flask
-app = Flask('')
+from aiohttp import web
 
-# دالة مسار الصفحة الرئيسية (تظهر عند زيارة الرابط العام)
-@app.route('/')
-def home():
-    return "Bot is awake and running!"
+# -------------------------------------------------------------------------
+# خادم HTTP داخل حلقة أحداث البوت (aiohttp، مرفقة مع discord.py)
+# -------------------------------------------------------------------------
+# بدون Thread ولا خادم تطوير Flask: المسارات تعمل في نفس الحلقة، فتقرأ حالة
+# البوت مباشرة دون مشاكل الخيوط، والخادم يُغلق مع البوت.
+# Flask متاح كبديل اختياري: KEEP_ALIVE_BACKEND=flask (يُستورد عند الطلب فقط).
+#
+# المسارات: / ، /shards (صحة كل جزء)، /metrics (Prometheus)، /health
+#
+# المنفذ: KEEP_ALIVE_PORT (أو PORT الذي تضبطه الاستضافة)، وإلا 8080.
+# عند تشغيل الأجزاء في عمليات منفصلة (SHARD_IDS) تحتاج كل عملية منفذاً مختلفاً.
 
-# دالة لتشغيل الخادم في Thread منفصلة
-def run():
-    # تشغيل الخادم على المنفذ 8080 وبشكل عام
-    app.run(host='0.0.0.0', port=8080)
+HOST = '0.0.0.0'
+PORT = int(os.environ.get('KEEP_ALIVE_PORT') or os.environ.get('PORT') or 8080)
 
-# الدالة الرئيسية التي يتم استدعاؤها من main.py
-def keep_alive():
-    t = Thread(target=run)
+HOME_TEXT = "Bot is awake and running!"
+
+
+def backend():
+    """aiohttp (الافتراضي) أو flask"""
+    return os.environ.get('KEEP_ALIVE_BACKEND', 'aiohttp').lower()
+
+
+class KeepAliveServer:
+    def __init__(self, monitor=None, metrics=None, host=HOST, port=PORT):
+        self.monitor = monitor
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self._runner = None
+        self.app.router.add_get('/', self.home)
+        self.app.router.add_get('/shards', self.shards)
+        self.app.router.add_get('/metrics', self.metrics_page)
+        self.app.router.add_get('/health', self.health)
+
+    def add_route(self, path, handler):
+        """إضافة مسار آخر للبوت على نفس الخادم (handler(request) => Response)"""
+        self.app.router.add_get(path, handler)
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError:
+            await self._runner.cleanup()
+            self._runner = None
+            raise
+        print(f"🌐 خادم keep_alive يعمل على المنفذ {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ------------------------------------------------------------------
+    # المسارات
+    # ------------------------------------------------------------------
+
+    async def home(self, request):
+        return web.Response(text=HOME_TEXT)
+
+    async def shards(self, request):
+        if self.monitor is None:
+            return web.json_response({'error': 'shard monitor not attached'}, status=503)
+        return web.json_response(self.monitor.snapshot())
+
+    async def metrics_page(self, request):
+        if self.metrics is None:
+            return web.Response(text="metrics not attached\n", status=503)
+        return web.Response(
+            body=self.metrics.render().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+
+    async def health(self, request):
+        if self.metrics is None:
+            return web.json_response({'status': 'unknown'}, status=503)
+        healthy, details = self.metrics.health()
+        return web.json_response(details, status=200 if healthy else 503)
+
+
+# -------------------------------------------------------------------------
+# البديل: Flask في Thread (الطريقة القديمة)
+# -------------------------------------------------------------------------
+
+def keep_alive(monitor=None, metrics=None, host=HOST, port=PORT):
+    """تشغيل نفس المسارات بخادم Flask في Thread خلفية (daemon لا يمنع الإغلاق)"""
+    from threading import Thread
+
+    from flask import Flask, Response, jsonify
+
+    app = Flask('')
+
+    @app.route('/')
+    def home():
+        return HOME_TEXT
+
+    @app.route('/shards')
+    def shards():
+        if monitor is None:
+            return jsonify({'error': 'shard monitor not attached'}), 503
+        return jsonify(monitor.snapshot())
+
+    @app.route('/metrics')
+    def metrics_page():
+        if metrics is None:
+            return Response("metrics not attached\n", status=503, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    @app.route('/health')
+    def health():
+        if metrics is None:
+            return jsonify({'status': 'unknown'}), 503
+        healthy, details = metrics.health()
+        return jsonify(details), 200 if healthy else 503
+
+    t = Thread(target=app.run, kwargs={'host': host, 'port': port}, daemon=True)
     t.start()
+    return t
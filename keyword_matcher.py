@@ -0,0 +1,118 @@
+from collections import deque
+
+# -------------------------------------------------------------------------
+# مطابق الكلمات المفتاحية المُجمّع (Aho-Corasick) للردود التلقائية
+# -------------------------------------------------------------------------
+# يُبنى مرة واحدة عند تعديل جدول الردود، ثم يبحث عن كل الكلمات
+# في مرور واحد على نص الرسالة بدلاً من فحص كل كلمة على حدة.
+
+# التشكيل + التطويل
+_TASHKEEL = [chr(c) for c in range(0x064B, 0x0653)] + ['ٰ', 'ـ']
+
+# توحيد أشكال الألف والياء
+_ARABIC_MAP = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي',
+}
+
+_NORMALIZE_TABLE = str.maketrans({**{c: None for c in _TASHKEEL}, **_ARABIC_MAP})
+
+
+def normalize_arabic(text):
+    """إزالة التشكيل وتوحيد أشكال الألف والياء"""
+    return text.translate(_NORMALIZE_TABLE)
+
+
+class KeywordMatcher:
+    def __init__(self, responses, whole_word=False, normalize=False):
+        self.whole_word = whole_word
+        self.normalize = normalize
+        # كل حالة: (انتقالات، رابط الفشل، [(أولوية، طول الكلمة)])
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._responses = []
+        self._keywords = []
+        self._build(responses)
+
+    def _prepare(self, text):
+        text = text.lower()
+        if self.normalize:
+            text = normalize_arabic(text)
+        return text
+
+    def _build(self, responses):
+        for priority, (keyword, response) in enumerate(responses.items()):
+            self._responses.append(response)
+            self._keywords.append(keyword)
+            pattern = self._prepare(keyword)
+            if not pattern:
+                continue
+
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((priority, len(pattern)))
+
+        # بناء روابط الفشل بالعرض (BFS) ودمج المخرجات
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # الأقل أولوية أولاً حتى نتوقف مبكراً عند أول تطابق صالح
+        for out in self._out:
+            out.sort()
+
+    def _is_word(self, text, start, end):
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+        return True
+
+    def match(self, content):
+        """إرجاع رد أول كلمة (حسب ترتيب الإضافة) موجودة في النص، أو None"""
+        found = self.match_keyword(content)
+        return None if found is None else found[1]
+
+    def match_keyword(self, content):
+        """مثل match لكن يرجع (الكلمة، الرد) لاستخدام الكلمة في فترات التهدئة"""
+        if not self._responses:
+            return None
+
+        text = self._prepare(content)
+        goto, fail, out = self._goto, self._fail, self._out
+        best = None
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for priority, length in out[state]:
+                if best is not None and priority >= best:
+                    break
+                if self.whole_word and not self._is_word(text, i - length + 1, i + 1):
+                    continue
+                best = priority
+                break
+
+            if best == 0:
+                break
+
+        return None if best is None else (self._keywords[best], self._responses[best])
@@ -0,0 +1,578 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+import discord
+
+from gateway_profile import resolve_member
+
+# -------------------------------------------------------------------------
+# محرك لعبة المافيا (حالات: انتظار => ليل => نهار => تصويت => ... => انتهت)
+# -------------------------------------------------------------------------
+# - كل لعبة سجل مضغوط (__slots__) يحمل آيديات اللاعبين فقط، وليس كائنات Member.
+# - كل لعبة تعمل في مهمة مستقلة بمؤقتات للمراحل، فلا تؤثر لعبة على أخرى.
+# - الأدوار وطلبات أفعال الليل تُرسل للاعبين بالتوازي بحد أقصى (dm_concurrency)،
+#   مع مهلة لكل رسالة حتى لا يعطل لاعب بطيء بقية اللاعبين أو الألعاب.
+# - الأزرار والقوائم عناصر ديناميكية (mafia_*) تعمل حتى بعد إعادة التشغيل.
+# - الحالة تُحفظ في ملف (checkpoint) عند كل تغيير وتُستعاد عند الإقلاع.
+
+LOBBY_SECONDS = 60
+NIGHT_SECONDS = 60
+DAY_SECONDS = 120
+VOTE_SECONDS = 60
+
+ROLE_MAFIA = 'مافيا'
+ROLE_DOCTOR = 'طبيب'
+ROLE_SHERIFF = 'شريف'
+ROLE_DETECTIVE = 'محقق'
+ROLE_VILLAGER = 'مواطن'
+
+# الأدوار التي تختار هدفاً في الليل
+NIGHT_PROMPTS = {
+    ROLE_MAFIA: "🔪 اختر ضحية الليلة:",
+    ROLE_DOCTOR: "💉 اختر من تحميه الليلة (يمكنك حماية نفسك):",
+    ROLE_SHERIFF: "⭐ اختر من تتحقق منه (هل هو مافيا؟):",
+    ROLE_DETECTIVE: "🔍 اختر من تكشف دوره:"
+}
+
+ROLE_RULES = (
+    "**القوانين الأساسية:**\n- **المافيا:** مهمتهم القتل في الليل.\n- **الطبيب:** مهمته حماية شخص في الليل.\n"
+    "- **الشريف:** يمكنه التحقق من هوية مشتبه به.\n- **المواطن:** مهمته كشف المافيا بالنقاش والتصويت في النهار."
+)
+
+
+def assign_roles(player_ids, rng=random):
+    """توزيع الأدوار: مافيا لكل 4 لاعبين، طبيب وشريف ومحقق، والباقي مواطنون"""
+    count = len(player_ids)
+    roles = [ROLE_MAFIA] * max(1, count // 4)
+    roles += [ROLE_DOCTOR, ROLE_SHERIFF, ROLE_DETECTIVE]
+    roles += [ROLE_VILLAGER] * (count - len(roles))
+    rng.shuffle(roles)
+    return dict(zip(player_ids, roles))
+
+
+class Player:
+    __slots__ = ('user_id', 'name', 'role', 'alive')
+
+    def __init__(self, user_id, name, role=None, alive=True):
+        self.user_id = user_id
+        self.name = name
+        self.role = role
+        self.alive = alive
+
+    def to_list(self):
+        return [self.user_id, self.name, self.role, self.alive]
+
+
+class MafiaGame:
+    __slots__ = ('guild_id', 'channel_id', 'host_id', 'min_players', 'phase', 'round', 'deadline',
+                 'players', 'actions', 'votes', 'winner')
+
+    def __init__(self, guild_id, channel_id, host_id, min_players):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.host_id = host_id
+        self.min_players = min_players
+        self.phase = 'lobby'
+        self.round = 0
+        self.deadline = 0.0 # وقت انتهاء المرحلة (time.time) ليبقى صالحاً بعد إعادة التشغيل
+        self.players = {}
+        self.actions = {} # آيدي صاحب الدور => آيدي الهدف (الليلة الحالية)
+        self.votes = {} # آيدي المصوّت => آيدي المتهم (التصويت الحالي)
+        self.winner = None
+
+    def alive(self, role=None):
+        return [p for p in self.players.values() if p.alive and (role is None or p.role == role)]
+
+    def check_winner(self):
+        """'mafia' أو 'town' أو None إذا لم تنته اللعبة"""
+        mafia = len(self.alive(ROLE_MAFIA))
+        others = len(self.alive()) - mafia
+        if mafia == 0:
+            return 'town'
+        if mafia >= others:
+            return 'mafia'
+        return None
+
+    def to_dict(self):
+        return {
+            'guild_id': self.guild_id, 'channel_id': self.channel_id, 'host_id': self.host_id,
+            'min_players': self.min_players, 'phase': self.phase, 'round': self.round, 'deadline': self.deadline,
+            'players': [p.to_list() for p in self.players.values()],
+            'actions': [[k, v] for k, v in self.actions.items()],
+            'votes': [[k, v] for k, v in self.votes.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        game = cls(data['guild_id'], data['channel_id'], data['host_id'], data['min_players'])
+        game.phase = data['phase']
+        game.round = data['round']
+        game.deadline = data['deadline']
+        game.players = {row[0]: Player(*row) for row in data['players']}
+        game.actions = {k: v for k, v in data['actions']}
+        game.votes = {k: v for k, v in data['votes']}
+        return game
+
+
+# -------------------------------------------------------------------------
+# العناصر الديناميكية (تُسجل مرة واحدة بـ bot.add_dynamic_items)
+# -------------------------------------------------------------------------
+
+def _target_options(game, exclude=None):
+    return [
+        discord.SelectOption(label=p.name[:100], value=str(p.user_id))
+        for p in game.alive() if p.user_id != exclude
+    ][:25]
+
+
+class MafiaJoinButton(discord.ui.DynamicItem[discord.ui.Button], template=r'mafia_join_(?P<guild>\d+)'):
+    # يُضبط من MafiaEngine عند إنشائه
+    engine = None
+
+    def __init__(self, guild_id):
+        super().__init__(discord.ui.Button(label="انضم", style=discord.ButtonStyle.green, custom_id=f"mafia_join_{guild_id}"))
+        self.guild_id = guild_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match, /):
+        return cls(int(match['guild']))
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.engine.join(interaction, self.guild_id)
+
+
+class MafiaNightSelect(discord.ui.DynamicItem[discord.ui.Select], template=r'mafia_night_(?P<guild>\d+)_(?P<round>\d+)'):
+    def __init__(self, guild_id, round_, options=None, placeholder=None):
+        super().__init__(discord.ui.Select(
+            custom_id=f"mafia_night_{guild_id}_{round_}",
+            options=options or [discord.SelectOption(label='-', value='0')],
+            placeholder=placeholder
+        ))
+        self.guild_id = guild_id
+        self.round = round_
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match, /):
+        return cls(int(match['guild']), int(match['round']))
+
+    async def callback(self, interaction: discord.Interaction):
+        values = interaction.data.get('values') or ['0']
+        await MafiaJoinButton.engine.night_action(interaction, self.guild_id, self.round, int(values[0]))
+
+
+class MafiaVoteSelect(discord.ui.DynamicItem[discord.ui.Select], template=r'mafia_vote_(?P<guild>\d+)_(?P<round>\d+)'):
+    def __init__(self, guild_id, round_, options=None):
+        super().__init__(discord.ui.Select(
+            custom_id=f"mafia_vote_{guild_id}_{round_}",
+            options=options or [discord.SelectOption(label='-', value='0')],
+            placeholder="🗳️ صوّت على من تشك فيه"
+        ))
+        self.guild_id = guild_id
+        self.round = round_
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match, /):
+        return cls(int(match['guild']), int(match['round']))
+
+    async def callback(self, interaction: discord.Interaction):
+        values = interaction.data.get('values') or ['0']
+        await MafiaJoinButton.engine.vote(interaction, self.guild_id, self.round, int(values[0]))
+
+
+# -------------------------------------------------------------------------
+# المحرك
+# -------------------------------------------------------------------------
+
+class MafiaEngine:
+    def __init__(self, bot, outbound, path='mafia_games.json', dm_concurrency=8, dm_timeout=15.0):
+        self.bot = bot
+        self.outbound = outbound
+        self.path = path
+        self.dm_timeout = dm_timeout
+        self.games = {}
+        self._tasks = {}
+        self._wake = {}
+        self._dm_limit = asyncio.Semaphore(dm_concurrency)
+        self._finish_listeners = []
+        self._dirty = False
+        self._saving = None
+        self._pending_tasks = set()
+        MafiaJoinButton.engine = self
+
+    def add_finish_listener(self, callback):
+        """callback(game) يُستدعى عند انتهاء لعبة بفائز (لتوزيع النقاط مثلاً)"""
+        self._finish_listeners.append(callback)
+
+    def active(self, guild_id):
+        game = self.games.get(guild_id)
+        return game is not None and game.phase != 'finished'
+
+    # ------------------------------------------------------------------
+    # البدء والانضمام
+    # ------------------------------------------------------------------
+
+    def lobby_embed(self, game):
+        embed = discord.Embed(
+            title="🎩 لعبة المافيا المطورة (الإصدار الإضافي) 🐺",
+            description=f"المضيف: <@{game.host_id}>\nالحد الأدنى للبدء: **{game.min_players} لاعبين**\n\n"
+                        f"اضغط على الزر **'انضم'** للمشاركة! اللعبة تبدأ بعد {LOBBY_SECONDS} ثانية أو عند اكتمال العدد.",
+            color=0x4B0082 # بنفسجي داكن
+        )
+        embed.add_field(name="اللاعبون الحاليون:", value=f"**{len(game.players)}** / {game.min_players}", inline=False)
+        return embed
+
+    async def start(self, interaction, min_players):
+        """إنشاء لعبة جديدة في السيرفر، ويرجع False إذا توجد لعبة نشطة"""
+        if self.active(interaction.guild_id):
+            return False
+
+        game = MafiaGame(interaction.guild_id, interaction.channel_id, interaction.user.id, min_players)
+        game.players[interaction.user.id] = Player(interaction.user.id, interaction.user.display_name)
+        game.deadline = time.time() + LOBBY_SECONDS
+        # الحجز قبل الإرسال (لمنع لعبتين معاً)، والحفظ بعد نجاحه فقط
+        self.games[game.guild_id] = game
+
+        view = discord.ui.View(timeout=None)
+        view.add_item(MafiaJoinButton(game.guild_id))
+        try:
+            await interaction.response.send_message(embed=self.lobby_embed(game), view=view)
+        except BaseException:
+            # فشل الرد => لا تبقى ردهة وهمية تحجز السيرفر
+            if self.games.get(game.guild_id) is game:
+                del self.games[game.guild_id]
+            raise
+        self._checkpoint()
+        self._spawn(game)
+        return True
+
+    async def join(self, interaction, guild_id):
+        game = self.games.get(guild_id)
+        if game is None or game.phase != 'lobby':
+            await interaction.response.send_message("❌ انتهى وقت الانضمام أو اللعبة بدأت.", ephemeral=True)
+            return
+        if interaction.user.id in game.players:
+            await interaction.response.send_message("❌ أنت منضم بالفعل.", ephemeral=True)
+            return
+
+        game.players[interaction.user.id] = Player(interaction.user.id, interaction.user.display_name)
+        self._checkpoint()
+        await interaction.response.edit_message(embed=self.lobby_embed(game))
+        await self.outbound.followup_send(interaction, content=f"✅ انضممت إلى اللعبة! عدد اللاعبين الحالي: **{len(game.players)}**", ephemeral=True)
+        if len(game.players) >= game.min_players:
+            self._wake_up(game)
+
+    # ------------------------------------------------------------------
+    # أفعال اللاعبين
+    # ------------------------------------------------------------------
+
+    async def night_action(self, interaction, guild_id, round_, target_id):
+        game = self.games.get(guild_id)
+        player = game.players.get(interaction.user.id) if game else None
+        if game is None or game.phase != 'night' or game.round != round_:
+            await interaction.response.send_message("❌ انتهت هذه الليلة.", ephemeral=True)
+            return
+        if player is None or not player.alive or player.role not in NIGHT_PROMPTS:
+            await interaction.response.send_message("❌ ليس لديك فعل في هذه الليلة.", ephemeral=True)
+            return
+        target = game.players.get(target_id)
+        if target is None or not target.alive:
+            await interaction.response.send_message("❌ هذا اللاعب غير متاح.", ephemeral=True)
+            return
+
+        game.actions[player.user_id] = target_id
+        self._checkpoint()
+
+        if player.role == ROLE_SHERIFF:
+            verdict = "**مافيا** 🔴" if target.role == ROLE_MAFIA else "**ليس مافيا** 🟢"
+            message = f"⭐ نتيجة التحقق: {target.name} {verdict}"
+        elif player.role == ROLE_DETECTIVE:
+            message = f"🔍 دور {target.name} هو: **{target.role}**"
+        else:
+            message = f"✅ تم اختيار: **{target.name}**"
+        await interaction.response.send_message(message)
+
+        # كل أصحاب الأدوار اختاروا => إنهاء الليل مبكراً
+        if all(p.user_id in game.actions for p in game.alive() if p.role in NIGHT_PROMPTS):
+            self._wake_up(game)
+
+    async def vote(self, interaction, guild_id, round_, target_id):
+        game = self.games.get(guild_id)
+        voter = game.players.get(interaction.user.id) if game else None
+        if game is None or game.phase != 'vote' or game.round != round_:
+            await interaction.response.send_message("❌ انتهى هذا التصويت.", ephemeral=True)
+            return
+        if voter is None or not voter.alive:
+            await interaction.response.send_message("❌ فقط اللاعبون الأحياء يمكنهم التصويت.", ephemeral=True)
+            return
+        target = game.players.get(target_id)
+        if target is None or not target.alive:
+            await interaction.response.send_message("❌ هذا اللاعب غير متاح.", ephemeral=True)
+            return
+
+        game.votes[voter.user_id] = target_id
+        self._checkpoint()
+        await interaction.response.send_message(f"🗳️ صوّتت ضد **{target.name}**.", ephemeral=True)
+        if len(game.votes) >= len(game.alive()):
+            self._wake_up(game)
+
+    # ------------------------------------------------------------------
+    # دورة اللعبة
+    # ------------------------------------------------------------------
+
+    def _spawn(self, game):
+        self._wake[game.guild_id] = asyncio.Event()
+        task = asyncio.create_task(self._run(game))
+        self._tasks[game.guild_id] = task
+        task.add_done_callback(lambda t, guild_id=game.guild_id: self._tasks.pop(guild_id, None))
+
+    def _wake_up(self, game):
+        event = self._wake.get(game.guild_id)
+        if event is not None:
+            event.set()
+
+    async def _wait_phase(self, game):
+        event = self._wake[game.guild_id]
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max(0.0, game.deadline - time.time()))
+        except asyncio.TimeoutError:
+            pass
+
+    def _enter(self, game, phase, seconds):
+        game.phase = phase
+        game.deadline = time.time() + seconds
+        game.actions.clear()
+        game.votes.clear()
+        self._wake[game.guild_id].clear()
+        self._checkpoint()
+
+    async def _run(self, game):
+        await self.bot.wait_until_ready()
+        try:
+            while game.phase != 'finished':
+                await self._wait_phase(game)
+                if game.phase == 'lobby':
+                    await self._resolve_lobby(game)
+                elif game.phase == 'night':
+                    await self._resolve_night(game)
+                elif game.phase == 'day':
+                    await self._enter_vote(game)
+                elif game.phase == 'vote':
+                    await self._resolve_vote(game)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ خطأ في لعبة المافيا ({game.guild_id}): {e}")
+            await self._finish(game, None)
+
+    async def _resolve_lobby(self, game):
+        if len(game.players) < game.min_players:
+            await self._say(game, content=f"❌ لم يكتمل العدد الكافي. تم إلغاء لعبة المافيا. (مطلوب {game.min_players}، الحاضرون {len(game.players)})")
+            await self._finish(game, None)
+            return
+
+        await self._say(game, content="⏳ تم الوصول للحد الأدنى! بدء توزيع الأدوار...")
+        for user_id, role in assign_roles(list(game.players)).items():
+            game.players[user_id].role = role
+        self._checkpoint()
+
+        # كل الأدوار تُرسل بالتوازي، واللاعب البطيء لا يؤخر البقية
+        players = list(game.players.values())
+        sent = await self._fan_out([
+            self._dm(game, p.user_id, content=f"🎭 **دورك في لعبة المافيا:** أنت هو **{p.role}**!\n\n{ROLE_RULES}")
+            for p in players
+        ])
+        failed = [p for p, ok in zip(players, sent) if ok is not True]
+        if failed:
+            mentions = "، ".join(f"<@{p.user_id}>" for p in failed)
+            await self._say(game, content=f"❌ لم أستطع إرسال الدور إلى {mentions}. يرجى التأكد من تفعيل الرسائل الخاصة.")
+
+        await self._say(game, embed=discord.Embed(
+            title="⚔️ اللعبة بدأت! ⚔️",
+            description=f"تم توزيع الأدوار على **{len(players)} لاعبين** في الرسائل الخاصة.\n\n"
+                        f"**المرحلة الحالية: الليل.** أصحاب الأدوار سيختارون أهدافهم خلال {NIGHT_SECONDS} ثانية.",
+            color=0x1E90FF
+        ))
+        await self._enter_night(game)
+
+    async def _enter_night(self, game):
+        game.round += 1
+        self._enter(game, 'night', NIGHT_SECONDS)
+        acting = [p for p in game.alive() if p.role in NIGHT_PROMPTS]
+        # الطلبات تُرسل في الخلفية بينما مؤقت الليل يعمل
+        jobs = []
+        for p in acting:
+            view = discord.ui.View(timeout=None)
+            exclude = None if p.role == ROLE_DOCTOR else p.user_id
+            view.add_item(MafiaNightSelect(game.guild_id, game.round, _target_options(game, exclude), NIGHT_PROMPTS[p.role]))
+            jobs.append(self._dm(game, p.user_id, content=f"🌙 **الليلة {game.round}** — {NIGHT_PROMPTS[p.role]}", view=view))
+        self._background(self._fan_out(jobs))
+
+    async def _resolve_night(self, game):
+        mafia_targets = Counter(
+            target for user_id, target in game.actions.items()
+            if game.players[user_id].role == ROLE_MAFIA and game.players[user_id].alive
+        )
+        protected = {target for user_id, target in game.actions.items() if game.players[user_id].role == ROLE_DOCTOR}
+
+        victim = None
+        if mafia_targets:
+            top = max(mafia_targets.values())
+            victim_id = random.choice([target for target, count in mafia_targets.items() if count == top])
+            if victim_id not in protected:
+                victim = game.players[victim_id]
+                victim.alive = False
+
+        if victim is not None:
+            await self._say(game, content=f"☀️ طلع الصباح... وُجد **{victim.name}** مقتولاً! كان دوره: **{victim.role}**.")
+        elif mafia_targets:
+            await self._say(game, content="☀️ طلع الصباح... حاولت المافيا القتل لكن الطبيب أنقذ الضحية! 💉")
+        else:
+            await self._say(game, content="☀️ طلع الصباح... مرت الليلة بهدوء.")
+
+        if not await self._check_end(game):
+            self._enter(game, 'day', DAY_SECONDS)
+            alive = "، ".join(p.name for p in game.alive())
+            await self._say(game, content=f"🗣️ **النهار {game.round}:** لديكم {DAY_SECONDS} ثانية للنقاش.\nالأحياء: {alive}")
+
+    async def _enter_vote(self, game):
+        self._enter(game, 'vote', VOTE_SECONDS)
+        view = discord.ui.View(timeout=None)
+        view.add_item(MafiaVoteSelect(game.guild_id, game.round, _target_options(game)))
+        await self._say(game, content=f"🗳️ **وقت التصويت!** لديكم {VOTE_SECONDS} ثانية لاختيار من تشكون فيه.", view=view)
+
+    async def _resolve_vote(self, game):
+        ranked = Counter(game.votes.values()).most_common(2)
+        if not ranked or (len(ranked) > 1 and ranked[0][1] == ranked[1][1]):
+            await self._say(game, content="⚖️ لم يتفق اللاعبون (تعادل أو لا أصوات). لم يُعدم أحد اليوم.")
+        else:
+            target_id, top = ranked[0]
+            target = game.players[target_id]
+            target.alive = False
+            await self._say(game, content=f"⚰️ تم إعدام **{target.name}** بـ **{top}** صوت. كان دوره: **{target.role}**.")
+
+        if not await self._check_end(game):
+            await self._say(game, content="🌙 حلّ الليل... أصحاب الأدوار، تفقدوا رسائلكم الخاصة.")
+            await self._enter_night(game)
+
+    async def _check_end(self, game):
+        winner = game.check_winner()
+        if winner is None:
+            return False
+        await self._finish(game, winner)
+        return True
+
+    async def _finish(self, game, winner):
+        game.phase = 'finished'
+        game.winner = winner
+        self.games.pop(game.guild_id, None)
+        self._wake.pop(game.guild_id, None)
+        self._checkpoint()
+
+        if winner is None:
+            return
+        title = "🐺 فازت المافيا!" if winner == 'mafia' else "🏆 فاز المواطنون!"
+        roles = "\n".join(f"{'💀' if not p.alive else '✅'} {p.name}: **{p.role}**" for p in game.players.values())
+        await self._say(game, embed=discord.Embed(title=title, description=roles, color=0x4B0082))
+        for callback in self._finish_listeners:
+            try:
+                callback(game)
+            except Exception as e:
+                print(f"❌ خطأ في مستمع نهاية المافيا: {e}")
+
+    # ------------------------------------------------------------------
+    # الإرسال
+    # ------------------------------------------------------------------
+
+    async def _say(self, game, **kwargs):
+        channel = self.bot.get_channel(game.channel_id)
+        if channel is None:
+            return None
+        try:
+            return await self.outbound.channel_send(channel, **kwargs)
+        except discord.HTTPException as e:
+            print(f"❌ تعذر الإرسال في قناة المافيا: {e}")
+
+    async def _dm(self, game, user_id, **kwargs):
+        """رسالة خاصة بمهلة، ويرجع True عند النجاح"""
+        guild = self.bot.get_guild(game.guild_id)
+        if guild is None:
+            return False
+        try:
+            member = await resolve_member(guild, user_id)
+            if member is None:
+                return False
+            await asyncio.wait_for(self.outbound.dm_send(member, **kwargs), timeout=self.dm_timeout)
+            return True
+        except (discord.HTTPException, asyncio.TimeoutError):
+            return False
+
+    async def _fan_out(self, jobs):
+        """تنفيذ الرسائل بالتوازي بحد أقصى مشترك بين كل الألعاب"""
+        async def limited(job):
+            async with self._dm_limit:
+                return await job
+        return await asyncio.gather(*(limited(job) for job in jobs), return_exceptions=True)
+
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    # ------------------------------------------------------------------
+    # الحفظ والاستعادة
+    # ------------------------------------------------------------------
+
+    def _checkpoint(self):
+        """حفظ كل الألعاب في الخلفية (التغييرات المتتالية تُدمج في كتابة واحدة)"""
+        self._dirty = True
+        if self._saving is None or self._saving.done():
+            self._saving = asyncio.create_task(self._save_loop())
+
+    async def _save_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            snapshot = {str(guild_id): game.to_dict() for guild_id, game in self.games.items()}
+            try:
+                await loop.run_in_executor(None, self._write, snapshot)
+            except OSError as e:
+                print(f"❌ فشل حفظ ألعاب المافيا: {e}")
+
+    def _write(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def save_sync(self):
+        """حفظ متزامن (بعد توقف حلقة الأحداث)"""
+        self._write({str(guild_id): game.to_dict() for guild_id, game in self.games.items()})
+
+    def restore(self):
+        """استعادة الألعاب المحفوظة واستكمال مؤقتاتها، ويرجع عددها"""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ تعذر قراءة {self.path}: {e}")
+            return 0
+
+        restored = 0
+        for data in saved.values():
+            game = MafiaGame.from_dict(data)
+            if game.phase == 'finished' or game.guild_id in self.games:
+                continue
+            # سيرفر على جزء تديره عملية أخرى
+            owns_guild = getattr(self.bot, 'owns_guild', None)
+            if owns_guild is not None and not owns_guild(game.guild_id):
+                continue
+            self.games[game.guild_id] = game
+            self._spawn(game)
+            restored += 1
+        return restored
@@ -1,94 +1,171 @@
 import discord
-from discord.ext import commands
 from discord import app_commands # مكتبة الأوامر المائلة (Slash Commands)
 import os
-from keep_alive import keep_alive 
+from keep_alive import KeepAliveServer, keep_alive, backend as keep_alive_backend
 import asyncio
 import json
-import yt_dlp
 import random
+from settings_store import SettingsStore
+from keyword_matcher import KeywordMatcher
+from cooldowns import CooldownTracker, DEFAULT_COOLDOWNS
+from outbound import OutboundScheduler, PRIORITY_AUTO
+from welcome import WelcomePipeline
+from azkar import AzkarButton, AzkarPageButton, AzkarRegistry, VALID_STYLES, make_entry
+from music_extractor import ExtractionPool
+from music_cache import ExtractionCache
+from music_queue import MusicQueues, QueueEntry, LOOP_MODES
+from voice_manager import VoiceSessionManager, VoiceCapacityError
+from gateway_profile import gateway_options
+from shards import ShardedBot, sharding_options, instance_path
+from command_sync import CommandSyncManager
+from mafia import MafiaEngine, MafiaJoinButton, MafiaNightSelect, MafiaVoteSelect, ROLE_MAFIA
+from math_quiz import AnswerRouter, MathQuizzes, DIFFICULTIES
+from points_ledger import PointsLedger
+from purge import PurgeEngine, PurgeCancelButton, build_filter, MAX_PURGE
+from mass_moderation import MassModerator, ConfirmView, build_selector, select_members, preview_embed, ACTIONS
+from metrics import BotMetrics
 
 # -------------------------------------------------------------------------
-# الدوال المساعدة لإدارة ملف settings.json
+# مخزن الإعدادات لكل سيرفر (settings.db)
 # -------------------------------------------------------------------------
 
-SETTINGS_FILE = 'settings.json'
+SETTINGS_FILE = 'settings.json' # الملف القديم، يُستورد مرة واحدة فقط
+SETTINGS_DB = 'settings.db'
 
-def load_settings():
-    """تحميل الإعدادات من ملف JSON"""
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+# القراءات من الذاكرة لكل سيرفر، والحفظ صفاً بصف بشكل مؤجل ومجمّع
+settings_store = SettingsStore(SETTINGS_DB)
+settings_store.migrate_json(SETTINGS_FILE)
+settings_store.preload()
 
-def save_settings(settings):
-    """حفظ الإعدادات إلى ملف JSON"""
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4, ensure_ascii=False)
+# -------------------------------------------------------------------------
+# المطابق المُجمّع للردود التلقائية (يُعاد بناؤه فقط عند تعديل الجدول)
+# -------------------------------------------------------------------------
+
+_auto_responders = {}
+
+def get_auto_responder(guild_id):
+    """إرجاع مطابق السيرفر الحالي وبناؤه عند الحاجة"""
+    matcher = _auto_responders.get(guild_id)
+    if matcher is None:
+        settings = settings_store.get(guild_id)
+        mode = settings.get('auto_responses_mode', {})
+        matcher = KeywordMatcher(
+            settings.get('auto_responses', {}),
+            whole_word=mode.get('whole_word', False),
+            normalize=mode.get('normalize', False)
+        )
+        _auto_responders[guild_id] = matcher
+    return matcher
+
+def on_settings_changed(guild_id, section):
+    """إبطال الذاكرات المشتقة من الإعدادات عند تعديلها"""
+    if section in ('auto_responses', 'auto_responses_mode'):
+        _auto_responders.pop(guild_id, None)
+
+settings_store.add_listener(on_settings_changed)
+
+# -------------------------------------------------------------------------
+# فترات التهدئة للردود التلقائية (cooldowns.py)
+# -------------------------------------------------------------------------
+
+# نفس الكلمة في نفس القناة، أي رد في نفس القناة، وأي رد لنفس العضو
+auto_response_cooldowns = CooldownTracker(max_entries=100_000)
+
+def auto_response_allowed(message, keyword):
+    """True إذا لم تكن الكلمة أو القناة أو العضو في فترة تهدئة (ويبدأ تهدئة جديدة)"""
+    guild_id = message.guild.id if message.guild else None
+    windows = {**DEFAULT_COOLDOWNS, **settings_store.section(guild_id, 'auto_responses_cooldown')}
+    return auto_response_cooldowns.try_acquire([
+        (('keyword', message.channel.id, keyword), windows['keyword']),
+        (('channel', message.channel.id), windows['channel']),
+        (('user', guild_id, message.author.id), windows['user'])
+    ])
+
+# -------------------------------------------------------------------------
+# مجدول الرسائل الصادرة (outbound.py)
+# -------------------------------------------------------------------------
+
+# 5 رسائل كل 5 ثوانٍ لكل قناة، و45 طلباً في الثانية للبوت كله
+outbound = OutboundScheduler(rate=5, per=5.0, global_rate=45, global_per=1.0)
 
 # -------------------------------------------------------------------------
-# كلاس الأزرار التفاعلية (AzkarView)
+# خط الترحيب لكل سيرفر (welcome.py)
 # -------------------------------------------------------------------------
 
-class AzkarView(discord.ui.View):
-    def __init__(self, bot):
-        super().__init__(timeout=None)
-        self.bot = bot
-        self.update_buttons_from_settings()
-
-    def update_buttons_from_settings(self):
-        self.clear_items() 
-        settings = load_settings()
-        azkar_data = settings.get('azkar_buttons', {})
-
-        for key, data in azkar_data.items():
-            style_map = {'blue': discord.ButtonStyle.blurple, 'red': discord.ButtonStyle.red, 'green': discord.ButtonStyle.green, 'grey': discord.ButtonStyle.secondary}
-
-            button = discord.ui.Button(
-                label=data['label'],
-                style=style_map.get(data['style'], discord.ButtonStyle.secondary),
-                custom_id=f"azkar_{key}"
-            )
-            button.callback = self.create_button_callback(data['content'])
-            self.add_item(button)
-
-    def create_button_callback(self, content):
-        async def callback(interaction: discord.Interaction):
-            await interaction.response.send_message(
-                f"**📋 الأذكار المطلوبة:**\n\n{content}",
-                ephemeral=True
-            )
-        return callback
+# أكثر من 10 انضمامات في الدقيقة => رسالة ترحيب واحدة مجمعة كل 5 ثوانٍ
+welcome_pipeline = WelcomePipeline(settings_store, outbound, burst_threshold=10, rate_window=60, burst_window=5, burst_mentions=20)
+
+# -------------------------------------------------------------------------
+# سجل أزرار الأذكار (azkar.py)
+# -------------------------------------------------------------------------
+
+azkar_registry = AzkarRegistry(settings_store)
+
+# المفتاح جزء من custom_id للأزرار (حد ديسكورد 100 حرف)
+AZKAR_KEY_MAX = 80
 
 # -------------------------------------------------------------------------
 # إعدادات البوت (Intents)
 # -------------------------------------------------------------------------
 
-# تفعيل النوايا الضرورية
-intents = discord.Intents.default()
-intents.message_content = True 
-intents.members = True 
-intents.guilds = True       
-intents.moderation = True   
-intents.presences = True    
+# النوايا وتخزين الأعضاء حسب BOT_GATEWAY_PROFILE (gateway_profile.py)
+# الافتراضي lean: بدون presences، وبدون تحميل كل الأعضاء عند الإقلاع
+gateway = gateway_options()
 
 # إزالة البادئة التقليدية لإجبار استخدام /slash commands
-bot = commands.Bot(command_prefix='_', intents=intents)
-tree = app_commands.CommandTree(bot)
+# البوت مقسّم تلقائياً، أو حسب SHARD_COUNT / SHARD_IDS (shards.py)
+bot = ShardedBot(command_prefix='_', **gateway, **sharding_options())
+tree = bot.tree # البوت يملك شجرة أوامر جاهزة، ولا يمكن إنشاء شجرة ثانية له
+
+# زمن الأوامر وعدد الأحداث وتأخر الحلقة بخطافات عامة (metrics.py)، تُعرض على /metrics
+bot_metrics = BotMetrics(bot, lag_threshold=2.0)
+
+# خادم HTTP داخل حلقة البوت: / و /shards و /metrics و /health (keep_alive.py)
+web_server = KeepAliveServer(bot.shard_monitor, bot_metrics)
+bot.add_close_hook(web_server.stop)
+
+# المزامنة فقط عند تغير بصمة الأوامر (command_sync.py)
+COMMAND_SYNC_FILE = 'command_sync.json'
+command_sync = CommandSyncManager(tree, COMMAND_SYNC_FILE)
 
 # -------------------------------------------------------------------------
 # الأحداث (Events)
 # -------------------------------------------------------------------------
 
 @bot.event
-async def on_ready():
-    settings = load_settings()
-    if settings.get('azkar_buttons'):
-        bot.add_view(AzkarView(bot))
+async def setup_hook():
+    # يعمل مرة واحدة لكل عملية (وليس عند كل إعادة اتصال مثل on_ready)
+
+    if keep_alive_backend() != 'flask':
+        try:
+            await web_server.start()
+        except OSError as e:
+            # المنفذ مستخدم (عملية أجزاء أخرى مثلاً): البوت يعمل بدون خادم HTTP
+            print(f"❌ تعذر تشغيل خادم keep_alive على المنفذ {web_server.port}: {e} (اضبط KEEP_ALIVE_PORT)")
+
+    # معالج واحد لكل أزرار azkar_* في كل السيرفرات (يعمل أيضاً للأزرار المضافة لاحقاً)
+    bot.add_dynamic_items(AzkarButton, AzkarPageButton)
 
-    # تسجيل أوامر الـ Slash Commands
-    await tree.sync() 
+    # أزرار وقوائم المافيا (mafia_*) واستكمال الألعاب المحفوظة قبل إعادة التشغيل
+    bot.add_dynamic_items(MafiaJoinButton, MafiaNightSelect, MafiaVoteSelect)
+    restored = mafia_engine.restore()
+    if restored:
+        print(f"🎩 تمت استعادة {restored} لعبة مافيا.")
 
+    # زر إيقاف /مسح (purge_cancel_*)
+    bot.add_dynamic_items(PurgeCancelButton)
+
+    # تسجيل أوامر الـ Slash Commands (فقط إذا تغيرت)
+    await command_sync.sync()
+
+    # فحص دوري للجلسات الصوتية الخاملة
+    voice_manager.start()
+
+    # قياس تأخر حلقة الأحداث
+    bot_metrics.start()
+
+@bot.event
+async def on_ready():
     print('----------------------------------')
     print(f'✅ البوت جاهز! تم تسجيل الدخول باسم: {bot.user}')
     await bot.change_presence(activity=discord.Game(name="استخدم /مساعدة"))
@@ -96,48 +173,64 @@ async def on_ready():
 
 @bot.event
 async def on_member_join(member):
-    settings = load_settings()
-    embed_data = settings.get('welcome_embed', {})
+    # القناة تُحدد بـ /قناة_الترحيب، والـ Embed جاهز مسبقاً (welcome.py)
+    await welcome_pipeline.welcome(member)
 
-    # //////////////////// تذكر تعديل اسم القناة هنا //////////////////////
-    channel = discord.utils.get(member.guild.channels, name='اسم-القناة-الترحيب') 
+@bot.event
+async def on_guild_channel_delete(channel):
+    welcome_pipeline.on_channel_delete(channel)
 
-    # رسالة الترحيب
-    if channel and embed_data:
-        embed = discord.Embed(
-            title=embed_data.get('title', 'مرحباً!'),
-            description=f"أهلاً بك يا {member.mention}! {embed_data.get('description', '')}",
-            color=embed_data.get('color', discord.Color.blue())
-        )
-        image_url = embed_data.get('image_url')
-        if image_url and image_url != 'https://example.com/default_welcome_image.png':
-            embed.set_image(url=image_url)
+@bot.event
+async def on_guild_channel_create(channel):
+    welcome_pipeline.on_channel_create(channel)
 
-        await channel.send(embed=embed)
+@bot.event
+async def on_guild_channel_update(before, after):
+    welcome_pipeline.on_channel_update(before, after)
 
 @bot.event
 async def on_message(message):
     if message.author.bot:
         return
 
-    # نظام الردود التلقائية
-    settings = load_settings()
-    responses = settings.get('auto_responses', {})
-
-    content_lower = message.content.lower()
+    # إجابات الألعاب النشطة في القناة (بحث واحد في قاموس بآيدي القناة)
+    if answer_router.dispatch(message):
+        return
 
-    for keyword, response in responses.items():
-        if keyword.lower() in content_lower:
-            await message.channel.send(response)
-            return # يرسل رداً واحداً ثم يتوقف
+    # نظام الردود التلقائية (مرور واحد على الرسالة، أول كلمة مضافة تفوز)
+    found = get_auto_responder(message.guild.id if message.guild else None).match_keyword(message.content)
+    if found is not None:
+        keyword, response = found
+        # الكلمة أو القناة أو العضو في فترة تهدئة => تجاهل بصمت
+        if not auto_response_allowed(message, keyword):
+            bot_metrics.auto_responses.inc('cooldown')
+            return
+        bot_metrics.auto_responses.inc('sent')
+        # أقل أولوية: تُحذف إذا تأخرت كثيراً أو تكررت في قناة مُغرقة
+        await outbound.channel_send(message.channel, content=response, priority=PRIORITY_AUTO, merge_key=response)
+        return # يرسل رداً واحداً ثم يتوقف
 
     # معالجة الأوامر التقليدية إذا كنت قد أبقيت أي بادئة
     await bot.process_commands(message)
 
+@bot.event
+async def on_voice_state_update(member, before, after):
+    # البوت نفسه فُصل من القناة (طرد أو انقطاع) => تنظيف الجلسة وقائمة التشغيل
+    if member.id == bot.user.id:
+        if before.channel and after.channel is None:
+            voice_manager.forget(member.guild.id)
+        return
+
+    # إلغاء عمليات البحث المعلّقة للعضو إذا غادر القناة الصوتية
+    if before.channel and before.channel != after.channel:
+        extraction_pool.cancel_user(member.guild.id, member.id)
+
 # -------------------------------------------------------------------------
 # أوامر الإدارة (Admin Slash Commands)
 # -------------------------------------------------------------------------
 
+# العضو في /بان و /كيك يصل جاهزاً ضمن بيانات الأمر (resolved)، فلا يحتاج ذاكرة الأعضاء
+
 @tree.command(name='بان', description='حظر عضو من السيرفر.')
 @app_commands.describe(member='العضو المراد حظره', reason='سبب الحظر')
 @app_commands.checks.has_permissions(ban_members=True)
@@ -158,6 +251,86 @@ async def kick_slash(interaction: discord.Interaction, member: discord.Member, r
     await member.kick(reason=reason)
     await interaction.response.send_message(f'👋 تم طرد {member.mention} بنجاح. السبب: {reason}')
 
+# الإجراءات الجماعية (mass_moderation.py): معاينة ثم تأكيد ثم تنفيذ متوازٍ محدود المعدل
+mass_moderator = MassModerator(concurrency=4, rate=5, per=1.0, progress_every=2.0)
+
+async def run_mass_action(interaction, action, joined_within, account_age, name_pattern, reason):
+    if not (joined_within or account_age or name_pattern):
+        await interaction.response.send_message("❌ اختر معياراً واحداً على الأقل (الانضمام، عمر الحساب، أو نص في الاسم).", ephemeral=True)
+        return
+    selector = build_selector(joined_within, account_age, name_pattern)
+
+    job = mass_moderator.reserve(interaction.guild_id, action)
+    if job is None:
+        await interaction.response.send_message("❌ يوجد إجراء جماعي جارٍ في هذا السيرفر.", ephemeral=True)
+        return
+
+    try:
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            selection = await select_members(interaction.guild, interaction.user, selector, account_age)
+        except discord.HTTPException as e:
+            await interaction.edit_original_response(content=f"❌ تعذر جلب قائمة الأعضاء من ديسكورد: {e}")
+            return
+        if not selection.targets:
+            await interaction.edit_original_response(embed=preview_embed(action, selection))
+            return
+
+        # المعاينة: لا يُنفذ شيء قبل الضغط على "تنفيذ"
+        view = ConfirmView(interaction.user.id)
+        await interaction.edit_original_response(embed=preview_embed(action, selection), view=view)
+        if await view.wait() or not view.confirmed:
+            await interaction.edit_original_response(content="❎ تم الإلغاء، لم يُنفذ أي إجراء.", embed=None, view=None)
+            return
+
+        await interaction.edit_original_response(content=job.describe(), embed=None, view=None)
+
+        async def report(job):
+            await interaction.edit_original_response(content=job.describe())
+
+        await mass_moderator.run(job, interaction.guild, selection.targets, reason=reason, on_progress=report)
+    finally:
+        mass_moderator.release(job)
+
+    try:
+        await interaction.edit_original_response(content=job.describe(), embed=job.summary_embed())
+    except discord.HTTPException:
+        pass # انتهت صلاحية الرد (15 دقيقة)
+    if not job.done:
+        return
+    info = ACTIONS[action]
+    # عبر القناة وليس followup: ألف إجراء محدود المعدل قد يتجاوز صلاحية رمز الأمر (15 دقيقة)
+    try:
+        await outbound.channel_send(interaction.channel, content=f"{info['emoji']} تم {info['label']} {job.done} عضواً. السبب: {reason}")
+    except discord.HTTPException as e:
+        print(f"❌ تعذر إرسال نتيجة الإجراء الجماعي: {e}")
+
+@tree.command(name='بان_جماعي', description='حظر كل الأعضاء المطابقين لمعايير (لتنظيف الغارات).')
+@app_commands.guild_only()
+@app_commands.describe(
+    joined_within='من انضم خلال آخر كم دقيقة',
+    account_age='من عمر حسابه أقل من كم يوم',
+    name_pattern='من يحتوي اسمه هذا النص',
+    reason='سبب الحظر'
+)
+@app_commands.checks.has_permissions(ban_members=True)
+async def mass_ban_slash(interaction: discord.Interaction, joined_within: app_commands.Range[int, 1, 10080] = None,
+                         account_age: app_commands.Range[int, 1, 3650] = None, name_pattern: str = None, reason: str = "لم يحدد"):
+    await run_mass_action(interaction, 'ban', joined_within, account_age, name_pattern, reason)
+
+@tree.command(name='كيك_جماعي', description='طرد كل الأعضاء المطابقين لمعايير (لتنظيف الغارات).')
+@app_commands.guild_only()
+@app_commands.describe(
+    joined_within='من انضم خلال آخر كم دقيقة',
+    account_age='من عمر حسابه أقل من كم يوم',
+    name_pattern='من يحتوي اسمه هذا النص',
+    reason='سبب الطرد'
+)
+@app_commands.checks.has_permissions(kick_members=True)
+async def mass_kick_slash(interaction: discord.Interaction, joined_within: app_commands.Range[int, 1, 10080] = None,
+                          account_age: app_commands.Range[int, 1, 3650] = None, name_pattern: str = None, reason: str = "لم يحدد"):
+    await run_mass_action(interaction, 'kick', joined_within, account_age, name_pattern, reason)
+
 
 @tree.command(name='ارسال_embed', description='يرسل رسالة Embed مخصصة لأي قناة.')
 @app_commands.describe(
@@ -187,7 +360,7 @@ async def send_custom_embed_slash(interaction: discord.Interaction, channel_id:
         )
         embed.set_footer(text=f"تم الإرسال بواسطة: {interaction.user.display_name}")
 
-        await channel.send(embed=embed)
+        await outbound.channel_send(channel, embed=embed)
         await interaction.response.send_message(f"✅ تم إرسال رسالة Embed بنجاح إلى قناة: **#{channel.name}**.", ephemeral=True)
 
     except ValueError:
@@ -196,13 +369,62 @@ async def send_custom_embed_slash(interaction: discord.Interaction, channel_id:
         await interaction.response.send_message(f"❌ حدث خطأ أثناء الإرسال: {e}", ephemeral=True)
 
 
-@tree.command(name='مسح', description='يمسح عدداً محدداً من الرسائل.')
-@app_commands.describe(amount='عدد الرسائل المراد مسحها')
+# المسح الجماعي: قراءة السجل صفحة صفحة، حذف جماعي لما هو أحدث من 14 يوماً
+# وحذف فردي محدود المعدل للأقدم (purge.py)
+purge_engine = PurgeEngine(single_rate=5, single_per=5.0, progress_every=2.0)
+
+@tree.command(name='مسح', description='يمسح عدداً من الرسائل مع فلاتر اختيارية.')
+@app_commands.describe(
+    amount=f'عدد الرسائل المطابقة المراد مسحها (حتى {MAX_PURGE})',
+    member='مسح رسائل هذا العضو فقط',
+    contains='مسح الرسائل التي تحتوي هذا النص فقط',
+    attachments='مسح الرسائل التي تحتوي مرفقات فقط',
+    bots='مسح رسائل البوتات فقط'
+)
+@app_commands.checks.has_permissions(manage_messages=True)
+async def clear_slash(interaction: discord.Interaction, amount: app_commands.Range[int, 1, MAX_PURGE],
+                      member: discord.User = None, contains: str = None, attachments: bool = False, bots: bool = False):
+    predicate = build_filter(member, contains, attachments, bots)
+
+    job = purge_engine.reserve(interaction.channel_id, interaction.user.id, amount)
+    if job is None:
+        await interaction.response.send_message("❌ يوجد مسح نشط في هذه القناة. استخدم /إيقاف_المسح لإيقافه.", ephemeral=True)
+        return
+
+    try:
+        view = purge_engine.cancel_view(interaction.channel_id)
+        await interaction.response.send_message(job.describe(), view=view, ephemeral=True)
+
+        async def report(job):
+            try:
+                await interaction.edit_original_response(content=job.describe())
+            except discord.HTTPException:
+                pass # انتهت صلاحية الرد (15 دقيقة) — المسح يستمر
+
+        # الرسائل الأحدث من الأمر لا تُمس
+        await purge_engine.run(job, interaction.channel, predicate, before=interaction.created_at, on_progress=report)
+    finally:
+        # القناة لا تبقى محجوزة إذا فشل الرد الأول
+        purge_engine.release(job)
+
+    try:
+        await interaction.edit_original_response(content=job.describe(), view=None)
+    except discord.HTTPException:
+        pass
+    if job.deleted:
+        # عبر القناة وليس followup: المسح الطويل قد يتجاوز صلاحية رمز الأمر (15 دقيقة)
+        try:
+            await outbound.channel_send(interaction.channel, content=f"✅ تم مسح {job.deleted} رسالة بنجاح.")
+        except discord.HTTPException as e:
+            print(f"❌ تعذر إرسال نتيجة المسح: {e}")
+
+@tree.command(name='إيقاف_المسح', description='يوقف عملية المسح الجارية في هذه القناة.')
 @app_commands.checks.has_permissions(manage_messages=True)
-async def clear_slash(interaction: discord.Interaction, amount: app_commands.Range[int, 1, 100]):
-    await interaction.response.defer(ephemeral=True) 
-    await interaction.channel.purge(limit=amount)
-    await interaction.followup.send(f"✅ تم مسح {amount} رسالة بنجاح.", ephemeral=False)
+async def stop_clear_slash(interaction: discord.Interaction):
+    if purge_engine.cancel(interaction.channel_id):
+        await interaction.response.send_message("🛑 سيتوقف المسح بعد الدفعة الحالية.", ephemeral=True)
+    else:
+        await interaction.response.send_message("❌ لا يوجد مسح نشط في هذه القناة.", ephemeral=True)
 
 @tree.command(name='تعديل_الترحيب', description='يعدل رسالة الترحيب.')
 @app_commands.describe(
@@ -214,24 +436,28 @@ async def clear_slash(interaction: discord.Interaction, amount: app_commands.Ran
 @app_commands.checks.has_permissions(administrator=True)
 async def modify_welcome_slash(interaction: discord.Interaction, title: str, color_hex: str, image_url: str, description: str):
 
-    settings = load_settings()
-
     try:
         color_int = int(color_hex.lstrip('#'), 16)
     except ValueError:
         await interaction.response.send_message("❌ كود اللون غير صالح. استخدم كود Hex بدون # (مثل FF00FF).", ephemeral=True)
         return
 
-    settings['welcome_embed'] = {
+    settings_store.replace_section(interaction.guild_id, 'welcome_embed', {
         'title': title.replace('_', ' '),
         'description': description.replace('_', ' '),
         'color': color_int,
         'image_url': image_url if image_url.lower() != 'none' else None
-    }
-    save_settings(settings)
+    })
 
     await interaction.response.send_message("✅ تم تحديث رسالة الترحيب بنجاح. سيتم تطبيق الإعدادات الجديدة عند انضمام عضو جديد.", ephemeral=True)
 
+@tree.command(name='قناة_الترحيب', description='يحدد القناة التي تُرسل فيها رسالة الترحيب.')
+@app_commands.describe(channel='قناة الترحيب')
+@app_commands.checks.has_permissions(administrator=True)
+async def welcome_channel_slash(interaction: discord.Interaction, channel: discord.TextChannel):
+    welcome_pipeline.set_channel(interaction.guild_id, channel.id)
+    await interaction.response.send_message(f"✅ سيتم إرسال رسائل الترحيب في {channel.mention}.", ephemeral=True)
+
 # -------------------------------------------------------------------------
 # أوامر إدارة الأذكار (Azkar Commands)
 # -------------------------------------------------------------------------
@@ -247,26 +473,27 @@ async def modify_welcome_slash(interaction: discord.Interaction, title: str, col
 @app_commands.checks.has_permissions(administrator=True)
 async def manage_azkar_buttons_slash(interaction: discord.Interaction, action: str, key: str = None, label: str = None, style: str = None, content: str = None):
 
-    settings = load_settings()
-    azkar_data = settings.get('azkar_buttons', {})
+    azkar_data = settings_store.section(interaction.guild_id, 'azkar_buttons')
 
     if action.lower() == 'add':
         if not all([key, label, style, content]):
             await interaction.response.send_message("❌ الرجاء تقديم المفتاح والتسمية والستايل والمحتوى للإضافة.", ephemeral=True)
             return
 
-        valid_styles = ['blue', 'red', 'green', 'grey']
-        if style.lower() not in valid_styles:
-            await interaction.response.send_message(f"❌ ستايل غير صالح. المتاح: {', '.join(valid_styles)}", ephemeral=True)
+        if style.lower() not in VALID_STYLES:
+            await interaction.response.send_message(f"❌ ستايل غير صالح. المتاح: {', '.join(VALID_STYLES)}", ephemeral=True)
             return
 
-        azkar_data[key] = {
-            'label': label.replace('_', ' '),
-            'style': style.lower(),
-            'content': content.replace('_', ' ')
-        }
-        settings['azkar_buttons'] = azkar_data
-        save_settings(settings)
+        if len(key) > AZKAR_KEY_MAX:
+            await interaction.response.send_message(f"❌ المفتاح طويل جداً (الحد الأقصى {AZKAR_KEY_MAX} حرفاً).", ephemeral=True)
+            return
+
+        # المحتوى يُقسم إلى صفحات هنا مرة واحدة، وليس عند كل ضغطة
+        settings_store.set(interaction.guild_id, 'azkar_buttons', key, make_entry(
+            label.replace('_', ' '),
+            style.lower(),
+            content.replace('_', ' ')
+        ))
         await interaction.response.send_message(f"✅ تم إضافة زر الأذكار `{label.replace('_', ' ')}` بنجاح.", ephemeral=True)
 
     elif action.lower() == 'remove':
@@ -274,10 +501,7 @@ async def manage_azkar_buttons_slash(interaction: discord.Interaction, action: s
             await interaction.response.send_message("❌ الرجاء تقديم مفتاح الزر للحذف.", ephemeral=True)
             return
 
-        if key in azkar_data:
-            del azkar_data[key]
-            settings['azkar_buttons'] = azkar_data
-            save_settings(settings)
+        if settings_store.delete(interaction.guild_id, 'azkar_buttons', key):
             await interaction.response.send_message(f"✅ تم حذف زر الأذكار ذو المفتاح `{key}` بنجاح.", ephemeral=True)
         else:
             await interaction.response.send_message(f"❌ المفتاح `{key}` غير موجود.", ephemeral=True)
@@ -287,8 +511,8 @@ async def manage_azkar_buttons_slash(interaction: discord.Interaction, action: s
             await interaction.response.send_message("❌ لا توجد أزرار أذكار مضافة حالياً لنشرها.", ephemeral=True)
             return
 
-        view = AzkarView(bot)
-        view.update_buttons_from_settings()
+        # نفس الـ View تُعاد في كل نشر حتى تتغير أزرار السيرفر
+        view = azkar_registry.view(interaction.guild_id)
 
         embed = discord.Embed(
             title="✨ مكتبة الأذكار والأدعية ✨",
@@ -301,20 +525,61 @@ async def manage_azkar_buttons_slash(interaction: discord.Interaction, action: s
         await interaction.response.send_message("❌ أمر إدارة غير صالح. استخدم: `add`, `remove`, أو `publish`.", ephemeral=True)
 
 
+@tree.command(name='استيراد_اذكار', description='استيراد مجموعة أذكار كاملة من ملف JSON.')
+@app_commands.describe(file='ملف JSON بالشكل: {"المفتاح": {"label": ..., "style": ..., "content": ...}}')
+@app_commands.checks.has_permissions(administrator=True)
+async def import_azkar_slash(interaction: discord.Interaction, file: discord.Attachment):
+    await interaction.response.defer(ephemeral=True)
+
+    if file.size > 2 * 1024 * 1024:
+        await outbound.followup_send(interaction, content="❌ حجم الملف كبير جداً (الحد الأقصى 2MB).", ephemeral=True)
+        return
+
+    try:
+        collection = json.loads(await file.read())
+        if not isinstance(collection, dict):
+            raise ValueError("يجب أن يكون الملف كائن JSON (قاموس) من المفاتيح إلى الأزرار.")
+
+        entries = {}
+        for key, data in collection.items():
+            style = str(data.get('style', 'grey')).lower()
+            if len(str(key)) > AZKAR_KEY_MAX or not data.get('content') or style not in VALID_STYLES:
+                raise ValueError(f"بيانات الزر `{key}` غير صالحة (المحتوى مطلوب والستايل من: {', '.join(VALID_STYLES)}).")
+            entries[str(key)] = make_entry(str(data.get('label') or key), style, str(data['content']))
+    except (ValueError, AttributeError, UnicodeDecodeError) as e:
+        await outbound.followup_send(interaction, content=f"❌ تعذر قراءة الملف: {e}", ephemeral=True)
+        return
+
+    # عملية واحدة: كل الأزرار تُحفظ في نفس الدفعة
+    settings_store.set_many(interaction.guild_id, 'azkar_buttons', entries)
+    pages = sum(len(entry['pages']) for entry in entries.values())
+    await outbound.followup_send(interaction, content=f"✅ تم استيراد **{len(entries)}** زر أذكار (**{pages}** صفحة).", ephemeral=True)
+
+
 # -------------------------------------------------------------------------
 # أوامر إدارة الردود التلقائية (Auto-Responder Commands)
 # -------------------------------------------------------------------------
 
 @tree.command(name='إدارة_ردود', description='إضافة/حذف ردود تلقائية.')
 @app_commands.describe(
-    action='(add/remove/list)',
+    action='(add/remove/list/mode/cooldown)',
     keyword='الكلمة المفتاحية (لا مسافات)',
-    response='الرد الذي سيرسله البوت'
+    response='الرد الذي سيرسله البوت',
+    whole_word='(mode) مطابقة الكلمة كاملة فقط',
+    normalize='(mode) تجاهل التشكيل وتوحيد الألف والياء',
+    keyword_cooldown='(cooldown) ثواني التهدئة لنفس الكلمة في نفس القناة (0 للتعطيل)',
+    channel_cooldown='(cooldown) ثواني التهدئة بين أي ردين في نفس القناة (0 للتعطيل)',
+    user_cooldown='(cooldown) ثواني التهدئة لنفس العضو (0 للتعطيل)'
 )
 @app_commands.checks.has_permissions(administrator=True)
-async def manage_auto_responses_slash(interaction: discord.Interaction, action: str, keyword: str = None, response: str = None):
-    settings = load_settings()
-    responses_data = settings.get('auto_responses', {})
+async def manage_auto_responses_slash(
+    interaction: discord.Interaction, action: str, keyword: str = None, response: str = None,
+    whole_word: bool = None, normalize: bool = None,
+    keyword_cooldown: app_commands.Range[int, 0, 3600] = None,
+    channel_cooldown: app_commands.Range[int, 0, 3600] = None,
+    user_cooldown: app_commands.Range[int, 0, 3600] = None
+):
+    responses_data = settings_store.section(interaction.guild_id, 'auto_responses')
     action = action.lower()
 
     if action == 'add':
@@ -322,9 +587,7 @@ async def manage_auto_responses_slash(interaction: discord.Interaction, action:
             await interaction.response.send_message("❌ لاستخدام `add`: يجب تحديد كلمة مفتاحية ورد.", ephemeral=True)
             return
 
-        responses_data[keyword] = response
-        settings['auto_responses'] = responses_data
-        save_settings(settings)
+        settings_store.set(interaction.guild_id, 'auto_responses', keyword, response)
         await interaction.response.send_message(f"✅ تم إضافة رد تلقائي: **{keyword}** -> **{response}**", ephemeral=True)
 
     elif action == 'remove':
@@ -332,10 +595,7 @@ async def manage_auto_responses_slash(interaction: discord.Interaction, action:
             await interaction.response.send_message("❌ لاستخدام `remove`: يجب تحديد الكلمة المفتاحية للحذف.", ephemeral=True)
             return
 
-        if keyword in responses_data:
-            del responses_data[keyword]
-            settings['auto_responses'] = responses_data
-            save_settings(settings)
+        if settings_store.delete(interaction.guild_id, 'auto_responses', keyword):
             await interaction.response.send_message(f"✅ تم حذف الرد التلقائي للمفتاح: **{keyword}**", ephemeral=True)
         else:
             await interaction.response.send_message(f"❌ الكلمة المفتاحية **{keyword}** غير موجودة.", ephemeral=True)
@@ -348,72 +608,215 @@ async def manage_auto_responses_slash(interaction: discord.Interaction, action:
 
         await interaction.response.send_message(list_msg, ephemeral=True)
 
+    elif action == 'mode':
+        if whole_word is not None:
+            settings_store.set(interaction.guild_id, 'auto_responses_mode', 'whole_word', whole_word)
+        if normalize is not None:
+            settings_store.set(interaction.guild_id, 'auto_responses_mode', 'normalize', normalize)
+        mode = settings_store.section(interaction.guild_id, 'auto_responses_mode')
+
+        await interaction.response.send_message(
+            f"✅ وضع المطابقة: الكلمة كاملة **{'مفعّل' if mode.get('whole_word') else 'معطّل'}**، "
+            f"توحيد الحروف العربية **{'مفعّل' if mode.get('normalize') else 'معطّل'}**.",
+            ephemeral=True
+        )
+
+    elif action == 'cooldown':
+        changes = {
+            scope: seconds for scope, seconds in
+            (('keyword', keyword_cooldown), ('channel', channel_cooldown), ('user', user_cooldown))
+            if seconds is not None
+        }
+        if changes:
+            settings_store.set_many(interaction.guild_id, 'auto_responses_cooldown', changes)
+        windows = {**DEFAULT_COOLDOWNS, **settings_store.section(interaction.guild_id, 'auto_responses_cooldown')}
+
+        await interaction.response.send_message(
+            f"⏱️ فترات التهدئة: نفس الكلمة **{windows['keyword']}** ث، "
+            f"القناة **{windows['channel']}** ث، العضو **{windows['user']}** ث.",
+            ephemeral=True
+        )
+
     else:
-        await interaction.response.send_message("❌ أمر إدارة غير صالح. استخدم: `add`, `remove`, أو `list`.", ephemeral=True)
+        await interaction.response.send_message("❌ أمر إدارة غير صالح. استخدم: `add`, `remove`, `list`, `mode`, أو `cooldown`.", ephemeral=True)
 
 
 # -------------------------------------------------------------------------
 # أوامر الموسيقى (Music Slash Commands)
 # -------------------------------------------------------------------------
 
-# نفس خيارات YDL_OPTIONS
-YDL_OPTIONS = {
-    'format': 'bestaudio/best',
-    'noplaylist': True,
-    'default_search': 'auto'
-}
+# الاستخراج يتم في مجموعة خيوط محدودة (خيارات YDL_OPTIONS في music_extractor.py)
+# والنتائج تُحفظ مؤقتاً ليتجاوز تكرار نفس الأغنية عملية الاستخراج كلياً
+MUSIC_CACHE_FILE = 'music_cache.json'
+extraction_cache = ExtractionCache(max_entries=512, max_bytes=4 * 1024 * 1024, path=MUSIC_CACHE_FILE)
+extraction_pool = ExtractionPool(max_workers=4, per_guild=2, timeout=30.0, cache=extraction_cache)
+
+# قائمة تشغيل لكل سيرفر
+music_queues = MusicQueues(extraction_pool, outbound)
+
+# جلسة صوتية واحدة لكل سيرفر تُنقل بين القنوات، وتُفصل تلقائياً عند الخمول
+voice_manager = VoiceSessionManager(bot, idle_timeout=300, max_sessions=50)
+voice_manager.add_disconnect_listener(music_queues.drop)
+voice_manager.add_disconnect_listener(extraction_pool.cancel_guild)
+
+# قوائم التشغيل تُقرأ على صفحات، ولا يُحتفظ إلا بعدد محدود من المقاطع المنتظرة
+PLAYLIST_PAGE_SIZE = 50
+PLAYLIST_MAX_ENTRIES = 1000
+
+# مرجع لمهام الخلفية حتى لا يحذفها جامع القمامة قبل انتهائها
+_background_tasks = set()
 
 @tree.command(name='انضمام', description='يدخل البوت إلى القناة الصوتية.')
 async def join_slash(interaction: discord.Interaction):
     if interaction.user.voice:
         channel = interaction.user.voice.channel
-        await channel.connect()
+        # لا نسحب البوت من قناة يشغل فيها الآن
+        current = voice_manager.busy_elsewhere(interaction.guild, channel)
+        if current is not None:
+            await interaction.response.send_message(f"❌ البوت يشغل الآن في **{current.name}**. انضم إليها أو انتظر حتى ينتهي.", ephemeral=True)
+            return
+        try:
+            await voice_manager.ensure(channel)
+        except VoiceCapacityError:
+            await interaction.response.send_message("❌ البوت مشغول في عدد كبير من القنوات الصوتية حالياً. حاول لاحقاً.", ephemeral=True)
+            return
         await interaction.response.send_message(f"✅ انضممت إلى القناة الصوتية: **{channel.name}**")
     else:
         await interaction.response.send_message("❌ يجب أن تكون في قناة صوتية أولاً لتتمكن من تشغيلي.", ephemeral=True)
 
 @tree.command(name='شغل', description='يبحث ويشغل أغنية من يوتيوب.')
-@app_commands.describe(query='اسم أو رابط الأغنية')
-async def play_slash(interaction: discord.Interaction, query: str):
+@app_commands.describe(query='اسم أو رابط الأغنية', playlist='تشغيل رابط قائمة تشغيل كاملة')
+async def play_slash(interaction: discord.Interaction, query: str, playlist: bool = False):
     await interaction.response.defer() # تأخير الرد لأن العملية تستغرق وقتاً
 
-    if not interaction.guild.voice_client:
-        if interaction.user.voice:
-            await interaction.user.voice.channel.connect()
-        else:
-            await interaction.followup.send("❌ يجب أن تكون في قناة صوتية أولاً.", ephemeral=True)
+    # أثناء التشغيل: الطلب يُضاف للقائمة فقط، ولصاحبه في نفس قناة البوت فقط
+    user_channel = interaction.user.voice.channel if interaction.user.voice else None
+    current = voice_manager.busy_elsewhere(interaction.guild, user_channel)
+    if current is not None:
+        await outbound.followup_send(interaction, content=f"❌ البوت يشغل الآن في **{current.name}**. انضم إليها لإضافة طلبك للقائمة.", ephemeral=True)
+        return
+
+    if user_channel:
+        try:
+            await voice_manager.ensure(user_channel)
+        except VoiceCapacityError:
+            await outbound.followup_send(interaction, content="❌ البوت مشغول في عدد كبير من القنوات الصوتية حالياً. حاول لاحقاً.", ephemeral=True)
             return
+    elif not interaction.guild.voice_client:
+        await outbound.followup_send(interaction, content="❌ يجب أن تكون في قناة صوتية أولاً.", ephemeral=True)
+        return
 
-    try:
-        with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
-            info = ydl.extract_info(query, download=False)
-            if 'entries' in info:
-                info = info['entries'][0]
+    player = music_queues.get(interaction.guild, interaction.channel)
+
+    # قائمة تشغيل: المقاطع تُضاف صفحة صفحة، وأول مقطع يبدأ فور تجهيزه
+    if playlist:
+        if player.is_feeding():
+            await outbound.followup_send(interaction, content="⏳ ما زالت قائمة تشغيل سابقة قيد الإضافة. انتظر حتى تكتمل أو استخدم /خروج لإيقافها.", ephemeral=True)
+            return
+        pages = extraction_pool.playlist_pages(interaction.guild_id, query, page_size=PLAYLIST_PAGE_SIZE, max_entries=PLAYLIST_MAX_ENTRIES)
+        player.feed_playlist(pages, interaction.user.id, max_pending=PLAYLIST_PAGE_SIZE)
+        await outbound.followup_send(interaction, content=f"📃 تتم إضافة مقاطع قائمة التشغيل تدريجياً (حتى **{PLAYLIST_MAX_ENTRIES}** مقطع).")
+        return
+
+    # يوجد تشغيل حالي => نضيف الطلب للقائمة، والاستخراج يتم مسبقاً قبل دوره
+    if player.is_active():
+        position = player.enqueue(QueueEntry(query, interaction.user.id))
+        await outbound.followup_send(interaction, content=f"➕ تمت إضافة **{query}** إلى القائمة في المركز **{position}**.")
+        return
 
-            audio_url = next(f['url'] for f in info['formats'] if f.get('ext') == 'm4a' or f.get('ext') == 'webm' and f.get('acodec') != 'none')
+    # رسالة تقدم تُعدّل لاحقاً، والاستخراج يكمل في الخلفية دون تجميد البوت
+    progress = await outbound.followup_send(interaction, content=f"🔎 جاري البحث عن: **{query}**...", wait=True)
+    task = extraction_pool.submit(interaction.guild_id, interaction.user.id, query)
+    background = asyncio.create_task(finish_play(interaction, progress, task))
+    _background_tasks.add(background)
+    background.add_done_callback(_background_tasks.discard)
 
-            source = discord.FFmpegPCMAudio(audio_url)
+async def finish_play(interaction: discord.Interaction, progress: discord.WebhookMessage, task: asyncio.Task):
+    """انتظار نتيجة الاستخراج ثم إضافة المقطع للقائمة وتحديث رسالة التقدم"""
+    try:
+        track = await task
 
-            if interaction.guild.voice_client.is_playing():
-                interaction.guild.voice_client.stop()
+        if not interaction.guild.voice_client:
+            await progress.edit(content="❌ البوت لم يعد متصلاً بقناة صوتية.")
+            return
 
-            interaction.guild.voice_client.play(source, after=lambda e: print(f'خطأ في التشغيل: {e}') if e else None)
-            await interaction.followup.send(f"🎶 يتم تشغيل: **{info.get('title', 'عنوان غير معروف')}**")
+        player = music_queues.get(interaction.guild, interaction.channel)
+        position = player.enqueue(QueueEntry(track['webpage_url'] or track['title'], interaction.user.id, track))
+        if position == 0:
+            await progress.edit(content=f"🎶 يتم تشغيل: **{track['title']}**")
+        else:
+            await progress.edit(content=f"➕ تمت إضافة **{track['title']}** إلى القائمة في المركز **{position}**.")
 
+    except asyncio.CancelledError:
+        await progress.edit(content="⏹️ تم إلغاء البحث لأنك غادرت القناة الصوتية.")
+    except asyncio.TimeoutError:
+        await progress.edit(content="⏳ استغرق البحث وقتاً طويلاً. حاول مرة أخرى لاحقاً.")
     except Exception as e:
         print(f"حدث خطأ في التشغيل: {e}")
-        await interaction.followup.send("❌ حدث خطأ أثناء محاولة تشغيل الأغنية. تأكد من أن الرابط أو العنوان صالح.")
+        await progress.edit(content="❌ حدث خطأ أثناء محاولة تشغيل الأغنية. تأكد من أن الرابط أو العنوان صالح.")
 
 
 @tree.command(name='خروج', description='يوقف التشغيل ويغادر القناة الصوتية.')
 async def leave_slash(interaction: discord.Interaction):
-    if interaction.guild.voice_client:
-        await interaction.guild.voice_client.disconnect()
+    if await voice_manager.disconnect(interaction.guild):
         await interaction.response.send_message("👋 غادرت القناة الصوتية بنجاح.")
     else:
         await interaction.response.send_message("❌ أنا لست في قناة صوتية حالياً.", ephemeral=True)
 
 
+@tree.command(name='تخطي', description='يتخطى الأغنية الحالية إلى التالية في القائمة.')
+async def skip_slash(interaction: discord.Interaction):
+    player = music_queues.peek(interaction.guild_id)
+    if player and player.skip():
+        await interaction.response.send_message("⏭️ تم تخطي الأغنية الحالية.")
+    else:
+        await interaction.response.send_message("❌ لا يوجد شيء يعمل حالياً.", ephemeral=True)
+
+
+@tree.command(name='قائمة', description='يعرض قائمة التشغيل الحالية.')
+async def queue_list_slash(interaction: discord.Interaction):
+    player = music_queues.peek(interaction.guild_id)
+    if not player or (not player.current and not player.entries):
+        await interaction.response.send_message("📭 قائمة التشغيل فارغة.", ephemeral=True)
+        return
+
+    lines = []
+    if player.current:
+        lines.append(f"🎶 **الآن:** {player.current.title}")
+    for i, entry in enumerate(list(player.entries)[:15], start=1):
+        lines.append(f"`{i}.` {entry.title}")
+    if len(player.entries) > 15:
+        lines.append(f"... و **{len(player.entries) - 15}** أخرى")
+
+    embed = discord.Embed(title="📜 قائمة التشغيل", description="\n".join(lines), color=discord.Color.purple())
+    embed.set_footer(text=f"وضع التكرار: {player.loop_mode}")
+    await interaction.response.send_message(embed=embed)
+
+
+@tree.command(name='حذف_من_القائمة', description='يحذف أغنية من قائمة التشغيل حسب ترتيبها.')
+@app_commands.describe(position='ترتيب الأغنية في القائمة (يبدأ من 1)')
+async def queue_remove_slash(interaction: discord.Interaction, position: app_commands.Range[int, 1, None]):
+    player = music_queues.peek(interaction.guild_id)
+    entry = player.remove(position) if player else None
+    if entry:
+        await interaction.response.send_message(f"🗑️ تم حذف **{entry.title}** من القائمة.")
+    else:
+        await interaction.response.send_message("❌ لا توجد أغنية بهذا الترتيب.", ephemeral=True)
+
+
+@tree.command(name='تكرار', description='يضبط وضع التكرار (off/track/queue).')
+@app_commands.describe(mode='(off/track/queue)')
+async def loop_slash(interaction: discord.Interaction, mode: str):
+    mode = mode.lower()
+    if mode not in LOOP_MODES:
+        await interaction.response.send_message(f"❌ وضع غير صالح. المتاح: {', '.join(LOOP_MODES)}", ephemeral=True)
+        return
+
+    player = music_queues.get(interaction.guild, interaction.channel)
+    player.loop_mode = mode
+    await interaction.response.send_message(f"🔁 تم ضبط وضع التكرار على: **{mode}**")
+
+
 # -------------------------------------------------------------------------
 # أوامر الألعاب والتفاعل (Games & Interaction Slash Commands)
 # -------------------------------------------------------------------------
@@ -437,137 +840,99 @@ async def quotes_slash(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 
+# -------------------------------------------------------------------------
+# سجل النقاط (points_ledger.py): رصيد لكل عضو في كل سيرفر ولوحة متصدرين
+# -------------------------------------------------------------------------
+
+POINTS_DB = 'points.db'
+points_ledger = PointsLedger(POINTS_DB, starting_balance=100, delay=2.0)
+points_ledger.preload()
+
+# مكافآت الألعاب الأخرى بالنقاط
+MATH_REWARD = 10 # لكل نقطة في مسابقة الرياضيات
+MAFIA_REWARD = 50 # لكل لاعب في الفريق الفائز
+
+@tree.command(name='نقاط', description='يعرض رصيد نقاطك وترتيبك في السيرفر.')
+@app_commands.guild_only()
+@app_commands.describe(member='العضو (افتراضياً أنت)')
+async def points_slash(interaction: discord.Interaction, member: discord.Member = None):
+    member = member or interaction.user
+    balance = points_ledger.balance(interaction.guild_id, member.id)
+    rank = points_ledger.rank(interaction.guild_id, member.id)
+    rank_text = f" — الترتيب **#{rank}**" if rank else ""
+    await interaction.response.send_message(f"💰 رصيد {member.mention}: **{balance}** نقطة{rank_text}", ephemeral=True)
+
+@tree.command(name='المتصدرين', description='يعرض أعلى الأعضاء نقاطاً في السيرفر.')
+@app_commands.guild_only()
+async def leaderboard_slash(interaction: discord.Interaction):
+    top = points_ledger.top(interaction.guild_id, 10)
+    lines = [f"`{i}.` <@{user_id}> — **{balance}** نقطة" for i, (user_id, balance) in enumerate(top, start=1)]
+    embed = discord.Embed(title="🏆 المتصدرون", description="\n".join(lines) or "لا توجد نقاط بعد.", color=discord.Color.gold())
+    await interaction.response.send_message(embed=embed)
+
+
 @tree.command(name='روليت', description='يراهن على لون عشوائي في لعبة الروليت.')
-@app_commands.describe(bet='قيمة الرهان (رقم موجب)')
-async def roulette_slash(interaction: discord.Interaction, bet: app_commands.Range[int, 1, None]):
+@app_commands.guild_only()
+@app_commands.describe(bet='قيمة الرهان (رقم موجب)', color='اللون الذي تراهن عليه (أحمر/أسود/أخضر)')
+async def roulette_slash(interaction: discord.Interaction, bet: app_commands.Range[int, 1, None], color: str = 'أحمر'):
 
     outcomes = {'أحمر': 2, 'أسود': 2, 'أخضر': 35}
-    result = random.choices(list(outcomes.keys()), weights=[47.37, 47.37, 5.26], k=1)[0]
+    if color not in outcomes:
+        await interaction.response.send_message(f"❌ لون غير صالح. المتاح: {', '.join(outcomes)}", ephemeral=True)
+        return
+
+    balance = points_ledger.balance(interaction.guild_id, interaction.user.id)
+    if bet > balance:
+        await interaction.response.send_message(f"❌ رصيدك لا يكفي. رصيدك الحالي: **{balance}** نقطة.", ephemeral=True)
+        return
+
+    # عجلة أوروبية: 18 أحمر، 18 أسود، 1 أخضر => كل لون قيمته المتوقعة سالبة (2×18/37، 35×1/37)
+    result = random.choices(list(outcomes.keys()), weights=[18, 18, 1], k=1)[0]
+    win = bet * outcomes[result] if result == color else 0
+
+    # خصم الرهان وإضافة الربح في عملية واحدة
+    balance = points_ledger.credit(interaction.guild_id, interaction.user.id, win - bet)
 
     embed = discord.Embed(title="🎰 لعبة الروليت", color=0x000000 if result == 'أسود' else 0xFF0000 if result == 'أحمر' else 0x008000)
 
-    if result == 'أخضر':
-        win = bet * 35
+    if win and result == 'أخضر':
         embed.description = f"الكرة استقرت على **اللون الأخضر**! 🎉\nلقد فزت بمبلغ خيالي: **{win} نقطة!**"
-    elif result == 'أحمر' or result == 'أسود':
-        win = bet * 2
+    elif win:
         embed.description = f"الكرة استقرت على **{result}**! 🏆\nلقد فزت بـ **{win} نقطة!**"
     else:
-        win = 0
         embed.description = f"الكرة استقرت على **{result}**! 📉\nللأسف، خسرت **{bet} نقطة**."
+    embed.set_footer(text=f"رصيدك الآن: {balance} نقطة")
 
     await interaction.response.send_message(embed=embed)
 
-# متغير لتتبع الألعاب
-mafia_games = {} 
+# محرك المافيا: مراحل بمؤقتات، رسائل خاصة متوازية، وحفظ الحالة (mafia.py)
+MAFIA_GAMES_FILE = instance_path('mafia_games.json') # ملف لكل مجموعة أجزاء (SHARD_IDS)
+mafia_engine = MafiaEngine(bot, outbound, MAFIA_GAMES_FILE, dm_concurrency=8, dm_timeout=15.0)
+
+def reward_mafia_winners(game):
+    """كل لاعبي الفريق الفائز (أحياء أو أموات) يحصلون على MAFIA_REWARD في عملية واحدة"""
+    winners = [p.user_id for p in game.players.values() if (p.role == ROLE_MAFIA) == (game.winner == 'mafia')]
+    if winners:
+        points_ledger.apply(game.guild_id, {user_id: MAFIA_REWARD for user_id in winners})
+
+mafia_engine.add_finish_listener(reward_mafia_winners)
 
 @tree.command(name='مافيا', description='بدء لعبة المافيا المطورة (Mafia Extra).')
+@app_commands.guild_only()
 @app_commands.describe(min_players='الحد الأدنى للبدء (يوصى بـ 6)')
 async def mafia_slash(interaction: discord.Interaction, min_players: app_commands.Range[int, 4, 15]):
 
-    if interaction.guild_id in mafia_games and mafia_games[interaction.guild_id]['status'] != 'finished':
+    if not await mafia_engine.start(interaction, min_players):
         await interaction.response.send_message("❌ توجد لعبة مافيا نشطة بالفعل في هذا السيرفر.", ephemeral=True)
-        return
-
-    mafia_games[interaction.guild_id] = {
-        'host': interaction.user,
-        'min_players': min_players,
-        'players': {interaction.user.id: interaction.user},
-        'status': 'joining',
-        'channel': interaction.channel
-    }
-
-    embed = discord.Embed(
-        title="🎩 لعبة المافيا المطورة (الإصدار الإضافي) 🐺",
-        description=f"المضيف: {interaction.user.mention}\nالحد الأدنى للبدء: **{min_players} لاعبين**\n\nاضغط على الزر **'انضم'** للمشاركة! اللعبة تبدأ بعد 60 ثانية أو عند اكتمال العدد.",
-        color=0x4B0082 # بنفسجي داكن
-    )
-
-    view = discord.ui.View(timeout=60)
-
-    @discord.ui.button(label="انضم", style=discord.ButtonStyle.green, custom_id="mafia_join")
-    async def join_button_callback(button_interaction: discord.Interaction, button: discord.ui.Button):
-        game = mafia_games.get(interaction.guild_id)
-        if game and game['status'] == 'joining':
-            if button_interaction.user.id not in game['players']:
-                game['players'][button_interaction.user.id] = button_interaction.user
-                await button_interaction.response.send_message(f"✅ انضممت إلى اللعبة! عدد اللاعبين الحالي: **{len(game['players'])}**", ephemeral=True)
-
-                # تحديث الرسالة الأصلية بالعدد
-                updated_embed = embed.copy()
-                updated_embed.add_field(name="اللاعبون الحاليون:", value=f"**{len(game['players'])}** / {min_players}", inline=False)
-                await interaction.edit_original_response(embed=updated_embed, view=view)
-
-                if len(game['players']) >= min_players:
-                    view.stop() 
-                    await interaction.followup.send("⏳ تم الوصول للحد الأدنى! بدء توزيع الأدوار...")
-            else:
-                await button_interaction.response.send_message("❌ أنت منضم بالفعل.", ephemeral=True)
-        else:
-            await button_interaction.response.send_message("❌ انتهى وقت الانضمام أو اللعبة بدأت.", ephemeral=True)
-
-    view.add_item(join_button_callback)
-
-    await interaction.response.send_message(embed=embed, view=view)
-
-    await view.wait()
-
-    # بعد انتهاء الوقت أو اكتمال العدد
-    game = mafia_games.get(interaction.guild_id)
-    if game and game['status'] == 'joining':
-        players_count = len(game['players'])
-
-        if players_count < min_players:
-            del mafia_games[interaction.guild_id]
-            await interaction.followup.send(f"❌ لم يكتمل العدد الكافي. تم إلغاء لعبة المافيا. (مطلوب {min_players}، الحاضرون {players_count})")
-            return
-
-        # ----------------------------------------------------
-        # توزيع الأدوار
-        # ----------------------------------------------------
-
-        roles = []
-
-        # المافيا (القتل)
-        num_mafia = max(1, players_count // 4)
-        roles.extend(['مافيا'] * num_mafia)
-
-        # المدنيون (المواطن العادي)
-        num_villagers = players_count - num_mafia - 3 # خصم 3 شخصيات دعم
-
-        # شخصيات دعم أساسية (يجب أن يكون العدد كافياً لـ 4 على الأقل)
-        roles.append('طبيب') # يحمي شخصاً واحداً في الليل
-        roles.append('شريف') # يمكنه التحقيق في الهوية مرة واحدة في الليل
-        roles.append('محقق') # يمكنه كشف هوية شخص ما في الليل (محدود)
-
-        # إضافة مواطنين عاديين بعد ذلك
-        num_villagers = players_count - len(roles)
-        roles.extend(['مواطن'] * num_villagers)
-
-        random.shuffle(roles)
-
-        player_list = list(game['players'].values())
-        player_roles = dict(zip(player_list, roles))
-
-        # إرسال الأدوار رسالة خاصة
-        for player, role in player_roles.items():
-            try:
-                await player.send(f"🎭 **دورك في لعبة المافيا:** أنت هو **{role}**!\n\n**القوانين الأساسية:**\n- **المافيا:** مهمتهم القتل في الليل.\n- **الطبيب:** مهمته حماية شخص في الليل.\n- **الشريف:** يمكنه التحقق من هوية مشتبه به.\n- **المواطن:** مهمته كشف المافيا بالنقاش والتصويت في النهار.")
-            except discord.Forbidden:
-                await interaction.followup.send(f"❌ لم أستطع إرسال الدور إلى {player.mention}. يرجى التأكد من تفعيل الرسائل الخاصة.")
-
-        game['player_roles'] = player_roles
-        game['status'] = 'started'
-
-        start_embed = discord.Embed(
-            title="⚔️ اللعبة بدأت! ⚔️",
-            description=f"تم توزيع الأدوار على **{players_count} لاعبين** في الرسائل الخاصة.\n\n**المرحلة الحالية: النهار (النقاش والتصويت).**\nلديك 5 دقائق للبدء بالنقاش وتحديد من تشكون فيه.",
-            color=0x1E90FF
-        )
-        await interaction.followup.send(embed=start_embed)
 
 @tree.command(name='روليت_روسي', description='محاكاة للعبة الروليت الروسي (فرصة 1/6).')
-async def russian_roulette_slash(interaction: discord.Interaction):
+@app_commands.guild_only()
+@app_commands.describe(bet='رهان اختياري: تخسره كاملاً أو تربح خُمسه إذا نجوت')
+async def russian_roulette_slash(interaction: discord.Interaction, bet: app_commands.Range[int, 0, None] = 0):
+
+    if bet > points_ledger.balance(interaction.guild_id, interaction.user.id):
+        await interaction.response.send_message("❌ رصيدك لا يكفي لهذا الرهان.", ephemeral=True)
+        return
 
     chamber = [False] * 5 + [True]  
     random.shuffle(chamber)
@@ -583,66 +948,34 @@ async def russian_roulette_slash(interaction: discord.Interaction):
         embed.description = f"**{interaction.user.mention} سحب الزناد...** 💨\nالطلق كان فارغاً! لقد نجوت هذه المرة."
         embed.color = 0x00FF00
 
-    await interaction.response.send_message(embed=embed)
-
-# قائمة لتتبع الألعاب النشطة (لمنع التداخل)
-active_math_games = {} 
+    if bet:
+        # 5 من 6 للنجاة => ربح الخُمس يجعل الرهان عادلاً
+        balance = points_ledger.credit(interaction.guild_id, interaction.user.id, -bet if result else bet // 5)
+        embed.set_footer(text=f"رصيدك الآن: {balance} نقطة")
 
-@tree.command(name='رياضيات', description='يبدأ تحدي أسئلة حسابية عشوائية.')
-async def math_game_slash(interaction: discord.Interaction):
-
-    if interaction.channel_id in active_math_games:
-        await interaction.response.send_message("❌ توجد لعبة رياضيات نشطة بالفعل في هذه القناة.", ephemeral=True)
-        return
-
-    num1 = random.randint(10, 50)
-    num2 = random.randint(2, 20)
-
-    operations = {
-        '+': lambda a, b: a + b,
-        '-': lambda a, b: a - b,
-        '*': lambda a, b: a * b,
-        '/': lambda a, b: round(a / b) if a % b == 0 and b != 0 else None
-    }
-    op_symbol = random.choice(list(operations.keys()))
-
-    if op_symbol == '/':
-        if num1 % num2 != 0:
-            result = random.randint(2, 10)
-            num1 = num2 * result
-        correct_answer = num1 / num2
-    else:
-        correct_answer = operations[op_symbol](num1, num2)
-
-    active_math_games[interaction.channel_id] = correct_answer
-    problem_string = f"{num1} {op_symbol} {num2}"
-
-    embed = discord.Embed(
-        title="🧠 تحدي الرياضيات",
-        description=f"ما ناتج العملية الحسابية التالية؟\n\n## {problem_string} =\n\n**لديك 30 ثانية للإجابة!**",
-        color=discord.Color.orange()
-    )
-    embed.set_footer(text="للإجابة، اكتب الرقم فقط (مثال: 50)")
     await interaction.response.send_message(embed=embed)
 
-    def check(m):
-        return m.channel == interaction.channel and not m.content.startswith('/') and m.content.isdigit()
+# موجّه إجابات الألعاب: قاموس واحد بآيدي القناة يُفحص مرة واحدة في on_message (math_quiz.py)
+answer_router = AnswerRouter()
+math_quizzes = MathQuizzes(answer_router, outbound, answer_timeout=30.0)
+math_quizzes.add_win_listener(lambda guild_id, user_id, points: points_ledger.credit(guild_id, user_id, points * MATH_REWARD))
 
-    try:
-        guess_msg = await bot.wait_for('message', check=check, timeout=30.0)
-        user_guess = float(guess_msg.content)
+@tree.command(name='رياضيات', description='يبدأ مسابقة أسئلة حسابية عشوائية.')
+@app_commands.guild_only()
+@app_commands.describe(rounds='عدد الجولات', difficulty='(easy/medium/hard)')
+async def math_game_slash(interaction: discord.Interaction, rounds: app_commands.Range[int, 1, 20] = 1, difficulty: str = 'medium'):
 
-        if round(user_guess) == round(correct_answer):
-            await interaction.channel.send(f"🎉 **إجابة صحيحة يا {guess_msg.author.mention}!** الناتج هو: **{round(correct_answer)}**.")
-        else:
-            await interaction.channel.send(f"❌ إجابة خاطئة يا {guess_msg.author.mention}. الناتج الصحيح كان: **{round(correct_answer)}**.")
+    difficulty = difficulty.lower()
+    if difficulty not in DIFFICULTIES:
+        await interaction.response.send_message(f"❌ مستوى غير صالح. المتاح: {', '.join(DIFFICULTIES)}", ephemeral=True)
+        return
 
-    except asyncio.TimeoutError:
-        await interaction.channel.send(f"⏳ انتهى الوقت! لم يقم أحد بالإجابة. الناتج الصحيح هو: **{round(correct_answer)}**.")
+    if not await math_quizzes.run(interaction, rounds, difficulty):
+        await interaction.response.send_message("❌ توجد لعبة رياضيات نشطة بالفعل في هذه القناة.", ephemeral=True)
 
-    finally:
-        if interaction.channel_id in active_math_games:
-            del active_math_games[interaction.channel_id]
+@tree.command(name='نتائج_رياضيات', description='يعرض لوحة نتائج الرياضيات في هذه القناة.')
+async def math_scores_slash(interaction: discord.Interaction):
+    await interaction.response.send_message(embed=math_quizzes.scoreboard_embed(interaction.channel_id))
 
 @tree.command(name='لعبة', description='لعبة حجر ورقة مقص ضد البوت.')
 @app_commands.describe(choice='(حجر/ورقة/مقص)')
@@ -687,24 +1020,30 @@ async def help_command_slash(interaction: discord.Interaction):
     embed.add_field(name="/انضمام", value="يدخل البوت إلى القناة الصوتية.", inline=True)
     embed.add_field(name="/شغل", value="يبحث ويشغل أغنية من يوتيوب.", inline=True)
     embed.add_field(name="/خروج", value="يوقف التشغيل ويغادر القناة الصوتية.", inline=True)
+    embed.add_field(name="/تخطي / /قائمة", value="تخطي الأغنية الحالية أو عرض قائمة التشغيل.", inline=True)
+    embed.add_field(name="/حذف_من_القائمة / /تكرار", value="حذف أغنية من القائمة أو ضبط التكرار.", inline=True)
 
     # 2. أوامر التفاعل والألعاب
     embed.add_field(name="🕹️ التفاعل والألعاب", value="---", inline=False)
     embed.add_field(name="/كتات", value="يعرض اقتباساً عشوائياً وحكمة جميلة.", inline=True) 
-    embed.add_field(name="/روليت", value="لعبة روليت كلاسيكية.", inline=True)
+    embed.add_field(name="/روليت", value="لعبة روليت كلاسيكية بالنقاط.", inline=True)
+    embed.add_field(name="/نقاط / /المتصدرين", value="رصيد نقاطك ولوحة المتصدرين في السيرفر.", inline=True)
     embed.add_field(name="/روليت_روسي", value="محاكاة للعبة الروليت الروسي.", inline=True)
-    embed.add_field(name="/مافيا", value="بدء لعبة المافيا المطورة (بشخصيات إضافية).", inline=True)
-    embed.add_field(name="/رياضيات", value="يبدأ تحدي أسئلة حسابية عشوائية.", inline=True) 
+    embed.add_field(name="/مافيا", value="لعبة المافيا بمراحل الليل والنهار والتصويت.", inline=True)
+    embed.add_field(name="/رياضيات / /نتائج_رياضيات", value="مسابقة حسابية بجولات ومستويات، ولوحة نتائج القناة.", inline=True)
     embed.add_field(name="/لعبة", value="لعبة حجر ورقة مقص ضد البوت.", inline=True)
 
     # 3. أوامر الإدارة والترحيب
     embed.add_field(name="⚙️ الإدارة", value="---", inline=False)
     embed.add_field(name="/ارسال_embed", value="يرسل رسالة Embed مخصصة لأي قناة.", inline=True)
-    embed.add_field(name="/مسح", value="يمسح عدداً محدداً من الرسائل.", inline=True)
+    embed.add_field(name="/مسح / /إيقاف_المسح", value="يمسح حتى 10000 رسالة مع فلاتر (عضو، نص، مرفقات، بوتات)، أو يوقف المسح الجاري.", inline=True)
     embed.add_field(name="/بان / /كيك", value="لحظر أو طرد الأعضاء.", inline=True)
+    embed.add_field(name="/بان_جماعي / /كيك_جماعي", value="حظر أو طرد جماعي بمعاينة (المنضمون حديثاً، الحسابات الجديدة، أو نص في الاسم).", inline=True)
     embed.add_field(name="/تعديل_الترحيب", value="لتعديل رسالة/صورة الترحيب.", inline=True)
+    embed.add_field(name="/قناة_الترحيب", value="لتحديد قناة رسائل الترحيب.", inline=True)
     embed.add_field(name="/إدارة_اذكار", value="لإضافة/حذف/نشر أزرار الأذكار.", inline=True)
-    embed.add_field(name="/إدارة_ردود", value="لإضافة/حذف قائمة الردود التلقائية.", inline=True)
+    embed.add_field(name="/استيراد_اذكار", value="لاستيراد مجموعة أذكار كاملة من ملف.", inline=True)
+    embed.add_field(name="/إدارة_ردود", value="لإضافة/حذف قائمة الردود التلقائية وضبط فترات التهدئة.", inline=True)
 
     await interaction.response.send_message(embed=embed, ephemeral=True) # عرض المساعدة بشكل خاص
 
@@ -712,7 +1051,30 @@ async def help_command_slash(interaction: discord.Interaction):
 # 4. تشغيل البوت
 # ----------------------------------------------------
 
-keep_alive()
+# قيم الأنظمة الأخرى تُقرأ فقط عند طلب /metrics
+bot_metrics.add_collector(lambda: [
+    ('bot_settings_reads_total', 'counter', 'Settings store cache reads.', settings_store.reads),
+    ('bot_settings_writes_total', 'counter', 'Settings store batched write transactions.', settings_store.writes),
+    ('bot_points_writes_total', 'counter', 'Points ledger batched write transactions.', points_ledger.writes),
+    ('bot_purge_deleted_total', 'counter', 'Messages deleted by the purge command.', purge_engine.deleted),
+    ('bot_purge_active', 'gauge', 'Purge jobs currently running.', len(purge_engine.jobs)),
+    ('bot_mass_moderation_actions_total', 'counter', 'Members banned or kicked by bulk moderation commands.', mass_moderator.actions),
+    ('bot_voice_sessions', 'gauge', 'Connected voice sessions.', len(bot.voice_clients)),
+    ('bot_voice_ffmpeg_processes', 'gauge', 'Live FFmpeg processes attached to voice sessions.', voice_manager.ffmpeg_processes()),
+    ('bot_outbound_queue_depth', 'gauge', 'Messages waiting in the outbound scheduler.', outbound.queue_depth()),
+    ('bot_outbound_dropped_total', 'counter', 'Auto-responses dropped by the outbound scheduler.', outbound.dropped),
+    ('bot_outbound_merged_total', 'counter', 'Duplicate auto-responses merged into a pending one by the outbound scheduler.', outbound.merged),
+    ('bot_outbound_wait_seconds', 'gauge', 'Outbound queue wait percentiles over recent sends.',
+     {str(p / 100): wait for p, wait in outbound.wait_percentiles().items()}, 'quantile'),
+    ('bot_auto_responder_cooldown_keys', 'gauge', 'Active auto-responder cooldown keys.', len(auto_response_cooldowns)),
+    ('bot_auto_responder_cooldown_evictions_total', 'counter', 'Live cooldowns evicted to keep the tracker under its size cap.', auto_response_cooldowns.evicted),
+    ('bot_extraction_cache_hits_total', 'counter', 'Music extraction cache hits.', extraction_cache.hits),
+    ('bot_extraction_cache_misses_total', 'counter', 'Music extraction cache misses.', extraction_cache.misses)
+])
+
+# البديل الاختياري: خادم Flask في Thread (KEEP_ALIVE_BACKEND=flask)
+if keep_alive_backend() == 'flask':
+    keep_alive(bot.shard_monitor, bot_metrics)
 
 try:
     bot_token = os.environ.get('TOKEN')
@@ -722,3 +1084,9 @@ try:
         bot.run(bot_token)
 except Exception as e:
     print(f"❌ حدث خطأ أثناء تشغيل البوت: {e}")
+finally:
+    # حفظ أي تعديلات معلّقة قبل الإغلاق
+    settings_store.flush_sync()
+    points_ledger.flush_sync()
+    extraction_pool.shutdown()
+    mafia_engine.save_sync()
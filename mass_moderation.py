@@ -0,0 +1,279 @@
+import asyncio
+import datetime
+import time
+
+import discord
+
+from outbound import TokenBucket
+
+# -------------------------------------------------------------------------
+# الحظر والطرد الجماعي لتنظيف الغارات (/بان_جماعي، /كيك_جماعي)
+# -------------------------------------------------------------------------
+# - الاختيار: من انضم خلال آخر N دقيقة، أو حساب عمره أقل من X يوم، أو اسم
+#   يحتوي نصاً (كل المعايير المختارة يجب أن تتحقق).
+# - الأعضاء يُقرأون من الذاكرة إذا كان السيرفر محمّلاً (ملف full)، وإلا
+#   يُجلبون صفحة صفحة (1000 لكل طلب). مع معيار عمر الحساب يبدأ الجلب من
+#   آيدي تاريخ الحد، فالحسابات الأقدم لا تُجلب أصلاً (الآيدي يحمل تاريخ الإنشاء).
+# - قبل التنفيذ: معاينة بالعدد والمستبعدين ثم تأكيد.
+# - التنفيذ: الحظر بالحظر الجماعي (200 لكل طلب) إذا كان للبوت صلاحية إدارة
+#   السيرفر، وإلا (والطرد دائماً) بعمال متوازين بعدد محدود ودلو رموز مشترك.
+
+MAX_TARGETS = 1000
+BULK_BAN_SIZE = 200
+PREVIEW_LIMIT = 20
+
+ACTIONS = {
+    'ban': {'label': 'حظر', 'emoji': '🔨'},
+    'kick': {'label': 'طرد', 'emoji': '👋'}
+}
+
+
+def build_selector(joined_within=None, account_age=None, pattern=None, now=None):
+    """دالة member => bool للمعايير المختارة"""
+    now = now or discord.utils.utcnow()
+    joined_after = now - datetime.timedelta(minutes=joined_within) if joined_within else None
+    created_after = now - datetime.timedelta(days=account_age) if account_age else None
+    # نص حرفي وليس regex (كما في purge.build_filter): الفحص يعمل على حلقة الأحداث
+    # لكل عضو، ونمط بتراجع كارثي قد يجمّد البوت
+    needle = pattern.casefold() if pattern else None
+
+    def selector(member):
+        if joined_after is not None and (member.joined_at is None or member.joined_at < joined_after):
+            return False
+        if created_after is not None and member.created_at < created_after:
+            return False
+        if needle is not None and needle not in member.name.casefold() and needle not in member.display_name.casefold():
+            return False
+        return True
+
+    return selector
+
+
+def skip_reason(member, moderator, me):
+    """سبب استبعاد العضو من الإجراء، أو None"""
+    if member.id == moderator.id:
+        return "أنت"
+    if member.id == me.id:
+        return "البوت نفسه"
+    if member.id == member.guild.owner_id:
+        return "مالك السيرفر"
+    if moderator.id != member.guild.owner_id and member.top_role >= moderator.top_role:
+        return "رتبته أعلى من رتبتك أو تساويها"
+    if member.top_role >= me.top_role:
+        return "رتبته أعلى من رتبة البوت أو تساويها"
+    return None
+
+
+async def iter_members(guild, account_age=None):
+    """كل أعضاء السيرفر بدون تحميلهم في الذاكرة مرة واحدة"""
+    if guild.chunked:
+        for member in guild.members:
+            yield member
+        return
+    after = discord.utils.utcnow() - datetime.timedelta(days=account_age) if account_age else discord.utils.MISSING
+    async for member in guild.fetch_members(limit=None, after=after):
+        yield member
+
+
+class Selection:
+    __slots__ = ('targets', 'skipped', 'scanned', 'truncated')
+
+    def __init__(self):
+        self.targets = []
+        self.skipped = []
+        self.scanned = 0
+        self.truncated = False
+
+
+async def select_members(guild, moderator, selector, account_age=None, max_targets=MAX_TARGETS):
+    """الأعضاء المطابقون بعد استبعاد المحميين (حتى max_targets)"""
+    selection = Selection()
+    async for member in iter_members(guild, account_age):
+        selection.scanned += 1
+        if not selector(member):
+            continue
+        reason = skip_reason(member, moderator, guild.me)
+        if reason is not None:
+            selection.skipped.append((member, reason))
+        elif len(selection.targets) < max_targets:
+            selection.targets.append(member)
+        else:
+            selection.truncated = True
+            break
+    return selection
+
+
+def preview_embed(action, selection):
+    info = ACTIONS[action]
+    names = [f"{member.mention} (`{member}`)" for member in selection.targets[:PREVIEW_LIMIT]]
+    if len(selection.targets) > PREVIEW_LIMIT:
+        names.append(f"... و {len(selection.targets) - PREVIEW_LIMIT} آخرين")
+    embed = discord.Embed(
+        title=f"{info['emoji']} معاينة {info['label']} جماعي — {len(selection.targets)} عضو",
+        description="\n".join(names) or "لا يوجد أعضاء مطابقون.",
+        color=discord.Color.orange()
+    )
+    if selection.skipped:
+        skipped = [f"{member.mention} — {reason}" for member, reason in selection.skipped[:10]]
+        embed.add_field(name=f"مستبعدون ({len(selection.skipped)})", value="\n".join(skipped), inline=False)
+    if selection.truncated:
+        embed.add_field(name="⚠️ تنبيه", value=f"تم الاكتفاء بأول {MAX_TARGETS} عضو. أعد الأمر بعد التنفيذ للبقية.", inline=False)
+    embed.set_footer(text=f"فُحص {selection.scanned} عضو. لم يُنفذ أي إجراء بعد.")
+    return embed
+
+
+class ConfirmView(discord.ui.View):
+    """تأكيد أو إلغاء المعاينة (لصاحب الأمر فقط)"""
+
+    def __init__(self, owner_id, timeout=120):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.confirmed = False
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ هذا التأكيد لصاحب الأمر فقط.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="تنفيذ", style=discord.ButtonStyle.red)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = True
+        await interaction.response.defer()
+        self.stop()
+
+    @discord.ui.button(label="إلغاء", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        self.stop()
+
+
+class MassActionJob:
+    __slots__ = ('guild_id', 'action', 'total', 'done', 'failures', 'started', 'finished')
+
+    def __init__(self, guild_id, action):
+        self.guild_id = guild_id
+        self.action = action
+        self.total = 0
+        self.done = 0
+        # [(آيدي العضو، السبب)]
+        self.failures = []
+        self.started = time.monotonic()
+        self.finished = None
+
+    def describe(self):
+        info = ACTIONS[self.action]
+        head = f"{info['emoji']} جارٍ ال{info['label']}..." if self.finished is None else f"✅ انتهى ال{info['label']} الجماعي."
+        text = f"{head}\nتم {info['label']} **{self.done}** من {self.total}"
+        if self.failures:
+            text += f" — فشل {len(self.failures)}"
+        return text
+
+    def summary_embed(self):
+        info = ACTIONS[self.action]
+        embed = discord.Embed(
+            title=f"{info['emoji']} ملخص ال{info['label']} الجماعي",
+            description=f"تم {info['label']} **{self.done}** من {self.total} خلال {self.finished - self.started:.1f} ثانية.",
+            color=discord.Color.green() if not self.failures else discord.Color.orange()
+        )
+        if self.failures:
+            by_reason = {}
+            for user_id, reason in self.failures:
+                by_reason.setdefault(reason, []).append(user_id)
+            for reason, user_ids in list(by_reason.items())[:10]:
+                mentions = " ".join(f"<@{user_id}>" for user_id in user_ids[:15])
+                if len(user_ids) > 15:
+                    mentions += f" ... (+{len(user_ids) - 15})"
+                embed.add_field(name=f"❌ {reason} ({len(user_ids)})", value=mentions, inline=False)
+        return embed
+
+
+def _failure_reason(error):
+    if isinstance(error, discord.NotFound):
+        return "غادر السيرفر"
+    if isinstance(error, discord.Forbidden):
+        return "لا أملك الصلاحية أو رتبته أعلى"
+    return f"خطأ من ديسكورد ({getattr(error, 'status', '?')})"
+
+
+class MassModerator:
+    def __init__(self, concurrency=4, rate=5, per=1.0, progress_every=2.0):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.per = per
+        self.progress_every = progress_every
+        # السيرفر => MassActionJob (إجراء جماعي واحد لكل سيرفر)
+        self.jobs = {}
+        self.actions = 0
+
+    def reserve(self, guild_id, action):
+        """حجز السيرفر لإجراء جماعي، ويرجع None إذا كان فيه إجراء نشط"""
+        if guild_id in self.jobs:
+            return None
+        job = self.jobs[guild_id] = MassActionJob(guild_id, action)
+        return job
+
+    def release(self, job):
+        if self.jobs.get(job.guild_id) is job:
+            del self.jobs[job.guild_id]
+
+    async def run(self, job, guild, targets, reason=None, on_progress=None):
+        """تنفيذ الإجراء على targets. on_progress(job) coroutine اختيارية.
+        تحرير الحجز (release) على المستدعي، لأنه يشمل المعاينة والإلغاء أيضاً"""
+        job.total = len(targets)
+        job.started = time.monotonic()
+        reporter = asyncio.create_task(self._report_loop(job, on_progress)) if on_progress else None
+        try:
+            if job.action == 'ban' and guild.me.guild_permissions.manage_guild:
+                await self._bulk_ban(job, guild, targets, reason)
+            else:
+                await self._concurrent(job, guild, targets, reason)
+        finally:
+            job.finished = time.monotonic()
+            if reporter is not None:
+                reporter.cancel()
+        return job
+
+    async def _bulk_ban(self, job, guild, targets, reason):
+        for start in range(0, len(targets), BULK_BAN_SIZE):
+            chunk = targets[start:start + BULK_BAN_SIZE]
+            try:
+                result = await guild.bulk_ban(chunk, reason=reason)
+            except discord.HTTPException as e:
+                job.failures.extend((member.id, _failure_reason(e)) for member in chunk)
+                continue
+            job.done += len(result.banned)
+            self.actions += len(result.banned)
+            job.failures.extend((user.id, "رفضته ديسكورد") for user in result.failed)
+
+    async def _concurrent(self, job, guild, targets, reason):
+        bucket = TokenBucket(self.rate, self.per)
+        pending = iter(targets)
+
+        async def worker():
+            for member in pending:
+                # الدلو مشترك بين العمال => لا يتجاوز المجموع حد المسار
+                while (delay := bucket.delay()) > 0:
+                    await asyncio.sleep(delay)
+                bucket.take()
+                try:
+                    if job.action == 'ban':
+                        await guild.ban(member, reason=reason)
+                    else:
+                        await guild.kick(member, reason=reason)
+                except discord.HTTPException as e:
+                    job.failures.append((member.id, _failure_reason(e)))
+                else:
+                    job.done += 1
+                    self.actions += 1
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(targets)))))
+
+    async def _report_loop(self, job, on_progress):
+        # مهمة واحدة تنتظر كل تحديث قبل التالي => لا تتكدس التعديلات إذا تأخر أحدها
+        while True:
+            await asyncio.sleep(self.progress_every)
+            try:
+                await on_progress(job)
+            except discord.HTTPException:
+                pass
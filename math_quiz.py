@@ -0,0 +1,166 @@
+import asyncio
+import random
+
+import discord
+
+# -------------------------------------------------------------------------
+# موجّه إجابات الألعاب + مسابقات الرياضيات
+# -------------------------------------------------------------------------
+# بدلاً من bot.wait_for('message', check=...) (كل لعبة نشطة تفحص كل رسالة
+# في كل السيرفرات)، كل قناة فيها لعبة تسجل دالة واحدة في قاموس بآيدي القناة،
+# و on_message يبحث فيه مرة واحدة: O(1) مهما كان عدد الألعاب.
+#
+# مسابقة الرياضيات: عدة جولات بمستوى صعوبة، أول إجابة صحيحة تفوز بالجولة،
+# والنقاط تُجمع في لوحة نتائج لكل قناة.
+
+DIFFICULTIES = {
+    'easy': {'label': 'سهل', 'points': 1, 'ops': '+-'},
+    'medium': {'label': 'متوسط', 'points': 2, 'ops': '+-*/'},
+    'hard': {'label': 'صعب', 'points': 3, 'ops': '+-*/'}
+}
+
+
+class AnswerRouter:
+    def __init__(self):
+        self._routes = {}
+
+    def register(self, channel_id, callback):
+        """callback(message) => True إذا استُهلكت الرسالة. يرجع False إذا كانت القناة مشغولة"""
+        if channel_id in self._routes:
+            return False
+        self._routes[channel_id] = callback
+        return True
+
+    def unregister(self, channel_id):
+        self._routes.pop(channel_id, None)
+
+    def active(self, channel_id):
+        return channel_id in self._routes
+
+    def dispatch(self, message):
+        """تُستدعى مرة واحدة لكل رسالة من on_message"""
+        callback = self._routes.get(message.channel.id)
+        return callback(message) if callback is not None else False
+
+    def __len__(self):
+        return len(self._routes)
+
+
+def make_problem(difficulty, rng=random):
+    """(نص المسألة، الناتج الصحيح كعدد صحيح)"""
+    op = rng.choice(DIFFICULTIES[difficulty]['ops'])
+    if difficulty == 'easy':
+        a, b = rng.randint(1, 20), rng.randint(1, 20)
+    elif difficulty == 'medium':
+        a, b = rng.randint(10, 50), rng.randint(2, 20)
+    else:
+        a, b = rng.randint(50, 500), rng.randint(11, 99) if op in '+-' else rng.randint(6, 30)
+
+    if op == '+':
+        return f"{a} + {b}", a + b
+    if op == '-':
+        return f"{a} - {b}", a - b
+    if op == '*':
+        return f"{a} * {b}", a * b
+    # القسمة دائماً بدون باقٍ
+    result = rng.randint(2, 10 if difficulty == 'medium' else 25)
+    return f"{b * result} / {b}", result
+
+
+def parse_answer(content):
+    """الرقم المكتوب في الرسالة (يقبل السالب والأرقام العربية)، أو None"""
+    text = content.strip()
+    if not text or len(text) > 12:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+class _Round:
+    __slots__ = ('answer', 'future')
+
+    def __init__(self, answer, future):
+        self.answer = answer
+        self.future = future
+
+
+class MathQuizzes:
+    def __init__(self, router, outbound, answer_timeout=30.0):
+        self.router = router
+        self.outbound = outbound
+        self.answer_timeout = answer_timeout
+        # القناة => {العضو: النقاط}
+        self.scoreboards = {}
+        self._rounds = {}
+        self._listeners = []
+
+    def add_win_listener(self, callback):
+        """callback(guild_id, user_id, points) عند كل جولة يفوز بها عضو"""
+        self._listeners.append(callback)
+
+    def _on_message(self, message):
+        current = self._rounds.get(message.channel.id)
+        guess = parse_answer(message.content)
+        if current is None or guess is None:
+            return False
+        if guess == current.answer and not current.future.done():
+            current.future.set_result(message.author)
+        return True
+
+    def leaderboard(self, channel_id, limit=10):
+        scores = self.scoreboards.get(channel_id, {})
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def scoreboard_embed(self, channel_id, title="🏆 لوحة نتائج الرياضيات"):
+        lines = [f"`{i}.` <@{user_id}> — **{points}** نقطة" for i, (user_id, points) in enumerate(self.leaderboard(channel_id), start=1)]
+        return discord.Embed(title=title, description="\n".join(lines) or "لا توجد نتائج بعد.", color=discord.Color.orange())
+
+    async def run(self, interaction, rounds, difficulty):
+        """تشغيل مسابقة في قناة الأمر، ويرجع False إذا كانت القناة مشغولة بلعبة أخرى"""
+        channel = interaction.channel
+        if not self.router.register(channel.id, self._on_message):
+            return False
+
+        level = DIFFICULTIES[difficulty]
+        session = {}
+        try:
+            await interaction.response.send_message(
+                f"🧠 **مسابقة الرياضيات** — {rounds} جولة، المستوى: **{level['label']}** ({level['points']} نقطة لكل إجابة صحيحة)."
+            )
+            loop = asyncio.get_running_loop()
+            for number in range(1, rounds + 1):
+                problem, answer = make_problem(difficulty)
+                current = self._rounds[channel.id] = _Round(answer, loop.create_future())
+
+                embed = discord.Embed(
+                    title=f"🧠 تحدي الرياضيات — الجولة {number}/{rounds}",
+                    description=f"ما ناتج العملية الحسابية التالية؟\n\n## {problem} =\n\n**لديك {int(self.answer_timeout)} ثانية للإجابة!**",
+                    color=discord.Color.orange()
+                )
+                embed.set_footer(text="للإجابة، اكتب الرقم فقط (مثال: 50)")
+                await self.outbound.channel_send(channel, embed=embed)
+
+                try:
+                    winner = await asyncio.wait_for(current.future, timeout=self.answer_timeout)
+                except asyncio.TimeoutError:
+                    await self.outbound.channel_send(channel, content=f"⏳ انتهى الوقت! لم يقم أحد بالإجابة. الناتج الصحيح هو: **{answer}**.")
+                    continue
+
+                session[winner.id] = session.get(winner.id, 0) + level['points']
+                board = self.scoreboards.setdefault(channel.id, {})
+                board[winner.id] = board.get(winner.id, 0) + level['points']
+                for callback in self._listeners:
+                    callback(interaction.guild_id, winner.id, level['points'])
+                await self.outbound.channel_send(channel, content=f"🎉 **إجابة صحيحة يا {winner.mention}!** الناتج هو: **{answer}**. (+{level['points']})")
+        finally:
+            self._rounds.pop(channel.id, None)
+            self.router.unregister(channel.id)
+
+        if rounds > 1:
+            ranked = sorted(session.items(), key=lambda item: item[1], reverse=True)
+            lines = [f"`{i}.` <@{user_id}> — **{points}** نقطة" for i, (user_id, points) in enumerate(ranked, start=1)]
+            embed = discord.Embed(title="🏁 انتهت المسابقة!", description="\n".join(lines) or "لم يجب أحد إجابة صحيحة.", color=discord.Color.orange())
+            await self.outbound.channel_send(channel, embed=embed)
+        return True
@@ -0,0 +1,221 @@
+import asyncio
+import math
+import threading
+import time
+
+from discord import app_commands
+
+# -------------------------------------------------------------------------
+# المقاييس (Prometheus) وفحص الصحة
+# -------------------------------------------------------------------------
+# - عدادات وهيستوغرامات بسيطة تُعرض بصيغة Prometheus النصية على /metrics.
+# - القياس يتم بخطافات عامة وليس داخل كل أمر:
+#   * زمن الأوامر: on_app_command_completion + معالج أخطاء شجرة الأوامر.
+#   * الأحداث: خطاف dispatch في ShardedBot (shards.py).
+#   * قيم الأنظمة الأخرى (الإعدادات، الصوت، الإرسال) تُقرأ عند الطلب فقط (collectors).
+# - تأخر حلقة الأحداث يُقاس بمهمة تنام فترة ثابتة وتقيس التأخير الزائد.
+
+COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_labels(self.labels, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=COMMAND_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # التسميات => [عدادات الخانات، المجموع، العدد]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, (list(entry[0]), entry[1], entry[2])) for labels, entry in self._values.items()]
+        names = self.labels + ('le',)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, labels)} {count}')
+        return lines
+
+
+class LoopLagMonitor:
+    """تأخر حلقة الأحداث: الفرق بين مدة النوم المطلوبة والفعلية"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+
+
+class BotMetrics:
+    def __init__(self, bot, lag_threshold=2.0):
+        self.bot = bot
+        self.lag_threshold = lag_threshold
+        self.loop_lag = LoopLagMonitor()
+        self.commands = Histogram(
+            'bot_command_duration_seconds', 'Slash command latency from interaction creation to completion.',
+            ('command', 'status')
+        )
+        self.events = Counter('bot_gateway_events_total', 'Dispatched gateway events by type.', ('event',))
+        self.auto_responses = Counter('bot_auto_responder_matches_total', 'Auto-responder keyword matches by outcome.', ('outcome',))
+        self._collectors = []
+
+        bot.add_dispatch_hook(self._on_dispatch)
+        bot.add_listener(self._on_command_completion, 'on_app_command_completion')
+        self._wrap_tree_errors(bot.tree)
+
+    # ------------------------------------------------------------------
+    # الخطافات
+    # ------------------------------------------------------------------
+
+    def _on_dispatch(self, event_name, args):
+        self.events.inc(event_name)
+
+    def _observe_command(self, interaction, command, status):
+        name = command.qualified_name if command is not None else 'unknown'
+        elapsed = (time.time() - interaction.created_at.timestamp())
+        self.commands.observe(max(0.0, elapsed), name, status)
+
+    async def _on_command_completion(self, interaction, command):
+        self._observe_command(interaction, command, 'ok')
+
+    def _wrap_tree_errors(self, tree):
+        original = tree.on_error
+
+        async def on_error(interaction, error):
+            status = 'denied' if isinstance(error, app_commands.CheckFailure) else 'error'
+            self._observe_command(interaction, interaction.command, status)
+            await original(interaction, error)
+
+        tree.on_error = on_error
+
+    def add_collector(self, collector):
+        """collector() يرجع [(الاسم، النوع، الوصف، القيمة)] ويُستدعى عند كل طلب لـ /metrics.
+        مقياس بتسمية: (الاسم، النوع، الوصف، {قيمة التسمية: القيمة}، اسم التسمية)"""
+        self._collectors.append(collector)
+
+    def start(self):
+        self.loop_lag.start()
+
+    # ------------------------------------------------------------------
+    # العرض
+    # ------------------------------------------------------------------
+
+    def _gauges(self):
+        gauges = [
+            ('bot_event_loop_lag_seconds', 'gauge', 'Event loop lag measured by a periodic sleep.', self.loop_lag.lag),
+            ('bot_event_loop_lag_max_seconds', 'gauge', 'Largest event loop lag since start.', self.loop_lag.max_lag),
+            ('bot_guilds', 'gauge', 'Guilds visible to this process.', len(self.bot.guilds)),
+        ]
+        for collector in self._collectors:
+            try:
+                gauges.extend(collector())
+            except Exception as e:
+                print(f"❌ فشل جمع المقاييس: {e}")
+        return gauges
+
+    def render(self):
+        """كل المقاييس بصيغة Prometheus النصية"""
+        lines = []
+        lines.append('# HELP bot_gateway_latency_seconds Heartbeat latency per shard.')
+        lines.append('# TYPE bot_gateway_latency_seconds gauge')
+        for shard_id, latency in list(self.bot.latencies):
+            if latency == latency: # NaN قبل أول نبضة
+                lines.append(f'bot_gateway_latency_seconds{_labels(("shard",), (shard_id,))} {_number(latency)}')
+
+        for name, kind, help, value, *label in self._gauges():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            if label:
+                for label_value, sample in value.items():
+                    lines.append(f'{name}{_labels(label, (label_value,))} {_number(sample)}')
+            else:
+                lines.append(f'{name} {_number(value)}')
+
+        for metric in (self.commands, self.events, self.auto_responses):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def health(self):
+        """(سليم؟، التفاصيل): غير سليم إذا انقطعت البوابة أو تجاوز تأخر الحلقة الحد"""
+        shards = getattr(self.bot, 'shards', {})
+        closed = [shard_id for shard_id, info in list(shards.items()) if info.is_closed()]
+        details = {
+            'ready': self.bot.is_ready(),
+            'closed': self.bot.is_closed(),
+            'disconnected_shards': closed,
+            'loop_lag_seconds': round(self.loop_lag.lag, 4),
+            'loop_lag_threshold': self.lag_threshold
+        }
+        healthy = details['ready'] and not details['closed'] and not closed and self.loop_lag.lag <= self.lag_threshold
+        details['status'] = 'ok' if healthy else 'unhealthy'
+        return healthy, details
@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+# -------------------------------------------------------------------------
+# ذاكرة مؤقتة لنتائج استخراج الموسيقى (TTL + LRU)
+# -------------------------------------------------------------------------
+# المفتاح: آيدي الفيديو إن أمكن، وإلا نص البحث بعد توحيده.
+# كل عنصر ينتهي قبل انتهاء صلاحية رابط البث نفسه (معامل expire في الرابط)،
+# والحجم محدود بعدد العناصر وبعدد البايتات، مع حفظ اختياري على القرص.
+# المقطع المحفوظ تحت مفتاحين (نص البحث وآيدي الفيديو) كائن واحد يُحسب حجمه مرة واحدة.
+
+_YOUTUBE_ID = re.compile(r'(?:youtube\.com/(?:watch\?.*?v=|shorts/|embed/)|youtu\.be/)([\w-]{11})')
+
+
+def cache_key(query):
+    """توحيد نص البحث أو الرابط إلى مفتاح ثابت"""
+    match = _YOUTUBE_ID.search(query)
+    if match:
+        return f"yt:{match.group(1)}"
+    return "q:" + " ".join(query.lower().split())
+
+
+def stream_expiry(url):
+    """وقت انتهاء صلاحية رابط البث (من معامل expire) أو None"""
+    values = parse_qs(urlparse(url).query).get('expire')
+    if values and values[0].isdigit():
+        return int(values[0])
+    return None
+
+
+class ExtractionCache:
+    def __init__(self, max_entries=512, max_bytes=4 * 1024 * 1024, ttl=3 * 3600, safety_margin=600, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.safety_margin = safety_margin
+        self.path = path
+        # المفتاح => (وقت الانتهاء، الحجم، المقطع)
+        self._entries = OrderedDict()
+        # id(المقطع) => عدد المفاتيح التي تشير إليه (الحجم يُحسب عند أول مفتاح فقط)
+        self._refs = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query):
+        """إرجاع المقطع المحفوظ أو None إذا لم يوجد أو انتهت صلاحيته"""
+        key = cache_key(query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, query, track):
+        """حفظ المقطع تحت مفتاح البحث وتحت آيدي الفيديو معاً"""
+        now = time.time()
+        expires_at = now + self.ttl
+        expiry = stream_expiry(track.get('url', ''))
+        if expiry is not None:
+            expires_at = min(expires_at, expiry - self.safety_margin)
+        if expires_at <= now:
+            return
+
+        keys = {cache_key(query)}
+        if track.get('id') and track.get('extractor', 'youtube').startswith('youtube'):
+            keys.add(f"yt:{track['id']}")
+        size = len(json.dumps(track, ensure_ascii=False).encode('utf-8'))
+        for key in keys:
+            self._insert(key, (expires_at, size, track))
+
+    def _insert(self, key, entry):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        payload = id(entry[2])
+        refs = self._refs.get(payload, 0)
+        if not refs:
+            self._bytes += entry[1]
+        self._refs[payload] = refs + 1
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        payload = id(entry[2])
+        refs = self._refs.pop(payload) - 1
+        if refs:
+            self._refs[payload] = refs
+        else:
+            self._bytes -= entry[1]
+
+    def stats(self):
+        """عدادات الإصابة والإخفاق والحجم الحالي"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+    # ------------------------------------------------------------------
+    # الحفظ على القرص (اختياري)
+    # ------------------------------------------------------------------
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ تعذر تحميل ذاكرة الموسيقى المؤقتة: {e}")
+            return
+        now = time.time()
+        # إعادة ربط المفتاحين بنفس الكائن حتى لا يُحسب الحجم مرتين
+        shared = {}
+        for key, expires_at, size, track in rows:
+            if expires_at > now:
+                if track.get('id'):
+                    track = shared.setdefault((track['id'], expires_at), track)
+                self._insert(key, (expires_at, size, track))
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        rows = [[key, e[0], e[1], e[2]] for key, e in self._entries.items() if e[0] > now]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,195 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+# -------------------------------------------------------------------------
+# مجمّع استخراج روابط الموسيقى (yt-dlp) خارج حلقة الأحداث
+# -------------------------------------------------------------------------
+# extract_info متزامنة وتعمل على الشبكة، لذلك تُنفّذ في مجموعة خيوط محدودة.
+# لكل سيرفر حد أقصى لعمليات الاستخراج المتزامنة، ولكل عملية مهلة،
+# ويمكن إلغاء طلبات عضو معيّن (مثلاً عند مغادرته القناة الصوتية).
+# النتائج تُختصر إلى قاموس صغير (track) وتُحفظ في ExtractionCache إن وُجدت.
+
+YDL_OPTIONS = {
+    'format': 'bestaudio/best',
+    'noplaylist': True,
+    'default_search': 'auto',
+    'quiet': True,
+    # يحدّ من بقاء الخيط عالقاً على الشبكة بعد انتهاء المهلة
+    'socket_timeout': 15
+}
+
+# قوائم التشغيل: استخراج سطحي (بدون روابط البث) صفحة صفحة
+PLAYLIST_OPTIONS = {
+    **YDL_OPTIONS,
+    'noplaylist': False,
+    'extract_flat': 'in_playlist'
+}
+
+
+# الحد الأعلى لمعدل البت (kbps)؛ قنوات ديسكورد الصوتية العادية لا تتجاوز 96
+AUDIO_BITRATE_CAP = 96
+
+
+def _format_rank(fmt, max_bitrate):
+    """ترتيب صيغة صوتية (الأصغر أفضل)"""
+    acodec = (fmt.get('acodec') or '').lower()
+    vcodec = (fmt.get('vcodec') or 'none').lower()
+    abr = fmt.get('abr') or fmt.get('tbr') or 0
+
+    # 0: Opus داخل WebM => يُمرر كما هو بدون أي تحويل
+    # 1: صوت فقط بترميز آخر => تحويل واحد إلى Opus داخل FFmpeg
+    # 2: صيغة فيها فيديو => أغلى خيار
+    if acodec.startswith('opus') and fmt.get('ext') == 'webm' and vcodec == 'none':
+        tier = 0
+    elif vcodec == 'none':
+        tier = 1
+    else:
+        tier = 2
+
+    # ضمن نفس الفئة: أعلى جودة لا تتجاوز الحد، ثم الأقرب للحد من فوق
+    over_cap = abr > max_bitrate
+    return (tier, over_cap, abr if over_cap else -abr)
+
+
+def select_audio_format(info, max_bitrate=AUDIO_BITRATE_CAP):
+    """اختيار أفضل صيغة صوتية: Opus/WebM أولاً، مع احترام حد معدل البت"""
+    candidates = [
+        f for f in info.get('formats') or []
+        if f.get('url') and (f.get('acodec') or 'none') != 'none'
+    ]
+    if not candidates:
+        # بعض المواقع ترجع رابطاً واحداً مباشراً بدون قائمة صيغ
+        if info.get('url'):
+            return {'url': info['url'], 'acodec': info.get('acodec'), 'ext': info.get('ext'), 'abr': info.get('abr')}
+        raise LookupError("لا توجد صيغة صوتية صالحة لهذا المقطع.")
+    return min(candidates, key=lambda f: _format_rank(f, max_bitrate))
+
+
+def make_track(info, max_bitrate=AUDIO_BITRATE_CAP):
+    """اختصار نتيجة yt-dlp إلى ما نحتاجه للتشغيل فقط"""
+    fmt = select_audio_format(info, max_bitrate)
+    acodec = (fmt.get('acodec') or '').lower()
+    return {
+        'id': info.get('id'),
+        'extractor': info.get('extractor_key', '').lower(),
+        'title': info.get('title', 'عنوان غير معروف'),
+        'duration': info.get('duration'),
+        'webpage_url': info.get('webpage_url'),
+        'url': fmt['url'],
+        # opus => تمرير مباشر، غير ذلك => تحويل داخل FFmpeg
+        'codec': 'opus' if acodec.startswith('opus') and fmt.get('ext') == 'webm' else acodec,
+        'abr': fmt.get('abr')
+    }
+
+
+class ExtractionPool:
+    def __init__(self, max_workers=4, per_guild=2, timeout=30.0, ydl_options=None, cache=None, max_bitrate=AUDIO_BITRATE_CAP):
+        self.cache = cache
+        self.max_bitrate = max_bitrate
+        self.timeout = timeout
+        self.per_guild = per_guild
+        self.ydl_options = ydl_options or YDL_OPTIONS
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ytdl')
+        self._guild_limits = {}
+        self._tasks = {}
+
+    def _extract_sync(self, query):
+        with yt_dlp.YoutubeDL(self.ydl_options) as ydl:
+            info = ydl.extract_info(query, download=False)
+        if info and 'entries' in info:
+            entries = [entry for entry in info['entries'] if entry]
+            if not entries:
+                raise LookupError(f"لا توجد نتائج لـ: {query}")
+            info = entries[0]
+        return make_track(info, self.max_bitrate)
+
+    def _playlist_page_sync(self, url, start, count):
+        options = {**PLAYLIST_OPTIONS, 'playlist_items': f'{start}-{start + count - 1}'}
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+        entries = []
+        for entry in (info or {}).get('entries') or []:
+            if not entry:
+                continue
+            link = entry.get('url') or entry.get('webpage_url') or entry.get('id')
+            if link:
+                entries.append((link, entry.get('title') or link))
+        return (info or {}).get('title'), entries
+
+    async def playlist_pages(self, guild_id, url, page_size=50, max_entries=500):
+        """مولّد غير متزامن يُرجع صفحات قائمة التشغيل واحدة تلو الأخرى: (العنوان، [(رابط، عنوان)])"""
+        start = 1
+        while start <= max_entries:
+            count = min(page_size, max_entries - start + 1)
+            async with self._semaphore(guild_id):
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._executor, self._playlist_page_sync, url, start, count)
+                title, entries = await asyncio.wait_for(future, timeout=self.timeout)
+            if entries:
+                yield title, entries
+            if len(entries) < count:
+                return
+            start += count
+
+    def _semaphore(self, guild_id):
+        sem = self._guild_limits.get(guild_id)
+        if sem is None:
+            sem = self._guild_limits[guild_id] = asyncio.Semaphore(self.per_guild)
+        return sem
+
+    async def extract(self, guild_id, query, fresh=False):
+        """استخراج المقطع في الخلفية مع احترام حد السيرفر والمهلة (fresh يتجاوز الذاكرة المؤقتة)"""
+        if self.cache is not None and not fresh:
+            track = self.cache.get(query)
+            if track is not None:
+                return track
+
+        async with self._semaphore(guild_id):
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self._extract_sync, query)
+            track = await asyncio.wait_for(future, timeout=self.timeout)
+
+        if self.cache is not None:
+            self.cache.put(query, track)
+        return track
+
+    def submit(self, guild_id, user_id, query):
+        """بدء الاستخراج كمهمة قابلة للإلغاء مرتبطة بالعضو الذي طلبها"""
+        task = asyncio.create_task(self.extract(guild_id, query))
+        key = (guild_id, user_id)
+        self._tasks.setdefault(key, set()).add(task)
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    def _forget(self, key, task):
+        tasks = self._tasks.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[key]
+
+    def cancel_user(self, guild_id, user_id):
+        """إلغاء كل طلبات العضو المعلّقة في السيرفر، ويرجع عددها"""
+        tasks = list(self._tasks.get((guild_id, user_id), ()))
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def cancel_guild(self, guild_id):
+        """إلغاء كل الطلبات المعلّقة في السيرفر"""
+        count = 0
+        for (g, user_id) in list(self._tasks):
+            if g == guild_id:
+                count += self.cancel_user(g, user_id)
+        return count
+
+    def pending(self, guild_id=None):
+        """عدد عمليات الاستخراج الجارية (لسيرفر معيّن أو للكل)"""
+        return sum(len(tasks) for (g, _), tasks in self._tasks.items() if guild_id is None or g == guild_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.save()
@@ -0,0 +1,298 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+from music_cache import stream_expiry
+from music_extractor import AUDIO_BITRATE_CAP
+
+# -------------------------------------------------------------------------
+# قائمة تشغيل لكل سيرفر مع تجهيز المقطع التالي مسبقاً (Prefetch)
+# -------------------------------------------------------------------------
+# المقطع التالي يُستخرج أثناء تشغيل الحالي، فينتقل التشغيل دون انتظار.
+# إذا اقتربت صلاحية رابط البث المجهّز من الانتهاء يُعاد استخراجه قبل التشغيل.
+# الانتقال بين المقاطع يتم عبر after= في voice_client.play.
+
+LOOP_MODES = ('off', 'track', 'queue')
+
+# أقل مدة صلاحية متبقية (بالثواني) لرابط البث حتى نعتبره صالحاً للتشغيل
+STREAM_MIN_REMAINING = 120
+
+
+class QueueEntry:
+    __slots__ = ('query', 'requester_id', 'title', 'track')
+
+    def __init__(self, query, requester_id, track=None):
+        self.query = query
+        self.requester_id = requester_id
+        self.title = track['title'] if track else query
+        self.track = track
+
+    def is_fresh(self):
+        """هل رابط البث المجهّز ما زال صالحاً للتشغيل؟"""
+        if self.track is None:
+            return False
+        expiry = stream_expiry(self.track['url'])
+        return expiry is None or expiry - time.time() > STREAM_MIN_REMAINING
+
+
+# إعادة الاتصال تلقائياً إذا انقطع البث من المصدر أثناء التشغيل
+FFMPEG_BEFORE_OPTIONS = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+FFMPEG_OPTIONS = '-vn'
+
+
+def make_source(track, max_bitrate=AUDIO_BITRATE_CAP):
+    """إنشاء مصدر الصوت: Opus يُمرر كما هو، وغيره يُحوّل إلى Opus مرة واحدة داخل FFmpeg"""
+    bitrate = min(int(track.get('abr') or max_bitrate), max_bitrate)
+    is_stream = track['url'].startswith(('http://', 'https://'))
+    return discord.FFmpegOpusAudio(
+        track['url'],
+        codec='copy' if track.get('codec') == 'opus' else None,
+        bitrate=bitrate,
+        before_options=FFMPEG_BEFORE_OPTIONS if is_stream else None,
+        options=FFMPEG_OPTIONS
+    )
+
+
+class GuildPlayer:
+    def __init__(self, guild, pool, text_channel=None, outbound=None):
+        self.guild = guild
+        self.pool = pool
+        self.outbound = outbound
+        self.text_channel = text_channel
+        self.entries = deque()
+        self.current = None
+        self.loop_mode = 'off'
+        self._prefetch_task = None
+        self._advance_task = None
+        self._advancing = False
+        # المقطع الذي طُلب تخطيه: لا يُعاد حتى مع تكرار المقطع (مرة واحدة)
+        self._skipped = None
+        self._feeder = None
+        self._room = asyncio.Event()
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    def is_active(self):
+        """هل يوجد مقطع يعمل أو قيد التجهيز؟"""
+        return self.current is not None or self._advancing
+
+    # ------------------------------------------------------------------
+    # إدارة القائمة
+    # ------------------------------------------------------------------
+
+    def enqueue(self, entry, announce=False):
+        """إضافة مقطع للقائمة، ويرجع ترتيبه (0 = يعمل الآن)"""
+        self.entries.append(entry)
+        if not self.is_active():
+            # أول مقطع: صاحب الطلب يُبلَّغ من الأمر نفسه عادةً، فلا حاجة لإشعار إضافي
+            self._start_advance(announce=announce)
+            return 0
+        self._prefetch()
+        return len(self.entries)
+
+    def skip(self):
+        """تخطي المقطع الحالي (after= سينقل التشغيل للتالي)"""
+        vc = self.voice_client
+        if vc and (vc.is_playing() or vc.is_paused()):
+            self._skipped = self.current
+            vc.stop()
+            return True
+        return False
+
+    def remove(self, position):
+        """حذف مقطع من القائمة حسب ترتيبه (يبدأ من 1)"""
+        if not 1 <= position <= len(self.entries):
+            return None
+        self.entries.rotate(-(position - 1))
+        entry = self.entries.popleft()
+        self.entries.rotate(position - 1)
+        self._room.set()
+        if position == 1:
+            self._cancel_prefetch()
+            self._prefetch()
+        return entry
+
+    def clear(self):
+        self._cancel_prefetch()
+        self.stop_feeding()
+        self.entries.clear()
+        self.current = None
+
+    # ------------------------------------------------------------------
+    # قوائم التشغيل: إضافة تدريجية بحجم محدود
+    # ------------------------------------------------------------------
+
+    def is_feeding(self):
+        """هل توجد قائمة تشغيل ما زالت مقاطعها تُضاف؟"""
+        return self._feeder is not None and not self._feeder.done()
+
+    def feed_playlist(self, pages, requester_id, max_pending=50):
+        """إضافة مقاطع قائمة تشغيل تدريجياً، مع إبقاء عدد المقاطع المنتظرة تحت max_pending.
+        يرجع None (دون إلغاء السابقة) إذا كانت قائمة أخرى ما زالت تُضاف"""
+        if self.is_feeding():
+            return None
+        self._feeder = asyncio.create_task(self._feed(pages, requester_id, max_pending))
+        return self._feeder
+
+    def stop_feeding(self):
+        if self._feeder is not None:
+            self._feeder.cancel()
+            self._feeder = None
+
+    async def _feed(self, pages, requester_id, max_pending):
+        added = 0
+        try:
+            async for _, entries in pages:
+                for link, title in entries:
+                    while len(self.entries) >= max_pending:
+                        self._room.clear()
+                        await self._room.wait()
+                    entry = QueueEntry(link, requester_id)
+                    entry.title = title
+                    self.enqueue(entry, announce=True)
+                    added += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ توقف تحميل قائمة التشغيل: {e}")
+            await self._announce(f"⚠️ توقف تحميل بقية قائمة التشغيل بعد **{added}** مقطع.")
+        finally:
+            await pages.aclose()
+        return added
+
+    # ------------------------------------------------------------------
+    # التجهيز المسبق
+    # ------------------------------------------------------------------
+
+    def _prefetch(self):
+        if (self._prefetch_task is not None and not self._prefetch_task.done()) or not self.entries:
+            return
+        nxt = self.entries[0]
+        if nxt.is_fresh():
+            return
+        self._prefetch_task = asyncio.create_task(self._resolve(nxt))
+        self._prefetch_task.add_done_callback(self._prefetch_done)
+
+    def _prefetch_done(self, task):
+        # مهمة قديمة أُلغيت (remove مثلاً) لا تمسح مرجع المهمة الجديدة
+        if task is self._prefetch_task:
+            self._prefetch_task = None
+        if not task.cancelled() and task.exception():
+            print(f"❌ فشل تجهيز المقطع التالي: {task.exception()}")
+
+    def _cancel_prefetch(self):
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+
+    async def _resolve(self, entry):
+        # استخراج جديد متجاوزاً الذاكرة المؤقتة إذا كان الرابط القديم قد انتهى
+        entry.track = await self.pool.extract(self.guild.id, entry.query, fresh=entry.track is not None)
+        entry.title = entry.track['title']
+        return entry
+
+    # ------------------------------------------------------------------
+    # التشغيل والانتقال
+    # ------------------------------------------------------------------
+
+    def _start_advance(self, announce=True):
+        self._advancing = True
+        self._advance_task = asyncio.create_task(self._advance(announce))
+
+    def _after(self, error, loop, entry):
+        # تُستدعى من خيط الصوت، لذلك ننقل التنفيذ لحلقة الأحداث
+        if error:
+            print(f'خطأ في التشغيل: {error}')
+        loop.call_soon_threadsafe(self._on_track_end, entry)
+
+    def _on_track_end(self, finished):
+        if finished is not self.current:
+            return
+        self.current = None
+        skipped, self._skipped = self._skipped is finished, None
+        if self.loop_mode == 'track' and not skipped:
+            self.entries.appendleft(finished)
+        elif self.loop_mode == 'queue':
+            self.entries.append(finished)
+        if not self._advancing:
+            self._start_advance()
+
+    async def _advance(self, announce):
+        try:
+            while self.entries:
+                vc = self.voice_client
+                if not vc or not vc.is_connected():
+                    self.clear()
+                    return
+
+                entry = self.entries.popleft()
+                self._room.set()
+                try:
+                    if self._prefetch_task is not None:
+                        await asyncio.wait({self._prefetch_task})
+                    if not entry.is_fresh():
+                        await self._resolve(entry)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"❌ تعذر تجهيز المقطع {entry.query}: {e}")
+                    await self._announce(f"❌ تعذر تشغيل **{entry.title}**، تم تخطيه.")
+                    continue
+
+                vc = self.voice_client
+                if not vc or not vc.is_connected():
+                    self.clear()
+                    return
+                if vc.is_playing():
+                    vc.stop()
+
+                self.current = entry
+                loop = asyncio.get_running_loop()
+                vc.play(make_source(entry.track, self.pool.max_bitrate), after=lambda e: self._after(e, loop, entry))
+                if announce:
+                    await self._announce(f"🎶 يتم تشغيل: **{entry.title}**")
+                self._prefetch()
+                return
+        finally:
+            self._advancing = False
+
+    async def _announce(self, content):
+        if self.text_channel is None:
+            return
+        try:
+            if self.outbound is not None:
+                await self.outbound.channel_send(self.text_channel, content=content)
+            else:
+                await self.text_channel.send(content)
+        except discord.HTTPException as e:
+            print(f"❌ تعذر إرسال إشعار التشغيل: {e}")
+
+
+class MusicQueues:
+    def __init__(self, pool, outbound=None):
+        self.pool = pool
+        self.outbound = outbound
+        self._players = {}
+
+    def get(self, guild, text_channel=None):
+        """قائمة السيرفر (تُنشأ عند أول استخدام)"""
+        player = self._players.get(guild.id)
+        if player is None:
+            player = self._players[guild.id] = GuildPlayer(guild, self.pool, text_channel, self.outbound)
+        elif text_channel is not None:
+            player.text_channel = text_channel
+        return player
+
+    def peek(self, guild_id):
+        return self._players.get(guild_id)
+
+    def drop(self, guild_id):
+        """حذف قائمة السيرفر (عند الخروج من القناة الصوتية)"""
+        player = self._players.pop(guild_id, None)
+        if player is not None:
+            player.clear()
+        return player
@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+# -------------------------------------------------------------------------
+# مجدول الرسائل الصادرة (Outbound Scheduler)
+# -------------------------------------------------------------------------
+# كل الإرسالات (channel.send، followup.send، الرسائل الخاصة، الردود التلقائية)
+# تمر عبر طابور لكل مسار (قناة، رسالة خاصة، أو webhook أمر) مع دلو رموز (Token Bucket)
+# لكل مسار ودلو عام للبوت كله، فلا نصطدم بحدود ديسكورد ونتفادى انتظار 429.
+#
+# الأولوية: ردود الأوامر أولاً، ثم الرسائل العادية، ثم الردود التلقائية.
+# الردود التلقائية القديمة أو المكررة تُحذف عندما تُغرق القناة.
+#
+# ملاحظة: الرد الأول على الأمر (interaction.response) لا يمر من هنا لأن له
+# مهلة 3 ثوانٍ ونقطة نهاية خاصة لا تخضع لحد القناة.
+
+PRIORITY_INTERACTION = 0
+PRIORITY_NORMAL = 1
+PRIORITY_AUTO = 2
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, per):
+        self.rate = rate / per
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """الثواني المتبقية حتى يتوفر رمز واحد"""
+        now = time.monotonic()
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'factory', 'future', 'enqueued', 'merge_key', 'dropped')
+
+    def __init__(self, priority, seq, factory, future, merge_key):
+        self.priority = priority
+        self.seq = seq
+        self.factory = factory
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.merge_key = merge_key
+        self.dropped = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Route:
+    __slots__ = ('heap', 'bucket', 'worker', 'auto_jobs')
+
+    def __init__(self, rate, per):
+        self.heap = []
+        self.bucket = TokenBucket(rate, per)
+        self.worker = None
+        # الردود التلقائية المنتظرة بالترتيب (لحذف الأقدم عند الإغراق)
+        self.auto_jobs = deque()
+
+
+class OutboundScheduler:
+    def __init__(self, rate=5, per=5.0, global_rate=45, global_per=1.0,
+                 max_auto_pending=3, stale_after=10.0, samples=2048):
+        self.rate = rate
+        self.per = per
+        self.max_auto_pending = max_auto_pending
+        self.stale_after = stale_after
+        self._global = TokenBucket(global_rate, global_per)
+        self._routes = {}
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=samples)
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+
+    # ------------------------------------------------------------------
+    # واجهة الإرسال
+    # ------------------------------------------------------------------
+
+    def submit(self, route_key, factory, priority=PRIORITY_NORMAL, merge_key=None):
+        """جدولة factory() (coroutine) على المسار، ويرجع Future بالنتيجة (None إذا حُذفت)"""
+        loop = asyncio.get_running_loop()
+        route = self._routes.get(route_key)
+        if route is None:
+            route = self._routes[route_key] = _Route(self.rate, self.per)
+
+        if priority == PRIORITY_AUTO:
+            merged = self._merge_or_trim(route, merge_key)
+            if merged is not None:
+                return merged
+
+        future = loop.create_future()
+        job = _Job(priority, next(self._seq), factory, future, merge_key)
+        heapq.heappush(route.heap, job)
+        if priority == PRIORITY_AUTO:
+            route.auto_jobs.append(job)
+
+        if route.worker is None or route.worker.done():
+            route.worker = asyncio.create_task(self._drain(route_key, route))
+        return future
+
+    async def send(self, route_key, factory, priority=PRIORITY_NORMAL, merge_key=None):
+        return await self.submit(route_key, factory, priority, merge_key)
+
+    async def channel_send(self, channel, *, priority=PRIORITY_NORMAL, merge_key=None, **kwargs):
+        """channel.send عبر المجدول"""
+        return await self.submit(('channel', channel.id), lambda: channel.send(**kwargs), priority, merge_key)
+
+    async def followup_send(self, interaction, **kwargs):
+        """interaction.followup.send على مسار مستقل لكل أمر: الرد يمر عبر webhook الأمر،
+        فلا ينتظر خلف رسائل القناة ولا يستهلك رموزها"""
+        return await self.submit(
+            ('interaction', interaction.id), lambda: interaction.followup.send(**kwargs), PRIORITY_INTERACTION
+        )
+
+    async def dm_send(self, user, *, priority=PRIORITY_NORMAL, **kwargs):
+        """رسالة خاصة عبر المجدول (مسار مستقل لكل مستخدم)"""
+        return await self.submit(('dm', user.id), lambda: user.send(**kwargs), priority)
+
+    # ------------------------------------------------------------------
+    # الإغراق والدمج
+    # ------------------------------------------------------------------
+
+    def _merge_or_trim(self, route, merge_key):
+        auto_jobs = route.auto_jobs
+        while auto_jobs and (auto_jobs[0].dropped or auto_jobs[0].future.done()):
+            auto_jobs.popleft()
+
+        # نفس الرد التلقائي ما زال منتظراً => لا داعي لتكراره
+        if merge_key is not None:
+            for job in auto_jobs:
+                if job.merge_key == merge_key and not job.dropped:
+                    self.merged += 1
+                    return job.future
+
+        # القناة مُغرقة => حذف أقدم رد تلقائي منتظر
+        pending = [job for job in auto_jobs if not job.dropped]
+        if len(pending) >= self.max_auto_pending:
+            self._drop(pending[0])
+        return None
+
+    def _drop(self, job):
+        job.dropped = True
+        self.dropped += 1
+        if not job.future.done():
+            job.future.set_result(None)
+
+    # ------------------------------------------------------------------
+    # العامل لكل مسار
+    # ------------------------------------------------------------------
+
+    async def _drain(self, route_key, route):
+        try:
+            while route.heap:
+                # انتظار الرمز أولاً ثم أخذ الأعلى أولوية (قد تصل مهمة أهم أثناء الانتظار)
+                while True:
+                    delay = max(route.bucket.delay(), self._global.delay())
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+
+                job = heapq.heappop(route.heap)
+                if job.dropped or job.future.done():
+                    continue
+
+                wait = time.monotonic() - job.enqueued
+                if job.priority == PRIORITY_AUTO and wait > self.stale_after:
+                    self._drop(job)
+                    continue
+
+                route.bucket.take()
+                self._global.take()
+                self._waits.append(wait)
+                try:
+                    result = await job.factory()
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    self.sent += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finally:
+                    # إلغاء العامل أو BaseException => لا يبقى المنتظر معلّقاً للأبد
+                    if not job.future.done():
+                        job.future.cancel()
+        finally:
+            # العامل أُلغي => المهام التي لم تُرسل تُلغى أيضاً بدلاً من بقائها معلّقة
+            for job in route.heap:
+                if not job.future.done():
+                    job.future.cancel()
+            route.heap.clear()
+            # حذف المسار بعد امتلاء دلوه من جديد، حتى لا يبدأ مسار جديد بدلو ممتلئ مبكراً
+            asyncio.get_running_loop().call_later(self.per, self._forget_route, route_key, route)
+
+    def _forget_route(self, route_key, route):
+        if not route.heap and (route.worker is None or route.worker.done()) and self._routes.get(route_key) is route:
+            del self._routes[route_key]
+
+    # ------------------------------------------------------------------
+    # الإحصائيات
+    # ------------------------------------------------------------------
+
+    def queue_depth(self):
+        return sum(len(route.heap) for route in list(self._routes.values()))
+
+    def wait_percentiles(self, points=(50, 95, 99)):
+        """نِسب زمن الانتظار في الطابور (بالثواني) لآخر الإرسالات"""
+        if not self._waits:
+            return {p: 0.0 for p in points}
+        waits = sorted(self._waits)
+        last = len(waits) - 1
+        return {p: waits[min(last, round(p / 100 * last))] for p in points}
@@ -0,0 +1,160 @@
+import bisect
+import sqlite3
+import threading
+
+from write_behind import WriteBehind
+
+# -------------------------------------------------------------------------
+# سجل النقاط لكل سيرفر وعضو (SQLite + WAL) مع كتابة مجمّعة
+# -------------------------------------------------------------------------
+# - الأرصدة في الذاكرة (قاموس لكل سيرفر)، فقراءة الرصيد O(1).
+# - كل تعديل يتم دفعة واحدة دون await بينها (apply)، فهو ذري داخل حلقة الأحداث:
+#   إما أن تُطبق كل التغييرات أو لا شيء (إذا أصبح أي رصيد سالباً).
+# - الأرصدة المعدلة تُكتب معاً في معاملة واحدة كل delay ثانية، وليس عند كل لعبة.
+# - لوحة المتصدرين: قائمة مرتبة لكل سيرفر تُحدّث عند كل تعديل (bisect)،
+#   فعرض أول N لا يحتاج ترتيب الجدول كاملاً.
+
+STARTING_BALANCE = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS balances (
+    guild_id INTEGER NOT NULL,
+    user_id  INTEGER NOT NULL,
+    balance  INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+"""
+
+
+class InsufficientPoints(Exception):
+    """الرصيد لا يكفي لإتمام العملية"""
+
+
+class PointsLedger:
+    def __init__(self, path, starting_balance=STARTING_BALANCE, delay=2.0):
+        self.path = path
+        self.starting_balance = starting_balance
+        self.delay = delay
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        # السيرفر => {العضو: الرصيد}
+        self._balances = {}
+        # السيرفر => [(-الرصيد، العضو)] مرتبة تصاعدياً (الأعلى رصيداً أولاً)
+        self._index = {}
+        self._pending = {}
+        self._writer = WriteBehind(delay, self._has_pending, self._take_batch, self._write_batch, self._requeue, 'النقاط')
+        self.writes = 0
+
+    def preload(self):
+        """تحميل كل الأرصدة إلى الذاكرة وبناء لوحات المتصدرين (عند الإقلاع)"""
+        with self._db_lock:
+            rows = self._conn.execute('SELECT guild_id, user_id, balance FROM balances').fetchall()
+        for guild_id, user_id, balance in rows:
+            self._balances.setdefault(guild_id, {})[user_id] = balance
+        for guild_id, balances in self._balances.items():
+            self._index[guild_id] = sorted((-balance, user_id) for user_id, balance in balances.items())
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # القراءة
+    # ------------------------------------------------------------------
+
+    def balance(self, guild_id, user_id):
+        return self._balances.get(guild_id, {}).get(user_id, self.starting_balance)
+
+    def top(self, guild_id, limit=10):
+        """أعلى limit أعضاء رصيداً: [(العضو، الرصيد)]"""
+        return [(user_id, -negative) for negative, user_id in self._index.get(guild_id, [])[:limit]]
+
+    def rank(self, guild_id, user_id):
+        """ترتيب العضو في السيرفر (يبدأ من 1)، أو None إذا لم يلعب بعد"""
+        balances = self._balances.get(guild_id, {})
+        if user_id not in balances:
+            return None
+        return bisect.bisect_left(self._index[guild_id], (-balances[user_id], user_id)) + 1
+
+    # ------------------------------------------------------------------
+    # التعديل
+    # ------------------------------------------------------------------
+
+    def apply(self, guild_id, changes):
+        """تطبيق {العضو: التغيير} كعملية واحدة، ويرفع InsufficientPoints دون تعديل أي رصيد"""
+        if not guild_id:
+            # النقاط لكل سيرفر فقط (الرسائل الخاصة ليس لها سيرفر)
+            raise ValueError("النقاط تتطلب آيدي سيرفر.")
+        new_balances = {}
+        for user_id, delta in changes.items():
+            balance = new_balances.get(user_id, self.balance(guild_id, user_id)) + delta
+            if balance < 0:
+                raise InsufficientPoints(user_id)
+            new_balances[user_id] = balance
+
+        balances = self._balances.setdefault(guild_id, {})
+        index = self._index.setdefault(guild_id, [])
+        for user_id, balance in new_balances.items():
+            old = balances.get(user_id)
+            if old is not None:
+                del index[bisect.bisect_left(index, (-old, user_id))]
+            bisect.insort(index, (-balance, user_id))
+            balances[user_id] = balance
+            self._pending[(guild_id, user_id)] = balance
+        self._writer.schedule()
+        return new_balances
+
+    def credit(self, guild_id, user_id, amount):
+        return self.apply(guild_id, {user_id: amount})[user_id]
+
+    def debit(self, guild_id, user_id, amount):
+        """خصم المبلغ، ويرجع False إذا لم يكفِ الرصيد"""
+        try:
+            self.apply(guild_id, {user_id: -amount})
+        except InsufficientPoints:
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # الحفظ المجمّع
+    # ------------------------------------------------------------------
+
+    def _has_pending(self):
+        return bool(self._pending)
+
+    def _take_batch(self):
+        batch, self._pending = self._pending, {}
+        return [(g, u, b) for (g, u), b in batch.items()]
+
+    def _write_batch(self, rows):
+        with self._db_lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('INSERT OR REPLACE INTO balances VALUES (?, ?, ?)', rows)
+                self._conn.execute('COMMIT')
+            except sqlite3.IntegrityError:
+                self._conn.execute('ROLLBACK')
+                self._write_valid_rows(rows)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        self.writes += 1
+
+    def _write_valid_rows(self, rows):
+        # صف غير صالح لا يمنع حفظ بقية الدفعة: كل صف على حدة، والمرفوض يُسقط
+        self._conn.execute('BEGIN')
+        for row in rows:
+            try:
+                self._conn.execute('INSERT OR REPLACE INTO balances VALUES (?, ?, ?)', row)
+            except sqlite3.IntegrityError as e:
+                print(f"❌ أُسقط رصيد غير صالح {row}: {e}")
+        self._conn.execute('COMMIT')
+
+    def _requeue(self, rows):
+        for g, u, b in rows:
+            self._pending.setdefault((g, u), b)
+
+    def flush_sync(self):
+        """كتابة الأرصدة المعلّقة فوراً (بعد توقف حلقة الأحداث)"""
+        self._writer.flush_sync()
@@ -0,0 +1,233 @@
+import asyncio
+import datetime
+import time
+
+import discord
+
+from outbound import TokenBucket
+
+# -------------------------------------------------------------------------
+# محرك المسح الجماعي (/مسح) مع فلاتر
+# -------------------------------------------------------------------------
+# - السجل يُقرأ صفحة صفحة (channel.history بلا حد)، فلا تُحمَّل آلاف الرسائل
+#   في الذاكرة مرة واحدة، ويتوقف القراءة فور الوصول للعدد المطلوب.
+# - الرسائل الأحدث من 14 يوماً تُحذف بالحذف الجماعي (100 رسالة لكل طلب)،
+#   وطلب الحذف يعمل بينما تُقرأ الصفحة التالية (طلب واحد معلّق فقط).
+# - الرسائل الأقدم لا يقبلها الحذف الجماعي، فتُحذف واحدة واحدة بدلو رموز
+#   حتى لا نصطدم بحد المسار.
+# - التقدم يُعرض كل progress_every ثانية، والعملية تُلغى بزر أو بأمر.
+
+MAX_PURGE = 10000
+BULK_SIZE = 100
+# أقل قليلاً من 14 يوماً حتى لا ترفض ديسكورد رسالة تجاوزت الحد أثناء المسح
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+
+
+def build_filter(member=None, contains=None, attachments=False, bots=False):
+    """دالة message => bool تجمع الفلاتر المختارة (كلها يجب أن تتحقق)"""
+    # نص حرفي وليس regex: الفلتر يعمل على حلقة الأحداث لكل رسالة مفحوصة،
+    # ونمط بتراجع كارثي من المشرف قد يجمّد البوت
+    needle = contains.casefold() if contains else None
+    member_id = member.id if member is not None else None
+
+    def predicate(message):
+        if message.pinned:
+            return False
+        if member_id is not None and message.author.id != member_id:
+            return False
+        if bots and not message.author.bot:
+            return False
+        if attachments and not message.attachments:
+            return False
+        if needle is not None and needle not in message.content.casefold():
+            return False
+        return True
+
+    return predicate
+
+
+class PurgeJob:
+    __slots__ = ('channel_id', 'owner_id', 'limit', 'scanned', 'deleted', 'failed',
+                 'cancelled', 'error', 'started', 'finished', '_reporter')
+
+    def __init__(self, channel_id, owner_id, limit):
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.limit = limit
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.cancelled = False
+        self.error = None
+        self.started = time.monotonic()
+        self.finished = None
+        self._reporter = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self):
+        """الرسائل المحذوفة في الثانية"""
+        return self.deleted / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self):
+        if self.finished is None:
+            head = "🧹 جارٍ المسح..."
+        elif self.error:
+            head = f"⚠️ توقف المسح: {self.error}"
+        elif self.cancelled:
+            head = "🛑 تم إيقاف المسح."
+        else:
+            head = "✅ انتهى المسح."
+        text = f"{head}\nتم حذف **{self.deleted}** من {self.limit} (فُحصت {self.scanned} رسالة، {self.rate:.1f} رسالة/ث)"
+        if self.failed:
+            text += f"\nفشل حذف {self.failed} رسالة."
+        return text
+
+
+class PurgeCancelButton(discord.ui.DynamicItem[discord.ui.Button], template=r'purge_cancel_(?P<channel>\d+)'):
+    # يُضبط من PurgeEngine عند إنشائه
+    engine = None
+
+    def __init__(self, channel_id):
+        super().__init__(discord.ui.Button(label="إيقاف", style=discord.ButtonStyle.red, custom_id=f"purge_cancel_{channel_id}"))
+        self.channel_id = channel_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match, /):
+        return cls(int(match['channel']))
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.engine.cancel(self.channel_id, interaction.user.id, interaction.permissions.manage_messages):
+            await interaction.response.send_message("🛑 سيتوقف المسح بعد الدفعة الحالية.", ephemeral=True)
+        else:
+            await interaction.response.send_message("❌ لا يوجد مسح نشط يمكنك إيقافه هنا.", ephemeral=True)
+
+
+class PurgeEngine:
+    def __init__(self, single_rate=5, single_per=5.0, progress_every=2.0, bulk_size=BULK_SIZE):
+        self.single_rate = single_rate
+        self.single_per = single_per
+        self.progress_every = progress_every
+        self.bulk_size = bulk_size
+        # القناة => PurgeJob (مسح واحد لكل قناة)
+        self.jobs = {}
+        self.deleted = 0
+        PurgeCancelButton.engine = self
+
+    def active(self, channel_id):
+        return channel_id in self.jobs
+
+    def reserve(self, channel_id, owner_id, limit):
+        """حجز القناة لمسح جديد، ويرجع None إذا كان فيها مسح نشط"""
+        if channel_id in self.jobs:
+            return None
+        job = self.jobs[channel_id] = PurgeJob(channel_id, owner_id, limit)
+        return job
+
+    def release(self, job):
+        if self.jobs.get(job.channel_id) is job:
+            del self.jobs[job.channel_id]
+
+    def cancel(self, channel_id, user_id=None, moderator=True):
+        """إيقاف المسح (لصاحبه أو لمن يملك manage_messages)"""
+        job = self.jobs.get(channel_id)
+        if job is None or not (moderator or job.owner_id == user_id):
+            return False
+        job.cancelled = True
+        return True
+
+    def cancel_view(self, channel_id):
+        view = discord.ui.View(timeout=None)
+        view.add_item(PurgeCancelButton(channel_id))
+        return view
+
+    # ------------------------------------------------------------------
+    # التنفيذ
+    # ------------------------------------------------------------------
+
+    async def run(self, job, channel, predicate, before=None, on_progress=None):
+        """المسح حتى job.limit رسالة مطابقة أو الإلغاء. on_progress(job) coroutine اختيارية"""
+        bucket = TokenBucket(self.single_rate, self.single_per)
+        cutoff = discord.utils.utcnow() - BULK_MAX_AGE
+        chunk = []
+        inflight = None
+        queued = 0
+        last_report = time.monotonic()
+        try:
+            async for message in channel.history(limit=None, before=before):
+                if job.cancelled or job.error or queued >= job.limit:
+                    break
+                job.scanned += 1
+                if not predicate(message):
+                    continue
+                queued += 1
+
+                if message.created_at > cutoff:
+                    chunk.append(message)
+                    if len(chunk) >= self.bulk_size:
+                        if inflight is not None:
+                            await inflight
+                        inflight = asyncio.create_task(self._delete_chunk(job, channel, chunk, bucket))
+                        chunk = []
+                else:
+                    # السجل من الأحدث للأقدم: بعد أول رسالة قديمة كل ما يليها قديم
+                    await self._delete_single(job, message, bucket)
+
+                now = time.monotonic()
+                if on_progress is not None and now - last_report >= self.progress_every:
+                    last_report = now
+                    self._report(job, on_progress)
+
+            if inflight is not None:
+                await inflight
+            if chunk and not job.error:
+                await self._delete_chunk(job, channel, chunk, bucket)
+        except discord.Forbidden:
+            job.error = "لا أملك صلاحية قراءة سجل القناة أو حذف الرسائل"
+        finally:
+            if inflight is not None and not inflight.done():
+                inflight.cancel()
+            job.finished = time.monotonic()
+            self.release(job)
+        return job
+
+    async def _delete_chunk(self, job, channel, messages, bucket):
+        if job.cancelled or job.error:
+            return
+        try:
+            await channel.delete_messages(messages)
+        except discord.Forbidden:
+            job.error = "لا أملك صلاحية حذف الرسائل"
+        except discord.HTTPException:
+            # غالباً رسالة تجاوزت 14 يوماً أثناء المسح => الحذف الفردي لهذه الدفعة
+            for message in messages:
+                await self._delete_single(job, message, bucket)
+        else:
+            job.deleted += len(messages)
+            self.deleted += len(messages)
+
+    async def _delete_single(self, job, message, bucket):
+        if job.cancelled or job.error:
+            return
+        while (delay := bucket.delay()) > 0:
+            await asyncio.sleep(delay)
+        bucket.take()
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass # حُذفت مسبقاً
+        except discord.Forbidden:
+            job.error = "لا أملك صلاحية حذف الرسائل"
+        except discord.HTTPException:
+            job.failed += 1
+        else:
+            job.deleted += 1
+            self.deleted += 1
+
+    def _report(self, job, on_progress):
+        # تحديث واحد معلّق فقط: لا ننتظره ولا نكدّس التحديثات إذا تأخر
+        if job._reporter is None or job._reporter.done():
+            job._reporter = asyncio.create_task(on_progress(job))
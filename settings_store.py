@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import threading
+
+from write_behind import WriteBehind
+
+# -------------------------------------------------------------------------
+# مخزن الإعدادات لكل سيرفر (SQLite + WAL) مع كتابة مؤجلة (Write-Behind)
+# -------------------------------------------------------------------------
+# كل إعداد محفوظ كصف مستقل: (السيرفر، القسم، المفتاح) => قيمة JSON.
+# القراءات تُخدم من ذاكرة مؤقتة لكل سيرفر، والتعديلات تُحدّث الذاكرة فوراً
+# ثم تُجمع وتُكتب دفعة واحدة (معاملة واحدة) خارج حلقة الأحداث.
+#
+# الأقسام المعروفة: welcome_embed, azkar_buttons, auto_responses, auto_responses_mode,
+# auto_responses_cooldown, welcome_channel
+
+# السيرفر "القالب": يحمل الإعدادات المستوردة من settings.json القديم،
+# ويُنسخ لأي سيرفر جديد عند أول استخدام له.
+TEMPLATE_GUILD = 0
+
+_DELETE = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER NOT NULL,
+    section  TEXT    NOT NULL,
+    item_key TEXT    NOT NULL,
+    value    TEXT    NOT NULL,
+    PRIMARY KEY (guild_id, section, item_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SettingsStore:
+    def __init__(self, path, delay=2.0):
+        self.path = path
+        self.delay = delay
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._cache = {}
+        self._pending = {}
+        self._pending_guilds = set()
+        self._writer = WriteBehind(delay, self._has_pending, self._take_batch, self._write_batch, self._requeue, 'الإعدادات')
+        self._listeners = []
+        self.reads = 0
+        self.writes = 0
+
+    # ------------------------------------------------------------------
+    # الترحيل من settings.json (مرة واحدة فقط)
+    # ------------------------------------------------------------------
+
+    def migrate_json(self, json_path):
+        """استيراد settings.json القديم كقالب للسيرفرات، مرة واحدة فقط"""
+        with self._db_lock:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone()
+            if done or not os.path.exists(json_path):
+                return False
+
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+
+            rows = [
+                (TEMPLATE_GUILD, section, str(key), json.dumps(value, ensure_ascii=False))
+                for section, items in legacy.items() if isinstance(items, dict)
+                for key, value in items.items()
+            ]
+            self._conn.execute('BEGIN')
+            self._conn.executemany('INSERT OR REPLACE INTO guild_settings VALUES (?, ?, ?, ?)', rows)
+            self._conn.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (json_path,))
+            self._conn.execute('COMMIT')
+
+        self._cache.pop(TEMPLATE_GUILD, None)
+        print(f"✅ تم ترحيل {len(rows)} إعداداً من {json_path} إلى {self.path}")
+        return True
+
+    # ------------------------------------------------------------------
+    # القراءة
+    # ------------------------------------------------------------------
+
+    def _load_rows(self, guild_id):
+        with self._db_lock:
+            rows = self._conn.execute(
+                'SELECT section, item_key, value FROM guild_settings WHERE guild_id = ?', (guild_id,)
+            ).fetchall()
+            known = self._conn.execute('SELECT 1 FROM guilds WHERE guild_id = ?', (guild_id,)).fetchone()
+
+        settings = {}
+        for section, key, value in rows:
+            settings.setdefault(section, {})[key] = json.loads(value)
+        return settings, bool(known)
+
+    def get(self, guild_id):
+        """إعدادات السيرفر من الذاكرة المؤقتة (لا تعدّلها مباشرة؛ استخدم set/delete)"""
+        guild_id = guild_id or TEMPLATE_GUILD
+        self.reads += 1
+        settings = self._cache.get(guild_id)
+        if settings is not None:
+            return settings
+
+        settings, known = self._load_rows(guild_id)
+        if not known and guild_id != TEMPLATE_GUILD and guild_id not in self._pending_guilds:
+            # سيرفر جديد: نسخ القالب إليه ليبدأ بنفس الإعدادات السابقة
+            settings = json.loads(json.dumps(self.get(TEMPLATE_GUILD)))
+            for section, items in settings.items():
+                for key, value in items.items():
+                    self._pending[(guild_id, section, key)] = value
+            self._pending_guilds.add(guild_id)
+            self._writer.schedule()
+
+        self._cache[guild_id] = settings
+        return settings
+
+    def preload(self):
+        """تحميل كل السيرفرات المحفوظة إلى الذاكرة دفعة واحدة (عند الإقلاع)"""
+        with self._db_lock:
+            rows = self._conn.execute('SELECT guild_id, section, item_key, value FROM guild_settings').fetchall()
+            known = {row[0] for row in self._conn.execute('SELECT guild_id FROM guilds')}
+
+        loaded = {guild_id: {} for guild_id in known | {TEMPLATE_GUILD}}
+        for guild_id, section, key, value in rows:
+            loaded.setdefault(guild_id, {}).setdefault(section, {})[key] = json.loads(value)
+        for guild_id, settings in loaded.items():
+            self._cache.setdefault(guild_id, settings)
+        return len(loaded)
+
+    def section(self, guild_id, section):
+        """قسم واحد من إعدادات السيرفر"""
+        return self.get(guild_id).get(section, {})
+
+    def guild_ids(self):
+        """كل السيرفرات المحفوظة في قاعدة البيانات"""
+        with self._db_lock:
+            rows = self._conn.execute('SELECT guild_id FROM guilds').fetchall()
+        return {row[0] for row in rows} | self._pending_guilds
+
+    # ------------------------------------------------------------------
+    # الكتابة
+    # ------------------------------------------------------------------
+
+    def add_listener(self, callback):
+        """callback(guild_id, section) يُستدعى بعد كل تعديل لإبطال الذاكرات المشتقة"""
+        self._listeners.append(callback)
+
+    def _changed(self, guild_id, section):
+        for callback in self._listeners:
+            callback(guild_id, section)
+        self._writer.schedule()
+
+    def set(self, guild_id, section, key, value):
+        """تعديل عنصر واحد (صف واحد في قاعدة البيانات)"""
+        guild_id = guild_id or TEMPLATE_GUILD
+        self.get(guild_id).setdefault(section, {})[key] = value
+        self._pending[(guild_id, section, key)] = value
+        self._pending_guilds.add(guild_id)
+        self._changed(guild_id, section)
+
+    def set_many(self, guild_id, section, mapping):
+        """تعديل عدة عناصر في نفس القسم كتعديل واحد"""
+        guild_id = guild_id or TEMPLATE_GUILD
+        items = self.get(guild_id).setdefault(section, {})
+        for key, value in mapping.items():
+            items[key] = value
+            self._pending[(guild_id, section, key)] = value
+        self._pending_guilds.add(guild_id)
+        self._changed(guild_id, section)
+
+    def delete(self, guild_id, section, key):
+        """حذف عنصر واحد، ويرجع False إذا لم يكن موجوداً"""
+        guild_id = guild_id or TEMPLATE_GUILD
+        items = self.get(guild_id).get(section, {})
+        if key not in items:
+            return False
+        del items[key]
+        self._pending[(guild_id, section, key)] = _DELETE
+        self._changed(guild_id, section)
+        return True
+
+    def replace_section(self, guild_id, section, mapping):
+        """استبدال قسم كامل (مثل welcome_embed) بصفوف جديدة"""
+        guild_id = guild_id or TEMPLATE_GUILD
+        settings = self.get(guild_id)
+        for key in settings.get(section, {}):
+            if key not in mapping:
+                self._pending[(guild_id, section, key)] = _DELETE
+        settings[section] = dict(mapping)
+        for key, value in mapping.items():
+            self._pending[(guild_id, section, key)] = value
+        self._pending_guilds.add(guild_id)
+        self._changed(guild_id, section)
+
+    # ------------------------------------------------------------------
+    # الحفظ المؤجل
+    # ------------------------------------------------------------------
+
+    def _take_batch(self):
+        batch, guilds = self._pending, self._pending_guilds
+        self._pending, self._pending_guilds = {}, set()
+        upserts = [
+            (g, s, k, json.dumps(v, ensure_ascii=False))
+            for (g, s, k), v in batch.items() if v is not _DELETE
+        ]
+        deletes = [(g, s, k) for (g, s, k), v in batch.items() if v is _DELETE]
+        return upserts, deletes, [(g,) for g in guilds]
+
+    def _write_batch(self, batch):
+        upserts, deletes, guilds = batch
+        with self._db_lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('INSERT OR IGNORE INTO guilds VALUES (?)', guilds)
+                self._conn.executemany('INSERT OR REPLACE INTO guild_settings VALUES (?, ?, ?, ?)', upserts)
+                self._conn.executemany(
+                    'DELETE FROM guild_settings WHERE guild_id = ? AND section = ? AND item_key = ?', deletes
+                )
+                self._conn.execute('COMMIT')
+            except sqlite3.IntegrityError:
+                self._conn.execute('ROLLBACK')
+                self._write_valid_rows(upserts, deletes, guilds)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        self.writes += 1
+
+    def _write_valid_rows(self, upserts, deletes, guilds):
+        # صف غير صالح لا يمنع حفظ بقية الدفعة (كما في PointsLedger): كل صف على حدة، والمرفوض يُسقط
+        self._conn.execute('BEGIN')
+        try:
+            for row in guilds:
+                try:
+                    self._conn.execute('INSERT OR IGNORE INTO guilds VALUES (?)', row)
+                except sqlite3.IntegrityError as e:
+                    print(f"❌ أُسقط سيرفر غير صالح {row}: {e}")
+            for row in upserts:
+                try:
+                    self._conn.execute('INSERT OR REPLACE INTO guild_settings VALUES (?, ?, ?, ?)', row)
+                except sqlite3.IntegrityError as e:
+                    print(f"❌ أُسقط إعداد غير صالح {row[:3]}: {e}")
+            self._conn.executemany(
+                'DELETE FROM guild_settings WHERE guild_id = ? AND section = ? AND item_key = ?', deletes
+            )
+            self._conn.execute('COMMIT')
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _has_pending(self):
+        return bool(self._pending or self._pending_guilds)
+
+    def _requeue(self, batch):
+        upserts, deletes, guilds = batch
+        for g, s, k, v in upserts:
+            self._pending.setdefault((g, s, k), json.loads(v))
+        for key in deletes:
+            self._pending.setdefault(key, _DELETE)
+        self._pending_guilds.update(g for (g,) in guilds)
+
+    def flush_sync(self):
+        """كتابة التعديلات المعلّقة فوراً (بعد توقف حلقة الأحداث عند الإغلاق)"""
+        self._writer.flush_sync()
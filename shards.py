@@ -0,0 +1,181 @@
+import os
+import time
+
+from discord.ext import commands
+
+# -------------------------------------------------------------------------
+# التقسيم (Sharding) وصحة كل جزء
+# -------------------------------------------------------------------------
+# - البوت يعمل بـ AutoShardedBot: عدد الأجزاء يحدده ديسكورد تلقائياً، أو يُحدد
+#   يدوياً بـ SHARD_COUNT و SHARD_IDS (مثلاً "0,1") لتشغيل الأجزاء في عمليات منفصلة.
+# - كل سيرفر موجود في جزء واحد فقط، فالحالة المفهرسة بآيدي السيرفر أو القناة
+#   (ألعاب المافيا والرياضيات وجلسات الصوت) تبقى صحيحة دون تعديل داخل العملية.
+#   مع عمليات منفصلة: ملفات الحالة المحفوظة تُسمى حسب الأجزاء (instance_path)،
+#   والحالة المستعادة تُصفّى بـ owns_guild حتى لا تشغل عملية سيرفرات غيرها.
+# - ShardMonitor يحسب معدل الأحداث لكل جزء ويعرض زمن الاستجابة وعدد السيرفرات
+#   عبر خادم keep_alive (بخطاف dispatch يمكن لأنظمة القياس الأخرى استخدامه أيضاً).
+
+
+def sharding_options():
+    """shard_count و shard_ids من متغيرات البيئة (فارغة => تلقائي)"""
+    options = {}
+    count = os.environ.get('SHARD_COUNT')
+    ids = os.environ.get('SHARD_IDS')
+    if count:
+        options['shard_count'] = int(count)
+    if ids:
+        if not count:
+            raise ValueError("SHARD_IDS يتطلب تحديد SHARD_COUNT أيضاً.")
+        options['shard_ids'] = [int(shard_id) for shard_id in ids.split(',') if shard_id.strip()]
+    return options
+
+
+def instance_path(path):
+    """اسم ملف حالة خاص بأجزاء هذه العملية (mafia_games.json => mafia_games.shards-0-1.json)"""
+    ids = os.environ.get('SHARD_IDS')
+    if not ids:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shards-{'-'.join(shard_id.strip() for shard_id in ids.split(',') if shard_id.strip())}{ext}"
+
+
+def shard_for_guild(guild_id, shard_count):
+    """الجزء الذي يخدم السيرفر (نفس معادلة ديسكورد)"""
+    return (guild_id >> 22) % shard_count
+
+
+def shard_of(args):
+    """الجزء الذي يخص الحدث (من أول وسيط يحمل سيرفراً)، أو None للأحداث العامة"""
+    for arg in args:
+        guild = getattr(arg, 'guild', None)
+        if guild is not None:
+            return getattr(guild, 'shard_id', None)
+        shard_id = getattr(arg, 'shard_id', None)
+        if isinstance(shard_id, int):
+            return shard_id
+    return None
+
+
+class _Rate:
+    """عدّاد أحداث بنافذة منزلقة من خانات بالثانية"""
+    __slots__ = ('buckets', 'second', 'total')
+
+    def __init__(self, window):
+        self.buckets = [0] * window
+        self.second = int(time.monotonic())
+        self.total = 0
+
+    def _advance(self, now):
+        window = len(self.buckets)
+        if now - self.second >= window:
+            self.buckets = [0] * window
+        else:
+            for second in range(self.second + 1, now + 1):
+                self.buckets[second % window] = 0
+        self.second = now
+
+    def add(self, now):
+        if now != self.second:
+            self._advance(now)
+        self.buckets[now % len(self.buckets)] += 1
+        self.total += 1
+
+    def per_second(self, now):
+        # قراءة فقط (تُستدعى من خيط خادم keep_alive): الخانات الأقدم من النافذة لا تُحسب
+        window = len(self.buckets)
+        elapsed = now - self.second
+        if elapsed >= window:
+            return 0.0
+        stale = {second % window for second in range(self.second + 1, now + 1)}
+        return sum(count for i, count in enumerate(self.buckets) if i not in stale) / window
+
+
+class ShardMonitor:
+    def __init__(self, bot, window=60):
+        self.bot = bot
+        self.window = window
+        self._rates = {}
+        self._state = {}
+        self._since = {}
+        for event in ('shard_connect', 'shard_ready', 'shard_resumed', 'shard_disconnect'):
+            bot.add_listener(self._state_listener(event), f'on_{event}')
+
+    def _state_listener(self, event):
+        async def listener(shard_id):
+            self._state[shard_id] = event.split('_', 1)[1]
+            self._since[shard_id] = time.time()
+        return listener
+
+    def record(self, shard_id):
+        rate = self._rates.get(shard_id)
+        if rate is None:
+            rate = self._rates[shard_id] = _Rate(self.window)
+        rate.add(int(time.monotonic()))
+
+    def snapshot(self):
+        """حالة كل جزء: زمن الاستجابة، معدل الأحداث، عدد السيرفرات"""
+        now = int(time.monotonic())
+        guilds = {}
+        for guild in list(self.bot.guilds):
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+        # الأجزاء المتصلة + الأجزاء التي سُجلت لها حالة (قد تكون منقطعة الآن)
+        latencies = dict(self.bot.latencies)
+        shards = {}
+        for shard_id in sorted(latencies.keys() | self._state.keys()):
+            latency = latencies.get(shard_id, float('nan'))
+            info = self.bot.get_shard(shard_id)
+            rate = self._rates.get(shard_id)
+            shards[shard_id] = {
+                'state': self._state.get(shard_id, 'connecting'),
+                'since': self._since.get(shard_id),
+                'closed': info.is_closed() if info else True,
+                'latency_ms': round(latency * 1000, 1) if latency == latency else None, # NaN قبل أول نبضة
+                'events_per_sec': round(rate.per_second(now), 2) if rate else 0.0,
+                'events_total': rate.total if rate else 0,
+                'guilds': guilds.get(shard_id, 0)
+            }
+        unsharded = self._rates.get(None)
+        return {
+            'shard_count': self.bot.shard_count,
+            'shard_ids': self.bot.shard_ids,
+            'guilds': len(self.bot.guilds),
+            'unsharded_events_per_sec': round(unsharded.per_second(now), 2) if unsharded else 0.0,
+            'shards': shards
+        }
+
+
+class ShardedBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._dispatch_hooks = []
+        self._close_hooks = []
+        self.shard_monitor = ShardMonitor(self)
+        self.add_dispatch_hook(lambda event_name, args: self.shard_monitor.record(shard_of(args)))
+
+    def add_dispatch_hook(self, callback):
+        """callback(event_name, args) يُستدعى بشكل متزامن قبل توزيع كل حدث (للقياس فقط)"""
+        self._dispatch_hooks.append(callback)
+
+    def owns_guild(self, guild_id):
+        """هل السيرفر على أحد أجزاء هذه العملية؟ (دائماً True إذا كانت كل الأجزاء هنا)"""
+        if self.shard_ids is None or not self.shard_count:
+            return True
+        return shard_for_guild(guild_id, self.shard_count) in self.shard_ids
+
+    def add_close_hook(self, callback):
+        """callback() (coroutine) يُنتظر قبل إغلاق البوت، مثل إيقاف خادم HTTP"""
+        self._close_hooks.append(callback)
+
+    async def close(self):
+        for callback in self._close_hooks:
+            try:
+                await callback()
+            except Exception as e:
+                print(f"❌ خطأ أثناء الإغلاق: {e}")
+        await super().close()
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        for callback in self._dispatch_hooks:
+            callback(event_name, args)
+        super().dispatch(event_name, *args, **kwargs)
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import discord
+
+# -------------------------------------------------------------------------
+# مدير جلسات الصوت: إعادة استخدام الاتصال، فصل الجلسات الخاملة، وحد أقصى للجلسات
+# -------------------------------------------------------------------------
+# بدلاً من channel.connect() في كل أمر: الاتصال الموجود يُنقل بين القنوات،
+# والجلسة تُفصل تلقائياً بعد مدة خمول (لا مستمعين أو لا يوجد صوت)،
+# مع حد أقصى لعدد الجلسات المتزامنة في العملية الواحدة.
+
+
+class VoiceCapacityError(Exception):
+    """تم الوصول للحد الأقصى لجلسات الصوت المتزامنة"""
+
+
+class VoiceSessionManager:
+    def __init__(self, bot, idle_timeout=300, max_sessions=50, check_interval=30):
+        self.bot = bot
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.check_interval = check_interval
+        self._idle_since = {}
+        self._on_disconnect = []
+        self._reaper = None
+        self._connecting = set()
+
+    def add_disconnect_listener(self, callback):
+        """callback(guild_id) يُستدعى عند فصل جلسة (لتنظيف قائمة التشغيل مثلاً)"""
+        self._on_disconnect.append(callback)
+
+    def start(self):
+        """تشغيل مهمة فحص الجلسات الخاملة (مرة واحدة فقط)"""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    # ------------------------------------------------------------------
+    # الاتصال والفصل
+    # ------------------------------------------------------------------
+
+    def busy_elsewhere(self, guild, channel):
+        """قناة البوت إذا كان يشغل (أو متوقفاً مؤقتاً) في قناة غير channel، وإلا None"""
+        vc = guild.voice_client
+        if vc and vc.is_connected() and (vc.is_playing() or vc.is_paused()) and vc.channel != channel:
+            return vc.channel
+        return None
+
+    async def ensure(self, channel):
+        """إرجاع اتصال السيرفر في القناة المطلوبة: نقل الاتصال الحالي أو إنشاء واحد جديد"""
+        guild = channel.guild
+        vc = guild.voice_client
+        self._idle_since.pop(guild.id, None)
+
+        if vc and vc.is_connected():
+            if vc.channel != channel:
+                await vc.move_to(channel)
+            return vc
+
+        if len(self.bot.voice_clients) + len(self._connecting) >= self.max_sessions:
+            raise VoiceCapacityError(f"الحد الأقصى للجلسات الصوتية ({self.max_sessions}) مستخدم بالكامل.")
+
+        self._connecting.add(guild.id)
+        try:
+            if vc:
+                # اتصال قديم منقطع: تنظيفه قبل إعادة الاتصال
+                await vc.disconnect(force=True)
+            return await channel.connect()
+        finally:
+            self._connecting.discard(guild.id)
+
+    async def disconnect(self, guild):
+        """فصل جلسة السيرفر وإبلاغ المستمعين"""
+        vc = guild.voice_client
+        if not vc:
+            return False
+        await vc.disconnect()
+        self.forget(guild.id)
+        return True
+
+    def forget(self, guild_id):
+        """تنظيف حالة السيرفر بعد فصل الجلسة (من البوت أو من خارجه)"""
+        self._idle_since.pop(guild_id, None)
+        for callback in self._on_disconnect:
+            callback(guild_id)
+
+    # ------------------------------------------------------------------
+    # الجلسات الخاملة
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _has_listeners(vc):
+        return any(not member.bot for member in vc.channel.members)
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                print(f"❌ خطأ أثناء فحص الجلسات الصوتية الخاملة: {e}")
+
+    async def reap_idle(self):
+        """فصل الجلسات الخاملة لأكثر من idle_timeout، ويرجع عدد الجلسات المفصولة"""
+        now = time.monotonic()
+        reaped = 0
+        for vc in list(self.bot.voice_clients):
+            guild = vc.guild
+            active = vc.is_connected() and vc.is_playing() and self._has_listeners(vc)
+            if active:
+                self._idle_since.pop(guild.id, None)
+                continue
+
+            since = self._idle_since.setdefault(guild.id, now)
+            if now - since >= self.idle_timeout:
+                await self.disconnect(guild)
+                reaped += 1
+        return reaped
+
+    # ------------------------------------------------------------------
+    # الإحصائيات
+    # ------------------------------------------------------------------
+
+    def ffmpeg_processes(self):
+        """عدد عمليات FFmpeg الحية المرتبطة بالجلسات"""
+        count = 0
+        for vc in self.bot.voice_clients:
+            source = getattr(vc, 'source', None)
+            source = getattr(source, 'original', source)
+            process = getattr(source, '_process', None)
+            if isinstance(source, discord.FFmpegAudio) and process is not None and process.poll() is None:
+                count += 1
+        return count
+
+    def stats(self):
+        return {
+            'sessions': len(self.bot.voice_clients),
+            'idle': len(self._idle_since),
+            'ffmpeg_processes': self.ffmpeg_processes(),
+            'max_sessions': self.max_sessions
+        }
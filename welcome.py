@@ -0,0 +1,202 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+# -------------------------------------------------------------------------
+# خط الترحيب لكل سيرفر (Welcome Pipeline)
+# -------------------------------------------------------------------------
+# - قناة الترحيب محفوظة بالـ ID لكل سيرفر وتُجلب بـ guild.get_channel (O(1)).
+# - السيرفرات القديمة بدون ID تستخدم الاسم الافتراضي مرة واحدة ثم يُحفظ الـ ID في الذاكرة.
+# - الـ Embed يُبنى مرة واحدة لكل تعديل في الإعدادات، وعند الانضمام تُضاف الإشارة للعضو فقط.
+# - وضع الموجة (Burst): إذا تجاوز معدل الانضمام الحد، تُجمع الانضمامات لبضع ثوانٍ
+#   وتُرسل رسالة ترحيب واحدة تذكر حتى burst_mentions عضواً، ثم يعود الترحيب الفردي
+#   تلقائياً عندما ينخفض المعدل.
+
+# اسم القناة القديم (يُستخدم فقط إذا لم تُحدد قناة بـ /قناة_الترحيب)
+LEGACY_CHANNEL_NAME = 'اسم-القناة-الترحيب'
+
+DEFAULT_IMAGE_URL = 'https://example.com/default_welcome_image.png'
+
+_NOT_FOUND = object()
+
+
+class WelcomePipeline:
+    def __init__(self, store, outbound=None, burst_threshold=10, rate_window=60, burst_window=5, burst_mentions=20):
+        self.store = store
+        self.outbound = outbound
+        self.burst_threshold = burst_threshold
+        self.rate_window = rate_window
+        self.burst_window = burst_window
+        self.burst_mentions = burst_mentions
+        # السيرفر => أوقات الانضمام خلال rate_window
+        self._joins = {}
+        # السيرفر => الأعضاء المنتظرين لرسالة الموجة
+        self._pending = {}
+        self._flush_tasks = {}
+        # السيرفر => آيدي القناة (أو _NOT_FOUND)
+        self._channels = {}
+        # السيرفر => (Embed جاهز، نص الوصف بعد الإشارة للعضو) أو None
+        self._templates = {}
+        store.add_listener(self._on_settings_changed)
+
+    def _on_settings_changed(self, guild_id, section):
+        if section == 'welcome_embed':
+            self._templates.pop(guild_id, None)
+        elif section == 'welcome_channel':
+            self._channels.pop(guild_id, None)
+
+    # ------------------------------------------------------------------
+    # قناة الترحيب
+    # ------------------------------------------------------------------
+
+    def set_channel(self, guild_id, channel_id):
+        self.store.set(guild_id, 'welcome_channel', 'id', channel_id)
+
+    def resolve_channel(self, guild):
+        """قناة الترحيب للسيرفر أو None"""
+        channel_id = self._channels.get(guild.id)
+        if channel_id is None:
+            channel_id = self.store.section(guild.id, 'welcome_channel').get('id')
+            if channel_id is None:
+                # بحث بالاسم مرة واحدة فقط للسيرفرات التي لم تحدد قناة بعد
+                legacy = discord.utils.get(guild.text_channels, name=LEGACY_CHANNEL_NAME)
+                channel_id = legacy.id if legacy else _NOT_FOUND
+            self._channels[guild.id] = channel_id
+
+        if channel_id is _NOT_FOUND:
+            return None
+        return guild.get_channel(channel_id)
+
+    def on_channel_delete(self, channel):
+        if self._channels.get(channel.guild.id) == channel.id:
+            self._channels.pop(channel.guild.id, None)
+
+    def on_channel_create(self, channel):
+        # قناة جديدة بالاسم القديم قد تكون قناة الترحيب
+        if channel.name == LEGACY_CHANNEL_NAME and self._channels.get(channel.guild.id) is _NOT_FOUND:
+            self._channels.pop(channel.guild.id, None)
+
+    def on_channel_update(self, before, after):
+        # تغيير الاسم يؤثر فقط على السيرفرات التي تعتمد على الاسم القديم
+        if before.name != after.name and LEGACY_CHANNEL_NAME in (before.name, after.name):
+            if not self.store.section(after.guild.id, 'welcome_channel').get('id'):
+                self._channels.pop(after.guild.id, None)
+
+    # ------------------------------------------------------------------
+    # رسالة الترحيب
+    # ------------------------------------------------------------------
+
+    def _template(self, guild_id):
+        if guild_id in self._templates:
+            return self._templates[guild_id]
+
+        embed_data = self.store.section(guild_id, 'welcome_embed')
+        template = None
+        if embed_data:
+            embed = discord.Embed(
+                title=embed_data.get('title', 'مرحباً!'),
+                color=embed_data.get('color', discord.Color.blue())
+            )
+            image_url = embed_data.get('image_url')
+            if image_url and image_url != DEFAULT_IMAGE_URL:
+                embed.set_image(url=image_url)
+            template = (embed, embed_data.get('description', ''))
+
+        self._templates[guild_id] = template
+        return template
+
+    def build_embed(self, member):
+        """نسخة من الـ Embed الجاهز مع الإشارة للعضو، أو None إذا لم يُضبط الترحيب"""
+        template = self._template(member.guild.id)
+        if template is None:
+            return None
+        embed, description = template
+        embed = embed.copy()
+        embed.description = f"أهلاً بك يا {member.mention}! {description}"
+        return embed
+
+    def build_burst_embed(self, guild_id, members):
+        """Embed واحد يرحب بمجموعة أعضاء (حتى burst_mentions إشارة)"""
+        template = self._template(guild_id)
+        if template is None:
+            return None
+        embed, description = template
+        embed = embed.copy()
+        shown = members[:self.burst_mentions]
+        mentions = "، ".join(member.mention for member in shown)
+        embed.description = f"أهلاً بكم يا {mentions}! {description}"
+        if len(members) > len(shown):
+            embed.set_footer(text=f"و {len(members) - len(shown)} عضواً آخرين انضموا للتو 🎉")
+        return embed
+
+    # ------------------------------------------------------------------
+    # معدل الانضمام ووضع الموجة
+    # ------------------------------------------------------------------
+
+    def _record_join(self, guild_id, now):
+        joins = self._joins.get(guild_id)
+        if joins is None:
+            joins = self._joins[guild_id] = deque()
+        joins.append(now)
+        self._prune(joins, now)
+        return len(joins)
+
+    def _prune(self, joins, now):
+        cutoff = now - self.rate_window
+        while joins and joins[0] < cutoff:
+            joins.popleft()
+
+    def join_rate(self, guild_id):
+        """عدد الانضمامات خلال آخر rate_window ثانية (متاح لأنظمة الإشراف)"""
+        joins = self._joins.get(guild_id)
+        if not joins:
+            return 0
+        self._prune(joins, time.monotonic())
+        if not joins:
+            del self._joins[guild_id]
+            return 0
+        return len(joins)
+
+    def in_burst(self, guild_id):
+        return guild_id in self._pending
+
+    async def welcome(self, member):
+        guild_id = member.guild.id
+        rate = self._record_join(guild_id, time.monotonic())
+
+        if self.in_burst(guild_id) or rate >= self.burst_threshold:
+            self._pending.setdefault(guild_id, []).append(member)
+            if guild_id not in self._flush_tasks:
+                self._flush_tasks[guild_id] = asyncio.create_task(self._flush_burst(member.guild))
+            return
+
+        channel = self.resolve_channel(member.guild)
+        if channel is None:
+            return
+        embed = self.build_embed(member)
+        if embed is not None:
+            await self._send(channel, embed)
+
+    async def _send(self, channel, embed):
+        if self.outbound is not None:
+            await self.outbound.channel_send(channel, embed=embed)
+        else:
+            await channel.send(embed=embed)
+
+    async def _flush_burst(self, guild):
+        try:
+            await asyncio.sleep(self.burst_window)
+        finally:
+            members = self._pending.pop(guild.id, [])
+            self._flush_tasks.pop(guild.id, None)
+
+        channel = self.resolve_channel(guild)
+        embed = self.build_burst_embed(guild.id, members) if members else None
+        if channel is None or embed is None:
+            return
+        try:
+            await self._send(channel, embed)
+        except discord.HTTPException as e:
+            print(f"❌ تعذر إرسال ترحيب الموجة: {e}")
@@ -0,0 +1,67 @@
+import asyncio
+import sqlite3
+
+# -------------------------------------------------------------------------
+# الكتابة المؤجلة المجمّعة (Write-Behind) المشتركة بين مخازن SQLite
+# -------------------------------------------------------------------------
+# المخزن يحدّث ذاكرته فوراً ويسجل التعديل كمعلّق، ثم يطلب schedule().
+# بعد delay ثانية تُؤخذ كل التعديلات المعلّقة كدفعة واحدة وتُكتب في معاملة
+# واحدة على الـ executor (خارج حلقة الأحداث)، ودفعة واحدة فقط تُكتب في كل مرة.
+# إذا فشلت الكتابة تُعاد الدفعة للمعلّقات (requeue) وتُجرب مع الدفعة التالية،
+# إلا خطأ IntegrityError: الصفوف نفسها غير صالحة ولن تنجح أبداً. المخزنان يكتبان
+# الدفعة عندها صفاً صفاً في write_batch ويسقطان المرفوض فقط، فإن وصل الخطأ إلى هنا
+# تُسقط الدفعة كاملة بدلاً من إعادة المحاولة إلى الأبد.
+#
+# المخزن يوفر أربع دوال: has_pending() ، take_batch() ، write_batch(batch)
+# (متزامنة، تعمل في خيط آخر) ، requeue(batch).
+
+
+class WriteBehind:
+    def __init__(self, delay, has_pending, take_batch, write_batch, requeue, label):
+        self.delay = delay
+        self.label = label
+        self._has_pending = has_pending
+        self._take_batch = take_batch
+        self._write_batch = write_batch
+        self._requeue = requeue
+        self._handle = None
+        self._writing = None
+
+    def schedule(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # لا توجد حلقة أحداث (مثلاً في السكربتات) => كتابة مباشرة
+            self.flush_sync()
+            return
+
+        if self._handle is None and self._writing is None:
+            self._handle = loop.call_later(self.delay, self._start_write, loop)
+
+    def _start_write(self, loop):
+        self._handle = None
+        if not self._has_pending():
+            return
+        batch = self._take_batch()
+        self._writing = loop.run_in_executor(None, self._write_batch, batch)
+        self._writing.add_done_callback(lambda fut: self._on_written(fut, batch, loop))
+
+    def _on_written(self, fut, batch, loop):
+        self._writing = None
+        error = None if fut.cancelled() else fut.exception()
+        if isinstance(error, sqlite3.IntegrityError):
+            print(f"❌ أُسقطت دفعة {self.label} غير صالحة: {error}")
+        elif error is not None:
+            print(f"❌ فشل حفظ {self.label}: {error}")
+            self._requeue(batch)
+        # تعديلات وصلت أثناء الكتابة => دفعة جديدة
+        if self._has_pending() and self._handle is None and not loop.is_closed():
+            self._handle = loop.call_later(self.delay, self._start_write, loop)
+
+    def flush_sync(self):
+        """كتابة التعديلات المعلّقة فوراً (بعد توقف حلقة الأحداث عند الإغلاق)"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._has_pending():
+            self._write_batch(self._take_batch())